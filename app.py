@@ -1,20 +1,37 @@
 # app.py
 
 import os
-import uuid
+import shutil
 import time
+from collections import deque
 import streamlit as st
+import streamlit.components.v1 as components
 from dotenv import load_dotenv
 from typing import Optional, Dict, Any
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.chat_history import InMemoryChatMessageHistory
 
 # Local imports
 from src.utils import setup_logging, logger
-from src.config import APP_TITLE, APP_ICON, MEMORY_TYPE, ENABLE_MEMORY_MANAGEMENT
-from src.llm_model import GeminiLLM
-from src.tools import get_agent_tools
-from src.memory import get_conversation_memory
-from src.agent import AIAgent
+from src.config import (
+    APP_TITLE, APP_ICON, MEMORY_TYPE, ENABLE_MEMORY_MANAGEMENT, ENABLE_STREAMING, AGENT_ENGINE, CSV_UPLOAD_DIR,
+    METRICS_PORT, PERSISTENT_BACKEND, SESSION_TRANSCRIPT_MAX_MESSAGES, SESSION_METRICS_WINDOW, SESSION_COOKIE,
+    SESSION_EXPIRATION
+)
+from src.llm_model import GeminiLLM, get_client_pool
+from src.cache import get_llm_cache, get_tool_cache
+from src.tools import get_agent_tools, get_dataset_registry
+from src.tool_runtime import get_tool_runtime, session_scope
+from src.http_client import get_http_client
+from src.sandbox import get_sandbox_pool
+from src.metrics import get_tool_metrics, start_metrics_server
+from src.circuit_breaker import get_breaker_registry
+from src.memory import get_conversation_memory, get_persistent_memory
+from src.history_store import get_chat_history
+from src.session_manager import SessionAgent, get_session_manager, issue_session, verify_session_token
+from src.agent import AIAgent, ToolUsageCallbackHandler, parallel_tool_stats, stream_agent_response
+from src.semantic_cache import get_semantic_cache
+from src.router import get_fast_path_router
 import json
 import plotly.graph_objects as go
 import plotly.express as px
@@ -24,6 +41,8 @@ import random
 # --- Initial Setup ---
 load_dotenv()
 setup_logging()
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
 
 # --- Streamlit App Configuration ---
 st.set_page_config(
@@ -483,13 +502,50 @@ def inject_custom_css():
     """, unsafe_allow_html=True)
 
 # --- Session State Initialization ---
+def load_transcript(session_id: str) -> list:
+    """Rebuild the displayed chat history from the persisted conversation, if any"""
+    history = get_chat_history(session_id)
+    if history is None:
+        return []
+    try:
+        messages = history.messages
+    except Exception as e:
+        logger.error(f"Could not load history for session {session_id}: {e}")
+        return []
+    now = time.time()
+    transcript = [{"type": message.type, "content": message.content, "timestamp": now}
+                  for message in messages if message.type in ("human", "ai")]
+    return transcript[-SESSION_TRANSCRIPT_MAX_MESSAGES:]
+
+def append_transcript(message: Dict[str, Any]):
+    """Add a message to the displayed chat history, keeping only the latest ones in the session"""
+    chat_history = st.session_state.chat_history
+    chat_history.append(message)
+    if len(chat_history) > SESSION_TRANSCRIPT_MAX_MESSAGES:
+        del chat_history[:-SESSION_TRANSCRIPT_MAX_MESSAGES]
+
+def write_session_cookie():
+    """Store a newly issued session token in the browser"""
+    token = st.session_state.pop("pending_session_cookie", None)
+    if token:
+        components.html(
+            f'<script>window.parent.document.cookie = "{SESSION_COOKIE}={token}; path=/; '
+            f'max-age={SESSION_EXPIRATION}; SameSite=Strict";</script>',
+            height=0
+        )
+
 def initialize_session_state():
     """Initialize all required session state variables with enhanced tracking"""
     if "session_id" not in st.session_state:
-        st.session_state.session_id = str(uuid.uuid4())[:8]
+        # A signed cookie identifies the browser, so a refresh reconnects to the persisted history;
+        # ids that this server did not issue are never accepted.
+        session_id = verify_session_token(st.context.cookies.get(SESSION_COOKIE))
+        if session_id is None:
+            session_id, st.session_state.pending_session_cookie = issue_session()
+        st.session_state.session_id = session_id
     
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = load_transcript(st.session_state.session_id)
     
     if "agent_initialized" not in st.session_state:
         st.session_state.agent_initialized = False
@@ -517,7 +573,8 @@ def initialize_session_state():
     
     if "performance_metrics" not in st.session_state:
         st.session_state.performance_metrics = {
-            "response_times": [],
+            "response_times": deque(maxlen=SESSION_METRICS_WINDOW),
+            "first_token_times": deque(maxlen=SESSION_METRICS_WINDOW),
             "tool_usage": {},
             "error_count": 0,
             "successful_responses": 0
@@ -534,6 +591,9 @@ def initialize_session_state():
     
     if "notification_sound" not in st.session_state:
         st.session_state.notification_sound = True
+    
+    if "uploaded_files" not in st.session_state:
+        st.session_state.uploaded_files = {}
 
 initialize_session_state()
 
@@ -607,13 +667,21 @@ def render_performance_metrics():
     with col1:
         # Response time chart
         response_times = st.session_state.performance_metrics["response_times"]
+        first_token_times = st.session_state.performance_metrics["first_token_times"]
         fig = go.Figure(data=go.Scatter(
-            y=response_times,
+            y=list(response_times),
             mode='lines+markers',
             name='Response Time',
             line=dict(color='#00d4ff', width=3),
             marker=dict(color='#ff00ff', size=8)
         ))
+        fig.add_trace(go.Scatter(
+            y=list(first_token_times),
+            mode='lines+markers',
+            name='Time to First Token',
+            line=dict(color='#00ff88', width=3, dash='dot'),
+            marker=dict(color='#ffaa00', size=8)
+        ))
         
         fig.update_layout(
             title="Response Time Analysis",
@@ -629,6 +697,13 @@ def render_performance_metrics():
         fig.update_yaxes(gridcolor='rgba(0, 212, 255, 0.2)')
         
         st.plotly_chart(fig, use_container_width=True)
+        
+        if first_token_times:
+            avg_ttft = sum(first_token_times) / len(first_token_times)
+            avg_total = sum(response_times) / len(response_times)
+            ttft_col, total_col = st.columns(2)
+            ttft_col.metric("⚡ Avg Time to First Token", f"{avg_ttft:.2f}s")
+            total_col.metric("⏱️ Avg Total Response", f"{avg_total:.2f}s")
     
     with col2:
         # Tool usage pie chart
@@ -648,6 +723,14 @@ def render_performance_metrics():
             )
             
             st.plotly_chart(fig, use_container_width=True)
+        
+        fan_out = parallel_tool_stats.snapshot()
+        if fan_out["steps"]:
+            st.caption(
+                f"🔀 Parallel tool steps: {fan_out['parallel_steps']}/{fan_out['steps']} · "
+                f"mean fan-out {fan_out['mean_fan_out']:.1f} (max {fan_out['max_fan_out']}) · "
+                f"latency saved {fan_out['saved_seconds']:.1f}s"
+            )
 
 def render_advanced_stats_dashboard():
     """Render enhanced statistics dashboard with advanced metrics"""
@@ -699,6 +782,27 @@ def render_advanced_stats_dashboard():
         </div>
         ''', unsafe_allow_html=True)
 
+def save_uploaded_csv(uploaded_file) -> tuple:
+    """Copy an uploaded CSV into the upload directory once, register it as a dataset and return (file name, dataset ID)."""
+    file_name = f"{st.session_state.session_id}_{os.path.basename(uploaded_file.name)}"
+    if file_name not in st.session_state.uploaded_files:
+        os.makedirs(CSV_UPLOAD_DIR, exist_ok=True)
+        path = os.path.join(CSV_UPLOAD_DIR, file_name)
+        uploaded_file.seek(0)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
+        logger.info(f"Saved uploaded CSV {file_name} ({uploaded_file.size} bytes)")
+        try:
+            with st.spinner("📊 Parsing dataset..."):
+                dataset_id = get_dataset_registry().register(path, session_id=st.session_state.session_id,
+                                                             name=os.path.basename(uploaded_file.name))
+        except Exception as e:
+            logger.error(f"Could not register dataset {file_name}: {e}")
+            dataset_id = None
+        st.session_state.uploaded_files[file_name] = dataset_id
+        get_session_manager().update(st.session_state.session_id, extra_bytes=session_extra_bytes())
+    return file_name, st.session_state.uploaded_files[file_name]
+
 def render_enhanced_sidebar():
     """Render the enhanced futuristic sidebar"""
     with st.sidebar:
@@ -738,8 +842,8 @@ def render_enhanced_sidebar():
                 
                 mem_type = st.selectbox(
                     "Memory Configuration",
-                    ["buffer", "window", "summary"],
-                    index=["buffer", "window", "summary"].index(st.session_state.memory_type),
+                    ["buffer", "window", "summary", "recall"],
+                    index=["buffer", "window", "summary", "recall"].index(st.session_state.memory_type),
                     help="🔮 Choose your memory processing mode"
                 )
                 
@@ -754,17 +858,24 @@ def render_enhanced_sidebar():
                     if st.button("🗑️ PURGE", help="Clear conversation history"):
                         st.session_state.chat_history = []
                         st.session_state.message_count = 0
-                        if "agent_instance" in st.session_state:
-                            st.session_state.agent_instance._memory.clear()
+                        agent = get_session_manager().get(st.session_state.session_id)
+                        if agent is not None:
+                            agent.memory.clear()
+                        else:
+                            history = get_chat_history(st.session_state.session_id)
+                            if history is not None:
+                                history.clear()
                         st.success("🟢 Memory Purged!")
                         time.sleep(1)
                         st.rerun()
                 
                 with col2:
                     if st.button("🔄 RESET", help="Initialize new session"):
-                        st.session_state.session_id = str(uuid.uuid4())[:8]
+                        get_session_manager().evict(st.session_state.session_id)
+                        st.session_state.session_id, st.session_state.pending_session_cookie = issue_session()
                         st.session_state.agent_initialized = False
                         st.session_state.chat_history = []
+                        st.session_state.uploaded_files = {}
                         st.session_state.message_count = 0
                         st.session_state.session_start_time = time.time()
                         st.success("🟢 System Reset!")
@@ -773,6 +884,25 @@ def render_enhanced_sidebar():
                 
                 st.markdown('</div>', unsafe_allow_html=True)
         
+        # Data Upload
+        with st.container():
+            st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
+            st.markdown("**📂 DATA UPLOAD**")
+            
+            uploaded_file = st.file_uploader(
+                "CSV Dataset",
+                type=["csv"],
+                help="📊 Large files are analyzed from disk in chunks instead of through the chat"
+            )
+            if uploaded_file is not None:
+                file_name, dataset_id = save_uploaded_csv(uploaded_file)
+                if dataset_id:
+                    st.caption(f"Dataset ID `{dataset_id}` · ask the agent to analyze or query `{file_name}`")
+                else:
+                    st.caption(f"Ask the agent to analyze `{file_name}` (too large to load as a dataset)")
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+        
         # Advanced Settings
         with st.container():
             st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
@@ -836,12 +966,119 @@ def render_enhanced_sidebar():
             st.markdown("**📊 SESSION ANALYTICS**")
             
             st.markdown(f"""
-            - **Session ID:** `{st.session_state.session_id}`
+            - **Session ID:** `{st.session_state.session_id[:8]}…`
             - **Memory Type:** {st.session_state.memory_type.upper()}
+            - **History Store:** {PERSISTENT_BACKEND.upper()}
             - **Status:** {'🟢 ACTIVE' if st.session_state.agent_initialized else '🔴 STANDBY'}
             - **Uptime:** {int(time.time() - st.session_state.session_start_time)//60}m {int(time.time() - st.session_state.session_start_time)%60}s
             """)
             
+            session_stats = get_session_manager().stats()
+            own_bytes = session_stats["per_session"].get(st.session_state.session_id, {}).get("bytes", 0)
+            st.markdown(f"""
+            - **Live Sessions:** {session_stats['sessions']} (~{session_stats['total_bytes'] / 2**20:.1f} of {session_stats['ceiling_bytes'] / 2**20:.0f} MB)
+            - **This Session:** ~{own_bytes / 1024:.0f} KB · Evicted: {session_stats['evictions']['idle']} idle / {session_stats['evictions']['memory']} memory
+            """)
+            
+            pool_stats = get_client_pool().stats()
+            st.markdown(f"""
+            - **LLM Pool:** {pool_stats['open_clients']}/{pool_stats['max_clients']} clients
+            - **Pool Hits/Misses:** {pool_stats['hits']}/{pool_stats['misses']} ({pool_stats['hit_rate']:.0%})
+            """)
+            
+            cache_stats = get_llm_cache().stats()
+            st.markdown(f"""
+            - **LLM Cache Hits:** {cache_stats['memory_hits']} mem / {cache_stats['disk_hits']} disk ({cache_stats['hit_rate']:.0%})
+            """)
+            
+            semantic_cache = get_semantic_cache()
+            if semantic_cache:
+                semantic_stats = semantic_cache.stats()
+                st.markdown(f"""
+            - **Semantic Cache:** {semantic_stats['entries']} answers, {semantic_stats['hit_rate']:.0%} hit rate
+            - **False Hits:** {semantic_stats['false_hits']} reported, {semantic_stats['rejected_near_hits']} near-hits rejected
+            """)
+                if st.session_state.get("last_semantic_hit") is not None:
+                    if st.button("🚫 Flag Cached Answer", help="The last recalled answer did not fit the question"):
+                        semantic_cache.report_false_hit(st.session_state.last_semantic_hit)
+                        st.session_state.last_semantic_hit = None
+                        st.rerun()
+            
+            router = get_fast_path_router()
+            if router:
+                router_stats = router.stats()
+                st.markdown(f"""
+            - **Fast Path:** {router_stats['answered']}/{router_stats['queries']} answered ({router_stats['hit_rate']:.0%}), ~{router_stats['saved_seconds']:.0f}s saved
+            """)
+                with st.expander("⚡ Fast Path Intents"):
+                    for intent, intent_stats in router_stats["intents"].items():
+                        st.markdown(
+                            f"- `{intent}`: {intent_stats['answered']}/{intent_stats['matched']} answered, "
+                            f"{intent_stats['mean_ms']:.0f} ms mean, ~{intent_stats['saved_seconds']:.0f}s saved"
+                        )
+            
+            runtime_stats = get_tool_runtime().stats()
+            with st.expander("⏱️ Tool Runtime"):
+                workers = runtime_stats["workers"]
+                st.markdown(f"**Workers:** {workers['live']} live · {workers['idle']} idle · {workers['abandoned']} stuck")
+                for tool_name, tool_stats in sorted(runtime_stats["tools"].items()):
+                    st.markdown(
+                        f"- `{tool_name}`: {tool_stats['calls']:.0f} calls, {tool_stats['in_flight']:.0f} in flight, "
+                        f"{tool_stats['timeout_rate']:.0%} timeouts (limit {tool_stats['timeout_seconds']:.0f}s)"
+                    )
+                for tool_name, cache_stats in sorted(get_tool_cache().stats()["tools"].items()):
+                    st.markdown(
+                        f"- 💾 `{tool_name}` cache: {cache_stats['hit_rate']:.0%} hits "
+                        f"({cache_stats['coalesced']} coalesced), {cache_stats['bytes_saved'] / 1024:.0f} KB saved"
+                    )
+                dataset_stats = get_dataset_registry().stats()
+                st.markdown(
+                    f"- 📊 Datasets: {dataset_stats['loaded']} loaded, "
+                    f"{dataset_stats['bytes'] / 1024 ** 2:.0f}/{dataset_stats['max_bytes'] / 1024 ** 2:.0f} MB, "
+                    f"{dataset_stats['hits']} reuses, {dataset_stats['evictions']} evictions"
+                )
+                sandbox_stats = get_sandbox_pool().stats()
+                st.markdown(
+                    f"- 🧪 Sandbox: {sandbox_stats['runs']} runs, {sandbox_stats['idle_workers']} warm workers, "
+                    f"{sandbox_stats['timeouts']} killed, {sandbox_stats['crashes']} over limits"
+                )
+                for host, host_stats in sorted(get_http_client().stats().items()):
+                    st.markdown(
+                        f"- 🌐 `{host}`: {host_stats['requests']:.0f} requests, {host_stats['retries']:.0f} retries, "
+                        f"{host_stats['mean_seconds'] * 1000:.0f} ms mean"
+                    )
+            
+            with st.expander("🔌 Service Health"):
+                state_icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+                for tool_name, breaker_stats in get_breaker_registry().stats().items():
+                    retry = f", probe in {breaker_stats['retry_in']:.0f}s" if breaker_stats["state"] == "open" else ""
+                    st.markdown(
+                        f"- {state_icons[breaker_stats['state']]} `{tool_name}`: {breaker_stats['state'].replace('_', '-')}, "
+                        f"{breaker_stats['failures']}/{breaker_stats['calls']} failed in window, "
+                        f"{breaker_stats['rejected']} fast-failed{retry}"
+                    )
+            
+            tool_metrics = get_tool_metrics().snapshot()
+            if tool_metrics:
+                with st.expander("📈 Tool Metrics"):
+                    st.dataframe(
+                        [
+                            {
+                                "tool": tool_name,
+                                "calls": m["calls"],
+                                "errors": m["errors"],
+                                "timeouts": m["timeouts"],
+                                "p50 ms": round(m["p50_ms"], 1),
+                                "p95 ms": round(m["p95_ms"], 1),
+                                "p99 ms": round(m["p99_ms"], 1),
+                                "avg KB": round(m["mean_output_bytes"] / 1024, 1),
+                            }
+                            for tool_name, m in tool_metrics.items()
+                        ],
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+            
             st.markdown('</div>', unsafe_allow_html=True)
 
 def render_chat_history():
@@ -884,36 +1121,36 @@ def initialize_agent() -> bool:
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            # Initialize memory
-            status_text.text("🧠 Configuring Memory Matrix...")
-            progress_bar.progress(25)
-            memory = get_conversation_memory(
-                memory_type=st.session_state.memory_type,
-                session_id=st.session_state.session_id
-            )
-            
             # Initialize LLM
             status_text.text("🤖 Establishing Neural Network Connection...")
-            progress_bar.progress(50)
+            progress_bar.progress(25)
             llm = GeminiLLM(api_key=st.session_state.api_key).get_llm()
             
+            # Initialize memory; summary memory folds old turns with the LLM in the background
+            status_text.text("🧠 Configuring Memory Matrix...")
+            progress_bar.progress(50)
+            memory = get_persistent_memory(
+                session_id=st.session_state.session_id,
+                memory_type=st.session_state.memory_type,
+                llm=llm
+            )
+            
             # Initialize tools
             status_text.text("🛠️ Loading Galactic Tools...")
             progress_bar.progress(75)
-            tools = get_agent_tools()
-            
-            # For summary memory, set the LLM
-            if st.session_state.memory_type == "summary" and hasattr(memory, "llm"):
-                memory.llm = llm
+            tools = get_agent_tools(structured=AGENT_ENGINE == "tool_calling")
             
             # Create agent
             status_text.text("⚡ Finalizing Agent Initialization...")
             progress_bar.progress(90)
-            st.session_state.agent_instance = AIAgent(
+            get_session_manager().register(st.session_state.session_id, SessionAgent(
+                executor=AIAgent(llm=llm, tools=tools, memory=memory).get_runnable_agent(),
                 llm=llm,
-                tools=tools,
-                memory=memory
-            ).get_runnable_agent()
+                memory=memory,
+                memory_type=st.session_state.memory_type,
+                tool_names=tuple(tool.name for tool in tools),
+                extra_bytes=session_extra_bytes()
+            ))
             
             progress_bar.progress(100)
             status_text.text("✅ Agent Successfully Initialized!")
@@ -934,12 +1171,86 @@ def initialize_agent() -> bool:
         logger.error(f"Agent initialization error: {str(e)}")
         return False
 
+def transcript_bytes() -> int:
+    """Approximate size of the displayed chat history held in this session"""
+    return sum(len(message["content"]) for message in st.session_state.chat_history)
+
+def session_extra_bytes() -> int:
+    """Approximate size of what this session holds besides its agent: the displayed chat history and its datasets"""
+    return transcript_bytes() + get_dataset_registry().session_bytes(st.session_state.session_id)
+
+def transcript_messages() -> list:
+    """Convert the displayed chat history back to messages, leaving out a question still being answered"""
+    messages = [HumanMessage(content=message["content"]) if message["type"] == "human"
+                else AIMessage(content=message["content"])
+                for message in st.session_state.chat_history if message["type"] in ("human", "ai")]
+    if messages and isinstance(messages[-1], HumanMessage):
+        messages.pop()
+    return messages
+
+def session_agent() -> SessionAgent:
+    """Return this session's agent, rebuilding it from the persisted history if it was evicted"""
+    agent = get_session_manager().get(st.session_state.session_id)
+    if agent is not None:
+        return agent
+    llm = GeminiLLM(api_key=st.session_state.api_key).get_llm()
+    history = get_chat_history(st.session_state.session_id)
+    if history is None:
+        # Nothing is persisted, so the displayed transcript is the only remaining copy of the conversation.
+        history = InMemoryChatMessageHistory(messages=transcript_messages())
+    memory = get_conversation_memory(
+        memory_type=st.session_state.memory_type,
+        session_id=st.session_state.session_id,
+        llm=llm,
+        chat_memory=history
+    )
+    tools = get_agent_tools(structured=AGENT_ENGINE == "tool_calling")
+    agent = SessionAgent(
+        executor=AIAgent(llm=llm, tools=tools, memory=memory).get_runnable_agent(),
+        llm=llm,
+        memory=memory,
+        memory_type=st.session_state.memory_type,
+        tool_names=tuple(tool.name for tool in tools),
+        extra_bytes=session_extra_bytes()
+    )
+    get_session_manager().register(st.session_state.session_id, agent)
+    logger.info(f"Agent rebuilt for evicted session {st.session_state.session_id}")
+    return agent
+
+def refresh_agent_tools():
+    """Rebuild the agent when a circuit breaker hides or restores a tool, keeping its LLM and memory"""
+    tools = get_agent_tools(structured=AGENT_ENGINE == "tool_calling")
+    tool_names = tuple(tool.name for tool in tools)
+    agent = session_agent()
+    if tool_names == agent.tool_names:
+        return
+    agent.executor = AIAgent(
+        llm=agent.llm,
+        tools=tools,
+        memory=agent.memory
+    ).get_runnable_agent()
+    agent.tool_names = tool_names
+    logger.info(f"Agent rebuilt for session {st.session_state.session_id} with tools: {', '.join(tool_names)}")
+
 def handle_user_input(prompt: str):
+    """Answer one prompt, unless another tab of this browser is already running a turn of the session"""
+    lock = get_session_manager().turn_lock(st.session_state.session_id)
+    if not lock.acquire(blocking=False):
+        st.warning("⏳ This conversation is answering in another tab. Please wait for it to finish.")
+        return
+    try:
+        # Tools see which session they run for, e.g. to serve only its own datasets.
+        with session_scope(st.session_state.session_id):
+            answer_user_input(prompt)
+    finally:
+        lock.release()
+
+def answer_user_input(prompt: str):
     """Handle user input with enhanced processing and feedback"""
     start_time = time.time()
     
     # Add user message to history
-    st.session_state.chat_history.append({
+    append_transcript({
         "type": "human",
         "content": prompt,
         "timestamp": time.time()
@@ -952,72 +1263,139 @@ def handle_user_input(prompt: str):
     
     # Get and display AI response
     with st.chat_message("assistant", avatar="🤖"):
-        with st.spinner("🤖 Processing through neural networks..."):
-            try:
-                # Show enhanced typing indicator
-                typing_placeholder = st.empty()
-                typing_placeholder.markdown("🔄 *Connecting to galactic database...*")
-                
-                response = st.session_state.agent_instance.invoke({
-                    "input": prompt,
-                    "chat_history": st.session_state.chat_history
-                })
-                
-                typing_placeholder.empty()
-                
-                ai_response = response.get("output", "❌ Neural networks encountered an anomaly.")
-                
-                # Apply personality modifications
-                ai_response = apply_personality_filter(ai_response, st.session_state.agent_personality)
-                
-                st.markdown(ai_response)
-                
-                # Calculate response time
-                response_time = time.time() - start_time
-                st.session_state.performance_metrics["response_times"].append(response_time)
-                st.session_state.performance_metrics["successful_responses"] += 1
-                
-                # Track tool usage (simplified)
-                if "search" in prompt.lower():
-                    st.session_state.performance_metrics["tool_usage"]["WebSearch"] = st.session_state.performance_metrics["tool_usage"].get("WebSearch", 0) + 1
-                elif "time" in prompt.lower():
-                    st.session_state.performance_metrics["tool_usage"]["TimeQuery"] = st.session_state.performance_metrics["tool_usage"].get("TimeQuery", 0) + 1
-                elif "calculate" in prompt.lower():
-                    st.session_state.performance_metrics["tool_usage"]["Calculator"] = st.session_state.performance_metrics["tool_usage"].get("Calculator", 0) + 1
-                
-                # Add AI response to history
-                st.session_state.chat_history.append({
-                    "type": "ai",
-                    "content": ai_response,
-                    "timestamp": time.time(),
-                    "response_time": response_time
-                })
-                
-                # Play notification sound if enabled
-                if st.session_state.notification_sound:
-                    st.markdown('''
-                    <script>
-                    const audio = new Audio('data:audio/wav;base64,UklGRnoGAABXQVZFZm10IBAAAAABAAEAQB8AAEAfAAABAAgAZGF0YQoGAACBhYqFbF1fdJivrJBhNjVgodDbq2EcBj+a2/LDciUFLIHO8tiJNwgZaLvt559NEAxQp+PwtmMcBjiR1/LMeSwFJHfH8N2QQAoUXrTp66hVFApGn+DyvmEfhfr...');
-                    audio.play().catch(e => console.log('Audio play failed:', e));
-                    </script>
-                    ''', unsafe_allow_html=True)
-                
-                logger.info(f"Response generated for: {prompt[:50]}...")
+        try:
+            refresh_agent_tools()
+            router = get_fast_path_router()
+            fast_answer = router.route(prompt) if router else None
+            # Cached answers match on the prompt alone, so only the first turn of a conversation uses them.
+            semantic_cache = get_semantic_cache() if len(st.session_state.chat_history) == 1 else None
+            cache_hit = semantic_cache.lookup(prompt) if semantic_cache and not fast_answer else None
+            st.session_state.last_semantic_hit = cache_hit.entry_id if cache_hit else None
             
-            except Exception as e:
-                error_msg = f"🚨 **System Alert**: Neural network disruption detected.\n\n*Error Details*: {str(e)}"
-                st.error("❌ Communication Error")
-                st.markdown(error_msg)
-                
-                # Track error
-                st.session_state.performance_metrics["error_count"] += 1
-                
-                st.session_state.chat_history.append({
-                    "type": "ai",
-                    "content": error_msg,
-                    "timestamp": time.time()
-                })
-                logger.error(f"Agent error: {str(e)}")
+            if fast_answer:
+                st.caption(f"⚡ Answered directly by {fast_answer.tool} ({fast_answer.seconds * 1000:.0f} ms)")
+                # The agent did not run, so record the turn in its memory for follow-up questions.
+                session_agent().memory.save_context({"input": prompt}, {"output": fast_answer.answer})
+                response = {
+                    "output": fast_answer.answer,
+                    "time_to_first_token": time.time() - start_time,
+                    "tools_used": [fast_answer.tool]
+                }
+                answer_placeholder = st.empty()
+            elif cache_hit:
+                st.caption(f"♻️ Recalled from semantic cache (similarity {cache_hit.similarity:.2f})")
+                # The agent did not run, so record the turn in its memory for follow-up questions.
+                session_agent().memory.save_context({"input": prompt}, {"output": cache_hit.answer})
+                response = {
+                    "output": cache_hit.answer,
+                    "time_to_first_token": time.time() - start_time,
+                    "tools_used": []
+                }
+                answer_placeholder = st.empty()
+            elif ENABLE_STREAMING:
+                response = stream_user_response(prompt)
+                answer_placeholder = response["answer_placeholder"]
+            else:
+                with st.spinner("🤖 Processing through neural networks..."):
+                    # Show enhanced typing indicator
+                    typing_placeholder = st.empty()
+                    typing_placeholder.markdown("🔄 *Connecting to galactic database...*")
+                    
+                    tool_usage = ToolUsageCallbackHandler()
+                    # History comes from the agent's memory and is packed to the token budget there.
+                    response = session_agent().executor.invoke(
+                        {"input": prompt}, config={"callbacks": [tool_usage]}
+                    )
+                    response["tools_used"] = tool_usage.tools_used
+                    
+                    typing_placeholder.empty()
+                    answer_placeholder = st.empty()
+            
+            ai_response = response.get("output", "❌ Neural networks encountered an anomaly.")
+            if semantic_cache and not cache_hit and not fast_answer and "output" in response:
+                semantic_cache.store(prompt, ai_response, response["tools_used"])
+            
+            # Apply personality modifications
+            ai_response = apply_personality_filter(ai_response, st.session_state.agent_personality)
+            
+            answer_placeholder.markdown(ai_response)
+            
+            # Calculate response time
+            response_time = time.time() - start_time
+            if router and not fast_answer and not cache_hit:
+                router.record_agent_latency(response_time)
+            st.session_state.performance_metrics["response_times"].append(response_time)
+            st.session_state.performance_metrics["first_token_times"].append(
+                response.get("time_to_first_token", response_time)
+            )
+            st.session_state.performance_metrics["successful_responses"] += 1
+            
+            # Track tool usage
+            tool_usage_counts = st.session_state.performance_metrics["tool_usage"]
+            for tool_name in response["tools_used"]:
+                tool_usage_counts[tool_name] = tool_usage_counts.get(tool_name, 0) + 1
+            
+            # Add AI response to history
+            append_transcript({
+                "type": "ai",
+                "content": ai_response,
+                "timestamp": time.time(),
+                "response_time": response_time
+            })
+            
+            # Play notification sound if enabled
+            if st.session_state.notification_sound:
+                st.markdown('''
+                <script>
+                const audio = new Audio('data:audio/wav;base64,UklGRnoGAABXQVZFZm10IBAAAAABAAEAQB8AAEAfAAABAAgAZGF0YQoGAACBhYqFbF1fdJivrJBhNjVgodDbq2EcBj+a2/LDciUFLIHO8tiJNwgZaLvt559NEAxQp+PwtmMcBjiR1/LMeSwFJHfH8N2QQAoUXrTp66hVFApGn+DyvmEfhfr...');
+                audio.play().catch(e => console.log('Audio play failed:', e));
+                </script>
+                ''', unsafe_allow_html=True)
+            
+            get_session_manager().update(st.session_state.session_id, extra_bytes=session_extra_bytes())
+            logger.info(f"Response generated for: {prompt[:50]}...")
+        
+        except Exception as e:
+            error_msg = f"🚨 **System Alert**: Neural network disruption detected.\n\n*Error Details*: {str(e)}"
+            st.error("❌ Communication Error")
+            st.markdown(error_msg)
+            
+            # Track error
+            st.session_state.performance_metrics["error_count"] += 1
+            
+            append_transcript({
+                "type": "ai",
+                "content": error_msg,
+                "timestamp": time.time()
+            })
+            logger.error(f"Agent error: {str(e)}")
+
+def stream_user_response(prompt: str) -> Dict[str, Any]:
+    """Stream agent reasoning and answer tokens into the current chat message"""
+    with st.status("🧠 Neural pathways engaged...", expanded=False) as status:
+        thought_placeholder = st.empty()
+        steps_container = st.container()
+    answer_placeholder = st.empty()
+    
+    def on_thought(text: str):
+        thought_placeholder.markdown(f"💭 *{text}*")
+    
+    def on_answer(text: str):
+        answer_placeholder.markdown(text + "▌")
+    
+    def on_step(tool: str, tool_input: Any, observation: str):
+        steps_container.markdown(f"🛠️ **{tool}** ← `{tool_input}`")
+    
+    response = stream_agent_response(
+        session_agent().executor,
+        {"input": prompt},
+        on_thought=on_thought,
+        on_answer=on_answer,
+        on_step=on_step
+    )
+    status.update(label="✅ Reasoning complete", state="complete")
+    response["answer_placeholder"] = answer_placeholder
+    return response
 
 def apply_personality_filter(response: str, personality: str) -> str:
     """Apply personality modifications to AI responses"""
@@ -1062,7 +1440,7 @@ def render_quick_actions():
     if hasattr(st.session_state, 'quick_prompt') and st.session_state.quick_prompt:
         handle_user_input(st.session_state.quick_prompt)
         del st.session_state.quick_prompt
-    st.session_state.chat_history.append({
+    append_transcript({
         "type": "human",
         "content": prompt,
         "timestamp": time.time()
@@ -1081,10 +1459,7 @@ def render_quick_actions():
                 typing_placeholder = st.empty()
                 typing_placeholder.markdown("🔄 *Agent is thinking...*")
                 
-                response = st.session_state.agent_instance.invoke({
-                    "input": prompt,
-                    "chat_history": st.session_state.chat_history
-                })
+                response = session_agent().executor.invoke({"input": prompt})
                 
                 typing_placeholder.empty()
                 
@@ -1092,12 +1467,13 @@ def render_quick_actions():
                 st.markdown(ai_response)
                 
                 # Add AI response to history
-                st.session_state.chat_history.append({
+                append_transcript({
                     "type": "ai",
                     "content": ai_response,
                     "timestamp": time.time()
                 })
                 
+                get_session_manager().update(st.session_state.session_id, extra_bytes=session_extra_bytes())
                 logger.info(f"Response generated for: {prompt[:50]}...")
             
             except Exception as e:
@@ -1105,7 +1481,7 @@ def render_quick_actions():
                 st.error("❌ Communication Error")
                 st.markdown(error_msg)
                 
-                st.session_state.chat_history.append({
+                append_transcript({
                     "type": "ai",
                     "content": error_msg,
                     "timestamp": time.time()
@@ -1116,6 +1492,7 @@ def render_quick_actions():
 def main():
     # Inject custom CSS
     inject_custom_css()
+    write_session_cookie()
     
     # Render header
     render_header()
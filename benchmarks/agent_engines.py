@@ -0,0 +1,81 @@
+# benchmarks/agent_engines.py
+"""
+Side-by-side comparison of the ReAct and native function-calling agent engines.
+
+For each query, reports LLM iterations, prompt/completion tokens and wall-clock time.
+Requires GOOGLE_API_KEY (read from .env). Run from the repository root:
+
+    python benchmarks/agent_engines.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from src.agent import AIAgent, TokenUsageCallbackHandler
+from src.cache import LLMCompletionCache, LRUCache, TieredCache
+from src.config import LLM_CACHE_MAX_ENTRIES
+from src.llm_model import GeminiLLM
+from src.memory import get_conversation_memory
+from src.tools import get_agent_tools
+
+QUERIES = [
+    "What is (17 * 23) + 4?",
+    "What's the current time in Asia/Tokyo?",
+    "Convert 250 USD to EUR.",
+    "Find all numbers in 'order 66 shipped in 3 boxes' using a regex.",
+    "Who was the first person to walk on the Moon?",
+]
+
+
+def run_engine(engine: str, llm) -> list:
+    results = []
+    tools = get_agent_tools(structured=engine == "tool_calling")
+    for query in QUERIES:
+        executor = AIAgent(llm, tools, get_conversation_memory(), engine=engine).get_runnable_agent()
+        executor.verbose = False
+        usage = TokenUsageCallbackHandler()
+        start = time.perf_counter()
+        try:
+            executor.invoke({"input": query}, config={"callbacks": [usage]})
+            status = "ok"
+        except Exception as e:
+            status = f"error: {e}"
+        results.append({
+            "query": query,
+            "iterations": usage.llm_calls,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "seconds": time.perf_counter() - start,
+            "status": status,
+        })
+    return results
+
+
+def main() -> None:
+    load_dotenv()
+    # Temperature 0 keeps both engines deterministic. A fresh in-memory completion cache
+    # replaces the shared one, so no engine is served results from an earlier run and
+    # the app's cache on disk is left alone.
+    llm = GeminiLLM(temperature=0.0).get_llm()
+    llm.cache = LLMCompletionCache(TieredCache(LRUCache(max_entries=LLM_CACHE_MAX_ENTRIES)))
+
+    header = f"{'engine':<13} {'iters':>5} {'prompt':>7} {'compl':>6} {'secs':>6}  query"
+    for engine in ("react", "tool_calling"):
+        results = run_engine(engine, llm)
+        print(header)
+        for r in results:
+            print(f"{engine:<13} {r['iterations']:>5} {r['prompt_tokens']:>7} {r['completion_tokens']:>6} "
+                  f"{r['seconds']:>6.2f}  {r['query'][:50]} [{r['status']}]")
+        n = len(results)
+        print(f"{engine:<13} {sum(r['iterations'] for r in results) / n:>5.1f} "
+              f"{sum(r['prompt_tokens'] for r in results) / n:>7.0f} "
+              f"{sum(r['completion_tokens'] for r in results) / n:>6.0f} "
+              f"{sum(r['seconds'] for r in results) / n:>6.2f}  (mean)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/calculator.py
+"""
+Per-call latency of the calculator: the previous character check + eval vs. the compiled AST engine.
+
+The workload repeats a small set of expressions, as agents tend to re-issue the same
+calculations; the cold column compiles every expression from scratch. No API keys
+needed. Run from the repository root:
+
+    python benchmarks/calculator.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.calculator import compile_expression, evaluate, format_result
+
+EXPRESSIONS = [
+    "2 + 2",
+    "(5 * 3) / 2",
+    "(17 * 23) + 4",
+    "((1250 - 300) * 1.08) / 12",
+    "3.5 * (2 + 7) - 4 / 8",
+]
+NUMBER = 20000
+
+
+def eval_calculate(expression: str) -> str:
+    """The previous implementation: character whitelist, then eval."""
+    allowed_chars = set("0123456789+-*/(). ")
+    if not expression or not all(c in allowed_chars for c in expression):
+        return "Error: Invalid expression."
+    return str(eval(expression, {"__builtins__": {}}, {}))
+
+
+def ast_calculate(expression: str) -> str:
+    return format_result(evaluate(expression))
+
+
+def ast_calculate_cold(expression: str) -> str:
+    compile_expression.cache_clear()
+    return format_result(evaluate(expression))
+
+
+def main() -> None:
+    print(f"{'expression':<30} {'eval us':>8} {'ast us':>8} {'ast cold us':>12}")
+    for expression in EXPRESSIONS:
+        assert float(eval_calculate(expression)) == float(ast_calculate(expression))
+        timings = [
+            timeit.timeit(lambda: func(expression), number=NUMBER) / NUMBER * 1e6
+            for func in (eval_calculate, ast_calculate, ast_calculate_cold)
+        ]
+        print(f"{expression:<30} {timings[0]:>8.2f} {timings[1]:>8.2f} {timings[2]:>12.2f}")
+    print(f"\ncompile cache: {compile_expression.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
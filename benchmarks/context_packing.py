@@ -0,0 +1,90 @@
+# benchmarks/context_packing.py
+"""
+Prompt tokens per turn over a 100-turn session, with and without context packing.
+
+Drives the real ReAct agent stack (buffer memory, prompt, executor) with a scripted
+chat model that records every prompt it receives; every fifth turn makes a tool
+call first. Token counts use the character estimate, so no API key is needed.
+Run from the repository root:
+
+    python benchmarks/context_packing.py [--turns N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import get_buffer_string
+from src.agent import AIAgent
+from src.compaction import estimate_tokens, split_sentences
+from src.config import CONTEXT_MAX_TOKENS
+from src.memory import get_conversation_memory
+from src.tools import get_agent_tools
+from benchmarks.observation_compaction import ARTICLES, QUESTIONS
+
+REPORT_TURNS = (1, 10, 25, 50, 75, 100)
+
+
+class PromptRecorder(BaseCallbackHandler):
+    def __init__(self):
+        self.prompts = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.prompts.append(sum(estimate_tokens(get_buffer_string(batch)) for batch in messages))
+
+
+def script(turns: int) -> list:
+    rng = random.Random(0)
+    sentences = [s for text in ARTICLES.values() for s in split_sentences(text)]
+    session = []
+    for turn in range(1, turns + 1):
+        question = QUESTIONS[turn % len(QUESTIONS)][0]
+        answer = " ".join(rng.sample(sentences, rng.randint(3, 8)))
+        responses = [f"Thought: Do I need to use a tool? No\nFinal Answer: {answer}"]
+        if turn % 5 == 0:
+            responses.insert(0, "Thought: Do I need to use a tool? Yes\nAction: current_time\nAction Input: UTC")
+        session.append((question, responses))
+    return session
+
+
+def run(pack_context: bool, turns: int) -> tuple:
+    llm = FakeListChatModel(responses=["unused"])
+    executor = AIAgent(llm, get_agent_tools(), get_conversation_memory("buffer"),
+                       pack_context=pack_context).get_runnable_agent()
+    executor.verbose = False
+    per_turn, seconds = [], 0.0
+    for question, responses in script(turns):
+        llm.responses, llm.i = responses, 0
+        recorder = PromptRecorder()
+        start = time.perf_counter()
+        executor.invoke({"input": question}, config={"callbacks": [recorder]})
+        seconds += time.perf_counter() - start
+        per_turn.append(sum(recorder.prompts))
+    return per_turn, seconds / turns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+
+    before, before_s = run(False, args.turns)
+    after, after_s = run(True, args.turns)
+    print(f"prompt tokens per turn (all LLM calls of the turn), budget {CONTEXT_MAX_TOKENS} per call\n")
+    print(f"{'turn':>5} {'before':>8} {'after':>8}")
+    for turn in REPORT_TURNS:
+        if turn <= args.turns:
+            print(f"{turn:>5} {before[turn - 1]:>8} {after[turn - 1]:>8}")
+    print(f"{'mean':>5} {sum(before) / len(before):>8.0f} {sum(after) / len(after):>8.0f}")
+    print(f"{'total':>5} {sum(before):>8} {sum(after):>8}")
+    print(f"\nagent overhead per turn (scripted model): {before_s * 1000:.1f} ms before, {after_s * 1000:.1f} ms after")
+
+
+if __name__ == "__main__":
+    main()
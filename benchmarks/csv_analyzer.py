@@ -0,0 +1,91 @@
+# benchmarks/csv_analyzer.py
+"""
+Peak RSS and wall time of CSV analysis: the previous in-memory path vs. the streaming analyzer.
+
+Generates a synthetic CSV (default ~300 MB) and analyzes it in fresh subprocesses so
+each approach's peak RSS is measured in isolation. The in-memory path reads the file
+into a string and calls pd.read_csv(io.StringIO(...)).describe(), as the tool did when
+the CSV arrived through the prompt. No API keys needed. Run from the repository root:
+
+    python benchmarks/csv_analyzer.py [size_mb]
+"""
+
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def generate_csv(path: str, size_mb: int) -> None:
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    rows = 500_000
+    with open(path, "w", encoding="utf-8") as f:
+        header = True
+        while f.tell() < size_mb * 1024 * 1024:
+            pd.DataFrame({
+                "order_id": rng.integers(0, 2**31, rows),
+                "quantity": rng.integers(1, 100, rows),
+                "price": rng.gamma(2.0, 30.0, rows).round(2),
+                "discount": rng.random(rows).round(3),
+                "region": rng.choice(["north", "south", "east", "west"], rows),
+                "channel": rng.choice(["web", "store", "partner"], rows),
+            }).to_csv(f, index=False, header=header)
+            header = False
+
+
+def run_in_memory(path: str) -> None:
+    import pandas as pd
+
+    with open(path, encoding="utf-8") as f:
+        file_content = f.read()
+    df = pd.read_csv(io.StringIO(file_content))
+    numeric_cols = df.select_dtypes(include=["float64", "int64"]).columns
+    df[numeric_cols].describe().to_string()
+
+
+def run_streaming(path: str, memory_map: bool = False) -> None:
+    from src.csv_stream import format_profile, profile_csv
+
+    format_profile(profile_csv(path, memory_map=memory_map))
+
+
+def child(mode: str, path: str) -> None:
+    start = time.perf_counter()
+    runners = {
+        "in-memory": run_in_memory,
+        "streaming": run_streaming,
+        "mmap": lambda p: run_streaming(p, memory_map=True),
+    }
+    runners[mode](path)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(f"{elapsed:.2f} {peak_mb:.0f}")
+
+
+def main() -> None:
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orders.csv")
+        generate_csv(path, size_mb)
+        print(f"file: {os.path.getsize(path) / 1024 / 1024:.0f} MB")
+        print(f"{'analyzer':<10} {'seconds':>8} {'peak RSS MB':>12}")
+        # Mapped file pages are counted in RSS although the kernel can reclaim them.
+        for mode in ("in-memory", "streaming", "mmap"):
+            out = subprocess.run([sys.executable, __file__, "--child", mode, path],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            print(f"{mode:<10} {float(out[-2]):>8.2f} {float(out[-1]):>12.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
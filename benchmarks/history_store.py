@@ -0,0 +1,88 @@
+# benchmarks/history_store.py
+"""
+Append and load latency of the persistent chat history backends.
+
+For sessions of 10, 1k and 10k messages, reports the mean latency of appending one
+turn (a human and an AI message, as memory.save_context does) and of loading the
+whole session. SQLite runs against a temporary file. Redis runs against --redis-url
+(e.g. a local `redis-server`), or against the in-process fakeredis stand-in when it
+is installed and no URL is given. Run from the repository root:
+
+    python benchmarks/history_store.py [--redis-url redis://localhost:6379/15]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from src.history_store import PooledRedisChatMessageHistory, SQLiteChatMessageHistory, SQLiteHistoryStore
+
+SIZES = (10, 1000, 10000)
+LOADS = 5  # Timed full loads per session size
+
+
+def redis_client(url: str):
+    if url:
+        import redis
+        return redis.Redis(connection_pool=redis.ConnectionPool.from_url(url, decode_responses=True)), url
+    try:
+        import fakeredis
+    except ImportError:
+        return None, None
+    return fakeredis.FakeRedis(decode_responses=True), "fakeredis"
+
+
+def turn(i: int) -> list:
+    return [HumanMessage(content=f"Question {i}: what is the weather like in city number {i}?"),
+            AIMessage(content=f"Answer {i}: it is sunny with a light breeze and {i % 35} degrees. " * 3)]
+
+
+def measure(make_history) -> list:
+    rows = []
+    for size in SIZES:
+        history = make_history(f"bench-{size}")
+        history.clear()
+        appends = []
+        for i in range(size // 2):
+            start = time.perf_counter()
+            history.add_messages(turn(i))
+            appends.append(time.perf_counter() - start)
+        loads = []
+        for _ in range(LOADS):
+            start = time.perf_counter()
+            count = len(history.messages)
+            loads.append(time.perf_counter() - start)
+        assert count == size, (count, size)
+        rows.append((size, statistics.mean(appends) * 1e6, statistics.median(loads) * 1000))
+        history.clear()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--redis-url", default="", help="Redis to benchmark; its keys bench-* are overwritten")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteHistoryStore(os.path.join(directory, "history.sqlite3"))
+        results = {"sqlite (WAL)": measure(lambda session: SQLiteChatMessageHistory(session, store))}
+    client, label = redis_client(args.redis_url)
+    if client is not None:
+        results[f"redis ({label})"] = measure(lambda session: PooledRedisChatMessageHistory(session, client))
+    else:
+        print("redis skipped: pass --redis-url or install fakeredis\n")
+
+    print(f"{'backend':<20} {'messages':>8} {'append us':>10} {'load ms':>8}")
+    for backend, rows in results.items():
+        for size, append_us, load_ms in rows:
+            print(f"{backend:<20} {size:>8} {append_us:>10.1f} {load_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/memory_latency.py
+"""
+User-facing turn latency per memory type over a long scripted conversation.
+
+Drives the ReAct agent with a scripted chat model for every memory type. The
+summarizing model sleeps to stand in for a real summarization call. "summary
+(blocking)" is the previous ConversationSummaryBufferMemory, which summarizes
+inside the turn once history passes its token limit; "summary" is the background
+memory now used. Reports p50/p95/max turn latency and the history size sent on the
+last turn. Run from the repository root:
+
+    python benchmarks/memory_latency.py [--turns N] [--summary-seconds S]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import get_buffer_string
+from src.agent import AIAgent
+from src.compaction import estimate_tokens
+from src.memory import SUMMARIZATION_PROMPT, BackgroundSummaryMemory, drop_memory_state, get_conversation_memory
+from src.tools import get_agent_tools
+from benchmarks.context_packing import script
+
+BLOCKING_TOKEN_LIMIT = 2000  # The limit the blocking summary memory used
+
+
+def summarizer(seconds: float) -> FakeListChatModel:
+    return FakeListChatModel(responses=["The user asked about spaceflight, mountains, chemistry and coral reefs."],
+                             sleep=seconds, custom_get_token_ids=lambda text: [0] * estimate_tokens(text))
+
+
+def memories(summary_seconds: float) -> dict:
+    return {
+        "buffer": lambda: get_conversation_memory("buffer"),
+        "window": lambda: get_conversation_memory("window"),
+        "summary (blocking)": lambda: ConversationSummaryBufferMemory(
+            llm=summarizer(summary_seconds), memory_key="chat_history", return_messages=True,
+            max_token_limit=BLOCKING_TOKEN_LIMIT, prompt=SUMMARIZATION_PROMPT),
+        "summary": lambda: get_conversation_memory("summary", session_id="benchmark",
+                                                   llm=summarizer(summary_seconds)),
+        "recall": lambda: get_conversation_memory("recall", session_id="benchmark"),
+    }
+
+
+def run(memory, turns: int) -> tuple:
+    llm = FakeListChatModel(responses=["unused"])
+    executor = AIAgent(llm, get_agent_tools(), memory, pack_context=False).get_runnable_agent()
+    executor.verbose = False
+    latencies = []
+    for question, responses in script(turns):
+        llm.responses, llm.i = responses, 0
+        start = time.perf_counter()
+        executor.invoke({"input": question})
+        latencies.append(time.perf_counter() - start)
+        # The user reads the answer before sending the next message.
+        time.sleep(0.05)
+    history = memory.load_memory_variables({})["chat_history"]
+    return np.array(latencies) * 1000, estimate_tokens(get_buffer_string(history))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--summary-seconds", type=float, default=0.5, help="Latency of one summarization call")
+    args = parser.parse_args()
+
+    print(f"{args.turns} turns, summarization call {args.summary_seconds * 1000:.0f} ms\n")
+    print(f"{'memory':<20} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'history tok':>12}")
+    for name, factory in memories(args.summary_seconds).items():
+        drop_memory_state("benchmark")
+        memory = factory()
+        latencies, history_tokens = run(memory, args.turns)
+        if isinstance(memory, BackgroundSummaryMemory):
+            memory.wait_for_summary()
+        print(f"{name:<20} {np.percentile(latencies, 50):>8.1f} {np.percentile(latencies, 95):>8.1f} "
+              f"{latencies.max():>8.1f} {history_tokens:>12}")
+
+
+if __name__ == "__main__":
+    main()
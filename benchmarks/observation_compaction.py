@@ -0,0 +1,190 @@
+# benchmarks/observation_compaction.py
+"""
+Prompt tokens and answer retention with and without observation compaction.
+
+Offline (default): each question gets a long search-style observation (the relevant
+article plus unrelated ones). Reports the observation size before and after
+compaction, the prompt tokens of a simulated ReAct run that resends the scratchpad
+on every iteration, and whether the sentence holding the reference answer survived.
+
+With --live, runs the ReAct agent on the fixed question set with compaction off and
+on and reports measured prompt tokens and whether the answer contains the reference.
+Requires GOOGLE_API_KEY (read from .env). Run from the repository root:
+
+    python benchmarks/observation_compaction.py [--live]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.compaction import estimate_tokens, get_observation_compactor
+
+ARTICLES = {
+    "apollo": (
+        "Apollo 11 was the American spaceflight that first landed humans on the Moon. "
+        "Commander Neil Armstrong and Lunar Module Pilot Buzz Aldrin landed the Apollo Lunar Module Eagle on July 20, 1969. "
+        "Armstrong became the first person to step onto the lunar surface six hours and 39 minutes later. "
+        "Aldrin joined him 19 minutes later, and they spent about two and a quarter hours together exploring the site. "
+        "Michael Collins flew the Command Module Columbia alone in lunar orbit while they were on the surface. "
+        "The crew collected 47.5 pounds of lunar material to bring back to Earth. "
+        "Apollo 11 was launched by a Saturn V rocket from Kennedy Space Center on Merritt Island, Florida, on July 16. "
+        "The mission fulfilled a national goal proposed in 1961 by President John F. Kennedy. "
+        "The astronauts returned to Earth and splashed down in the Pacific Ocean on July 24. "
+        "The landing was broadcast on live TV to a worldwide audience. "
+        "The mission is widely regarded as one of the greatest achievements in human history."
+    ),
+    "everest": (
+        "Mount Everest is Earth's highest mountain above sea level, located in the Mahalangur Himal sub-range of the Himalayas. "
+        "The China-Nepal border runs across its summit point. "
+        "Its elevation of 8,848.86 metres was most recently established in 2020 by the Chinese and Nepali authorities. "
+        "Mount Everest attracts many climbers, including highly experienced mountaineers. "
+        "There are two main climbing routes, one approaching the summit from the southeast in Nepal and the other from the north in Tibet. "
+        "The first recorded summit was made in 1953 by Tenzing Norgay and Edmund Hillary. "
+        "Climbers face dangers such as altitude sickness, weather, wind and avalanches. "
+        "As of 2019, over 300 people had died on Everest, many of whose bodies remain on the mountain. "
+        "The mountain was named after George Everest, a Surveyor General of India. "
+        "Its Tibetan name is Chomolungma and its Nepali name is Sagarmatha."
+    ),
+    "curie": (
+        "Marie Curie was a Polish and naturalised-French physicist and chemist who conducted pioneering research on radioactivity. "
+        "She was the first woman to win a Nobel Prize and the first person to win a Nobel Prize twice. "
+        "She won the 1903 Nobel Prize in Physics with Pierre Curie and Henri Becquerel. "
+        "Her second Nobel Prize, in Chemistry, came in 1911 for the discovery of polonium and radium. "
+        "She was born in Warsaw, in what was then the Kingdom of Poland, part of the Russian Empire. "
+        "She studied at Warsaw's clandestine Flying University and began her practical scientific training in Warsaw. "
+        "In 1891 she followed her elder sister Bronisława to study in Paris. "
+        "She named the first chemical element she discovered, polonium, after her native country. "
+        "Curie died in 1934, aged 66, at a sanatorium in Passy, France, of aplastic anaemia. "
+        "The anaemia likely came from exposure to radiation in the course of her scientific research."
+    ),
+    "python": (
+        "Python is a high-level, general-purpose programming language. "
+        "Its design philosophy emphasizes code readability with the use of significant indentation. "
+        "Python is dynamically typed and garbage-collected. "
+        "It supports multiple programming paradigms, including structured, object-oriented and functional programming. "
+        "Guido van Rossum began working on Python in the late 1980s as a successor to the ABC programming language. "
+        "Python was first released in 1991 as Python 0.9.0. "
+        "Python 2.0 was released in 2000 and Python 3.0, a major revision not completely backward-compatible, in 2008. "
+        "Python consistently ranks as one of the most popular programming languages. "
+        "The name comes from the British comedy group Monty Python rather than the snake. "
+        "The standard library is large and is often described as batteries included."
+    ),
+    "reef": (
+        "The Great Barrier Reef is the world's largest coral reef system, composed of over 2,900 individual reefs. "
+        "It stretches for over 2,300 kilometres over an area of approximately 344,400 square kilometres. "
+        "The reef is located in the Coral Sea, off the coast of Queensland, Australia. "
+        "It can be seen from outer space and is the world's biggest single structure made by living organisms. "
+        "The reef is built by billions of tiny organisms known as coral polyps. "
+        "It was selected as a World Heritage Site in 1981. "
+        "Climate change, pollution, crown-of-thorns starfish and fishing are the primary threats to the reef. "
+        "Mass coral bleaching events occurred in 2016, 2017, 2020 and 2022. "
+        "A large part of the reef is protected by the Great Barrier Reef Marine Park. "
+        "Tourism on the reef generates several billion dollars for the Australian economy each year."
+    ),
+}
+
+# (question, article holding the answer, reference answer)
+QUESTIONS = [
+    ("Who flew the command module during Apollo 11?", "apollo", "Michael Collins"),
+    ("On what date did the Apollo 11 crew splash down?", "apollo", "July 24"),
+    ("How tall is Mount Everest in metres?", "everest", "8,848.86"),
+    ("Who made the first recorded ascent of Everest?", "everest", "Tenzing Norgay and Edmund Hillary"),
+    ("In which year did Marie Curie win the Nobel Prize in Chemistry?", "curie", "1911"),
+    ("What did Marie Curie die of?", "curie", "aplastic anaemia"),
+    ("When was Python first released?", "python", "1991"),
+    ("Where does the name Python come from?", "python", "Monty Python"),
+    ("How many individual reefs make up the Great Barrier Reef?", "reef", "2,900"),
+    ("When was the Great Barrier Reef made a World Heritage Site?", "reef", "1981"),
+]
+
+PROMPT_TOKENS = 700  # ReAct prompt without scratchpad: system prompt, tool descriptions, format
+STEP_TOKENS = 40  # Thought/Action text the model adds per step
+
+
+def observation_for(article: str) -> str:
+    # Search results put the relevant page among others, not necessarily first.
+    others = [text for name, text in ARTICLES.items() if name != article]
+    return "\n\n".join(others[:2] + [ARTICLES[article]] + others[2:])
+
+
+def simulated_prompt_tokens(observations: list) -> int:
+    # One LLM call per tool step plus the final answer; each call resends everything so far.
+    total, scratchpad = 0, 0
+    for observation in observations + [None]:
+        total += PROMPT_TOKENS + scratchpad
+        if observation is not None:
+            scratchpad += STEP_TOKENS + estimate_tokens(observation)
+    return total
+
+
+def offline() -> None:
+    compactor = get_observation_compactor()
+    print(f"budget {compactor.budget_tokens} tokens per observation; two search steps per question\n")
+    print(f"{'obs tok':>7} {'compact':>7} {'prompt tok':>10} {'compact':>8} {'ms':>6}  kept  question")
+    totals = {"raw": 0, "compact": 0, "prompt_raw": 0, "prompt_compact": 0, "kept": 0}
+    for question, article, answer in QUESTIONS:
+        raw = observation_for(article)
+        start = time.perf_counter()
+        compacted = compactor.compact(question, raw)
+        ms = (time.perf_counter() - start) * 1000
+        kept = answer in compacted
+        prompt_raw = simulated_prompt_tokens([raw, raw])
+        prompt_compact = simulated_prompt_tokens([compacted, compacted])
+        totals["raw"] += estimate_tokens(raw)
+        totals["compact"] += estimate_tokens(compacted)
+        totals["prompt_raw"] += prompt_raw
+        totals["prompt_compact"] += prompt_compact
+        totals["kept"] += kept
+        print(f"{estimate_tokens(raw):>7} {estimate_tokens(compacted):>7} {prompt_raw:>10} {prompt_compact:>8} "
+              f"{ms:>6.2f}  {'yes' if kept else 'NO':>4}  {question}")
+    n = len(QUESTIONS)
+    print(f"\nmean prompt tokens per run: {totals['prompt_raw'] / n:.0f} -> {totals['prompt_compact'] / n:.0f} "
+          f"({1 - totals['prompt_compact'] / totals['prompt_raw']:.0%} fewer)")
+    print(f"answer retained in compacted observation: {totals['kept']}/{n}")
+
+
+def live() -> None:
+    from dotenv import load_dotenv
+    from src.agent import AIAgent, TokenUsageCallbackHandler
+    from src.cache import get_llm_cache
+    from src.llm_model import GeminiLLM
+    from src.memory import get_conversation_memory
+    from src.tools import get_agent_tools
+
+    load_dotenv()
+    llm = GeminiLLM(temperature=0.0).get_llm()
+    tools = get_agent_tools()
+    print(f"{'compaction':<10} {'prompt tok':>10} {'iters':>5} {'correct':>7}")
+    for enabled in (False, True):
+        # Start each pass from an empty completion cache so neither is served the other's results.
+        get_llm_cache().clear()
+        prompt_tokens = iterations = correct = 0
+        for question, _, answer in QUESTIONS:
+            executor = AIAgent(llm, tools, get_conversation_memory()).get_runnable_agent()
+            executor.verbose = False
+            executor.compact_observations = enabled
+            usage = TokenUsageCallbackHandler()
+            try:
+                output = executor.invoke({"input": question}, config={"callbacks": [usage]})["output"]
+            except Exception as e:
+                output = f"error: {e}"
+            prompt_tokens += usage.prompt_tokens
+            iterations += usage.llm_calls
+            correct += answer.lower() in output.lower()
+        n = len(QUESTIONS)
+        print(f"{'on' if enabled else 'off':<10} {prompt_tokens / n:>10.0f} {iterations / n:>5.1f} {correct:>4}/{n}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--live", action="store_true", help="Run the agent against Gemini and real tools")
+    args = parser.parse_args()
+    live() if args.live else offline()
+
+
+if __name__ == "__main__":
+    main()
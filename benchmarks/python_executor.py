@@ -0,0 +1,66 @@
+# benchmarks/python_executor.py
+"""
+Throughput and latency of short python_executor snippets: in-process exec vs. the sandbox pool.
+
+Runs each snippet sequentially and from concurrent callers, and reports calls per
+second and p50/p99 latency. No API keys needed. Run from the repository root:
+
+    python benchmarks/python_executor.py
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import SANDBOX_POOL_SIZE
+from src.sandbox import get_sandbox_pool, run_restricted_python
+
+SNIPPETS = [
+    "print(1 + 1)",
+    "print([i * i for i in range(20)])",
+    "total = 0\nfor i in range(1000):\n    total += i\nprint(total)",
+    "words = 'the quick brown fox'.split()\nprint(len(words), words[::-1])",
+]
+CALLS = 400
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(run, concurrency: int) -> dict:
+    def timed(i: int) -> float:
+        start = time.perf_counter()
+        run(SNIPPETS[i % len(SNIPPETS)])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(CALLS)))
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": CALLS / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main() -> None:
+    pool = get_sandbox_pool()
+    # Wait until every worker is warm so the numbers reflect steady state, not interpreter startup.
+    pool.wait_until_warm()
+
+    print(f"{'executor':<12} {'callers':>7} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for concurrency in (1, SANDBOX_POOL_SIZE):
+        for name, run in (("in-process", run_restricted_python), ("sandbox", lambda code: pool.run("python", code))):
+            r = measure(run, concurrency)
+            print(f"{name:<12} {concurrency:>7} {r['throughput']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    print(f"\nsandbox stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
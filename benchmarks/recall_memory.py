@@ -0,0 +1,79 @@
+# benchmarks/recall_memory.py
+"""
+Insert and query cost of "recall" memory as a session grows.
+
+Fills one session with synthetic turns, every 50th of which states a fact ("the
+password for vault17 is 4821"), then at each checkpoint measures the mean cost of saving a turn, of the
+index search alone and of a full load_memory_variables call, the index footprint,
+and how often a question about a fact recalls the turn that stated it. Run from the
+repository root:
+
+    python benchmarks/recall_memory.py [--turns N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.compaction import split_sentences
+from src.memory import VectorRecallMemory, _recall_embedder, _recall_state, drop_memory_state
+from benchmarks.observation_compaction import ARTICLES, QUESTIONS
+
+CHECKPOINTS = (100, 1000, 5000, 10000)
+PROBES = 20  # Facts asked about at each checkpoint
+REPEATS = 20  # Timed passes over the probes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sentences = [s for text in ARTICLES.values() for s in split_sentences(text)]
+    drop_memory_state("benchmark")
+    memory = VectorRecallMemory(session_id="benchmark")
+    facts = {}
+    print(f"{'turns':>6} {'save us':>8} {'search us':>9} {'load us':>8} {'index KB':>9} {'recalled':>9}")
+    insert_seconds, inserted = 0.0, 0
+    for turn in range(1, args.turns + 1):
+        if turn % 50 == 0:
+            vault, value = f"vault{turn // 50}", str(rng.randint(1000, 9999))
+            facts[vault] = value
+            question, answer = f"Remember that the password for {vault} is {value}.", f"Noted: {vault} uses {value}."
+        else:
+            question = QUESTIONS[turn % len(QUESTIONS)][0]
+            answer = " ".join(rng.sample(sentences, rng.randint(2, 5)))
+        start = time.perf_counter()
+        memory.save_context({"input": question}, {"output": answer})
+        insert_seconds += time.perf_counter() - start
+        inserted += 1
+        if turn not in CHECKPOINTS:
+            continue
+
+        index = _recall_state("benchmark").index
+        asked = rng.sample(sorted(facts), min(PROBES, len(facts)))
+        probes = [f"What is the password for {vault}?" for vault in asked]
+        vectors = [_recall_embedder.embed(probe) for probe in probes]
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            for vector in vectors:
+                index.search(vector, memory.top_k, index.total - memory.recent_turns, memory.min_similarity)
+        search_us = (time.perf_counter() - start) / (REPEATS * len(vectors)) * 1e6
+        recalled = 0
+        start = time.perf_counter()
+        for probe, vault in zip(probes, asked):
+            history = memory.load_memory_variables({"input": probe})["chat_history"]
+            recalled += any(facts[vault] in message.content for message in history)
+        load_us = (time.perf_counter() - start) / len(probes) * 1e6
+        print(f"{turn:>6} {insert_seconds / inserted * 1e6:>8.1f} {search_us:>9.1f} {load_us:>8.1f} "
+              f"{index.nbytes / 1024:>9.1f} {recalled:>5}/{len(probes)}")
+        insert_seconds, inserted = 0.0, 0
+
+
+if __name__ == "__main__":
+    main()
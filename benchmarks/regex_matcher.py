@@ -0,0 +1,92 @@
+# benchmarks/regex_matcher.py
+"""
+Latency of regex matching on adversarial and ordinary patterns: the previous
+re.compile + findall path vs. the budgeted regex engine.
+
+The previous path runs in a child process that is killed after a cap, because
+catastrophic patterns would otherwise run for minutes or longer. No API keys needed.
+Run from the repository root:
+
+    python benchmarks/regex_matcher.py
+"""
+
+import multiprocessing
+import os
+import re
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import REGEX_TIME_BUDGET
+from src.regex_engine import RegexTimeout, search
+from src.sandbox import get_sandbox_pool
+
+LEGACY_CAP = 10.0  # Seconds before the previous path is reported as unbounded
+
+ADVERSARIAL = [
+    (r"(a+)+$", "a" * 32 + "!"),
+    (r"(a|aa)*c", "a" * 40),
+    (r"(x+x+)+y", "x" * 32),
+    (r"^(\w+\s?)*$", "hello world " * 6 + "!"),
+    (r"(\d+)*[a-z]", "1" * 32),
+    (r"\d*\d*\d*\d*z", "1" * 2000),
+    (r"a+b", "a" * 80000),
+]
+ORDINARY = [
+    (r"\d+", "order 66 shipped in 3 boxes on 2024-05-01"),
+    (r"[\w.]+@[\w.]+\.\w+", "contact ann@example.com or bob@test.org"),
+    (r"(\d{3})-(\d{4})", "call 555-1234 or 555-9876"),
+]
+
+
+def legacy_findall(pattern: str, text: str) -> list:
+    return re.compile(pattern).findall(text)
+
+
+def time_legacy(pattern: str, text: str) -> float:
+    process = multiprocessing.Process(target=legacy_findall, args=(pattern, text), daemon=True)
+    start = time.perf_counter()
+    process.start()
+    process.join(LEGACY_CAP)
+    if process.is_alive():
+        process.kill()
+        process.join()
+        return float("inf")
+    return time.perf_counter() - start
+
+
+def time_engine(pattern: str, text: str) -> tuple:
+    start = time.perf_counter()
+    try:
+        outcome = search(pattern, text).engine
+    except RegexTimeout:
+        outcome = "stopped"
+    return time.perf_counter() - start, outcome
+
+
+def main() -> None:
+    pool = get_sandbox_pool()
+    # Wait for warm workers so cold interpreter startup is not attributed to matching.
+    pool.wait_until_warm()
+
+    print(f"adversarial patterns (previous path capped at {LEGACY_CAP:.0f}s, budget {REGEX_TIME_BUDGET:.1f}s)")
+    print(f"{'pattern':<16} {'previous s':>10} {'engine s':>9}  outcome")
+    for pattern, text in ADVERSARIAL:
+        legacy = time_legacy(pattern, text)
+        elapsed, outcome = time_engine(pattern, text)
+        legacy_text = f">{LEGACY_CAP:.0f}" if legacy == float("inf") else f"{legacy:.2f}"
+        print(f"{pattern:<16} {legacy_text:>10} {elapsed:>9.2f}  {outcome}")
+
+    number = 20000
+    print("\nordinary patterns (microseconds per call)")
+    print(f"{'pattern':<22} {'previous':>9} {'engine':>9}")
+    for pattern, text in ORDINARY:
+        legacy = timeit.timeit(lambda: legacy_findall(pattern, text), number=number) / number * 1e6
+        engine = timeit.timeit(lambda: search(pattern, text), number=number) / number * 1e6
+        print(f"{pattern:<22} {legacy:>9.2f} {engine:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
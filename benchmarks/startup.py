@@ -0,0 +1,62 @@
+# benchmarks/startup.py
+"""
+Import time of src.tools and time-to-first-agent, each measured in a fresh interpreter.
+
+Time-to-first-agent covers what app.initialize_agent does before the first question:
+importing the agent stack, building the tools, creating the LLM client and the
+executor. No network calls are made; a placeholder API key is used. Run from the
+repository root, optionally against another checkout to compare:
+
+    python benchmarks/startup.py [--root PATH] [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_TOOLS = """
+import time
+start = time.perf_counter()
+import src.tools
+print(time.perf_counter() - start)
+"""
+
+FIRST_AGENT = """
+import time
+start = time.perf_counter()
+from src.agent import AIAgent
+from src.llm_model import GeminiLLM
+from src.memory import get_conversation_memory
+from src.tools import get_agent_tools
+tools = get_agent_tools()
+llm = GeminiLLM(api_key="benchmark-placeholder").get_llm()
+AIAgent(llm, tools, get_conversation_memory()).get_runnable_agent()
+print(time.perf_counter() - start)
+"""
+
+
+def measure(root: str, code: str, runs: int) -> list:
+    env = dict(os.environ, PYTHONPATH=root, LOGURU_LEVEL="ERROR")
+    return [
+        float(subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True,
+                             text=True, check=True).stdout.split()[-1])
+        for _ in range(runs)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'measurement':<22} {'median s':>9} {'min s':>7}")
+    for name, code in (("import src.tools", IMPORT_TOOLS), ("time-to-first-agent", FIRST_AGENT)):
+        times = measure(args.root, code, args.runs)
+        print(f"{name:<22} {statistics.median(times):>9.2f} {min(times):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
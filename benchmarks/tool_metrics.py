@@ -0,0 +1,77 @@
+# benchmarks/tool_metrics.py
+"""
+Per-call overhead of the instrumented safe_tool decorator.
+
+Times a trivial tool function bare, under the previous error-handling-only
+decorator and under the instrumented one, from one thread and from several
+concurrent threads, and reports microseconds per call. No API keys needed.
+Run from the repository root:
+
+    python benchmarks/tool_metrics.py
+"""
+
+import os
+import sys
+import threading
+import time
+import timeit
+from functools import wraps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import get_tool_metrics
+from src.tools import safe_tool
+
+CALLS = 200_000
+THREADS = 8
+
+
+def tool(query: str) -> str:
+    return query.upper()
+
+
+def legacy_safe_tool(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            return f"Error in {func.__name__}: {str(e)}. Please check input or try again."
+    return wrapper
+
+
+def per_call_us(func, threads: int) -> float:
+    per_thread = CALLS // threads
+
+    def loop():
+        for _ in range(per_thread):
+            func("benchmark query")
+
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (per_thread * threads) * 1e6
+
+
+def main() -> None:
+    variants = [
+        ("bare", tool),
+        ("previous safe_tool", legacy_safe_tool(tool)),
+        ("instrumented", safe_tool(tool, name="benchmark")),
+    ]
+    print(f"{'variant':<20} {'1 thread us':>12} {f'{THREADS} threads us':>13}")
+    for name, func in variants:
+        single, multi = per_call_us(func, 1), per_call_us(func, THREADS)
+        print(f"{name:<20} {single:>12.3f} {multi:>13.3f}")
+
+    metrics = get_tool_metrics()
+    number = 1000
+    snapshot_us = timeit.timeit(metrics.snapshot, number=number) / number * 1e6
+    print(f"\nsnapshot(): {snapshot_us:.1f} us; recorded {metrics.snapshot()['benchmark']['calls']} calls")
+
+
+if __name__ == "__main__":
+    main()
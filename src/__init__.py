@@ -1,7 +1,37 @@
 # src/__init__.py
-from . import agent
-from . import config
-from . import llm_model
-from . import memory
-from . import tools
-from . import utils
+# Submodules are imported on first attribute access (PEP 562), so importing one
+# module, e.g. `from src.sandbox import ...` in a sandbox worker, does not pull
+# in LangChain, pandas and every other dependency of the package.
+import importlib
+
+__all__ = [
+    "agent",
+    "cache",
+    "calculator",
+    "circuit_breaker",
+    "compaction",
+    "config",
+    "context",
+    "csv_stream",
+    "embeddings",
+    "fx_rates",
+    "history_store",
+    "http_client",
+    "llm_model",
+    "memory",
+    "metrics",
+    "regex_engine",
+    "router",
+    "sandbox",
+    "semantic_cache",
+    "session_manager",
+    "tool_runtime",
+    "tools",
+    "utils",
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,23 +1,270 @@
 # src/agent.py
 
-from typing import List
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Union
+from uuid import UUID
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+from langchain_core.callbacks import BaseCallbackHandler, CallbackManagerForChainRun
+from langchain_core.outputs import LLMResult
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.tools import BaseTool
+from langchain_core.tools import BaseTool, render_text_description
+from langchain_core.runnables import RunnableLambda
 from langchain_core.memory import BaseMemory
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain_core.prompts import PromptTemplate
-from src.config import AGENT_SYSTEM_PROMPT
+from langchain.agents import AgentExecutor, create_react_agent, create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+from src.config import (
+    AGENT_SYSTEM_PROMPT, AGENT_ENGINE, AGENT_MAX_ITERATIONS, MAX_PARALLEL_TOOLS, COMPACTION_ENABLED,
+    CONTEXT_PACKING_ENABLED
+)
+from src.compaction import get_observation_compactor
+from src.context import ContextPacker, get_token_counter
 from src.utils import logger
 from langchain.schema.runnable import Runnable
 # from langchain.agents.format_scratchpad import format_to_messages
 from langchain.agents.output_parsers import ReActJsonSingleInputOutputParser
 
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+PARALLEL_TOOLS_HINT = (
+    "When a question needs several independent lookups, request all of those tool calls "
+    "together in a single step instead of one after another."
+)
+
+# Bounded, process-wide pool shared by all sessions for concurrent tool calls.
+_tool_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_TOOLS, thread_name_prefix="agent-tool")
+
+
+class ParallelToolStats:
+    """
+    Process-wide counters for agent steps that ran several tool calls concurrently.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps = 0
+        self._parallel_steps = 0
+        self._tool_calls = 0
+        self._max_fan_out = 0
+        self._saved_seconds = 0.0
+
+    def record(self, fan_out: int, sequential_seconds: float, wall_seconds: float) -> None:
+        """
+        Records one agent step.
+
+        Args:
+            fan_out (int): Number of tool calls in the step.
+            sequential_seconds (float): Sum of the individual tool call durations.
+            wall_seconds (float): Elapsed time for the whole step.
+        """
+        with self._lock:
+            self._steps += 1
+            self._tool_calls += fan_out
+            self._max_fan_out = max(self._max_fan_out, fan_out)
+            if fan_out > 1:
+                self._parallel_steps += 1
+                self._saved_seconds += max(0.0, sequential_seconds - wall_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns step counts, fan-out and total latency saved."""
+        with self._lock:
+            return {
+                "steps": self._steps,
+                "parallel_steps": self._parallel_steps,
+                "mean_fan_out": (self._tool_calls / self._steps) if self._steps else 0.0,
+                "max_fan_out": self._max_fan_out,
+                "saved_seconds": self._saved_seconds,
+            }
+
+
+parallel_tool_stats = ParallelToolStats()
+
+
+class _DeferredAction(NamedTuple):
+    name_to_tool_map: Dict[str, BaseTool]
+    color_mapping: Dict[str, str]
+    agent_action: AgentAction
+    run_manager: Optional[CallbackManagerForChainRun]
+
+
+class GeminiAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that runs all tool calls requested in one step concurrently.
+
+    The base executor performs the actions of a multi-action step one after another.
+    Here each action is deferred while the step is planned, then the whole batch is
+    executed on a bounded thread pool and all observations are returned together.
+    Long observations are compacted against the user's question before they reach
+    the scratchpad.
+    """
+    compact_observations: bool = COMPACTION_ENABLED
+    engine: str = "react"
+
+    def _perform_agent_action(self, name_to_tool_map: Dict[str, BaseTool], color_mapping: Dict[str, str],
+                              agent_action: AgentAction,
+                              run_manager: Optional[CallbackManagerForChainRun] = None) -> Any:
+        return _DeferredAction(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+    def _run_deferred(self, deferred: _DeferredAction) -> tuple:
+        start = time.perf_counter()
+        step = super()._perform_agent_action(*deferred)
+        return step, time.perf_counter() - start
+
+    def _compact_step(self, step: AgentStep, question: str) -> AgentStep:
+        if (not self.compact_observations or step.action.tool == "expand_observation"
+                or not isinstance(step.observation, str)):
+            return step
+        observation = get_observation_compactor().compact(question, step.observation)
+        return step if observation is step.observation else AgentStep(action=step.action, observation=observation)
+
+    def _iter_next_step(self, name_to_tool_map: Dict[str, BaseTool], color_mapping: Dict[str, str],
+                        inputs: Dict[str, str], intermediate_steps: List[tuple],
+                        run_manager: Optional[CallbackManagerForChainRun] = None
+                        ) -> Iterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        deferred: List[_DeferredAction] = []
+        for item in super()._iter_next_step(name_to_tool_map, color_mapping, inputs,
+                                            intermediate_steps, run_manager):
+            if isinstance(item, _DeferredAction):
+                deferred.append(item)
+            else:
+                yield item
+        if not deferred:
+            return
+
+        start = time.perf_counter()
+        if len(deferred) == 1:
+            results = [self._run_deferred(deferred[0])]
+        else:
+            futures = [_tool_pool.submit(contextvars.copy_context().run, self._run_deferred, action)
+                       for action in deferred]
+            results = [future.result() for future in futures]
+        wall_seconds = time.perf_counter() - start
+        sequential_seconds = sum(duration for _, duration in results)
+
+        parallel_tool_stats.record(len(deferred), sequential_seconds, wall_seconds)
+        if len(deferred) > 1:
+            logger.info(f"Ran {len(deferred)} tool calls concurrently in {wall_seconds:.2f}s "
+                        f"(sequential {sequential_seconds:.2f}s, saved "
+                        f"{max(0.0, sequential_seconds - wall_seconds):.2f}s)")
+        question = str(inputs.get("input", ""))
+        for step, _ in results:
+            yield self._compact_step(step, question)
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """
+    Forwards LLM tokens as they arrive, separating reasoning from the final answer.
+    """
+    def __init__(self,
+                 on_thought: Optional[Callable[[str], None]] = None,
+                 on_answer: Optional[Callable[[str], None]] = None,
+                 answer_marker: Optional[str] = FINAL_ANSWER_MARKER):
+        """
+        Initializes the StreamingCallbackHandler.
+
+        Args:
+            on_thought (Optional[Callable[[str], None]]): Called with the reasoning text of
+                                                          the current LLM call so far.
+            on_answer (Optional[Callable[[str], None]]): Called with the final answer text so far.
+            answer_marker (Optional[str]): Text that starts the answer in ReAct output. None
+                                           (native tool calling) treats the text of a call as
+                                           the answer unless the call requests tools.
+        """
+        self._on_thought = on_thought
+        self._on_answer = on_answer
+        self._answer_marker = answer_marker
+        self._run_id: UUID | None = None
+        self._buffer = ""
+        self._calls_tools = False
+        self.first_token_at: float | None = None
+
+    def on_llm_new_token(self, token: str, *, chunk: Any = None, run_id: UUID, **kwargs: Any) -> None:
+        calls_tools = bool(getattr(getattr(chunk, "message", None), "tool_call_chunks", None))
+        self._receive(token, run_id, calls_tools)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id == self._run_id:
+            return
+        # No tokens were streamed for this call (e.g. a cached completion): forward its text at once.
+        generations = [generation for generations in response.generations for generation in generations]
+        text = "".join(generation.text for generation in generations)
+        calls_tools = any(getattr(getattr(generation, "message", None), "tool_calls", None)
+                          for generation in generations)
+        if text:
+            self._receive(text, run_id, calls_tools)
+
+    def _receive(self, token: str, run_id: UUID, calls_tools: bool) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        if run_id != self._run_id:
+            # Each agent iteration is a fresh LLM call with its own text.
+            self._run_id = run_id
+            self._buffer = ""
+            self._calls_tools = False
+        shown_as_answer = self._buffer if not self._calls_tools else ""
+        self._buffer += token
+
+        if self._answer_marker is None:
+            if calls_tools and not self._calls_tools:
+                self._calls_tools = True
+                if shown_as_answer and self._on_answer:
+                    # The text so far preceded a tool call, so it was reasoning after all.
+                    self._on_answer("")
+            if self._calls_tools:
+                if self._on_thought:
+                    self._on_thought(self._buffer.strip())
+            elif self._on_answer:
+                self._on_answer(self._buffer.lstrip())
+            return
+
+        thought, marker, answer = self._buffer.partition(self._answer_marker)
+        if marker:
+            if self._on_answer:
+                self._on_answer(answer.lstrip())
+        elif self._on_thought:
+            self._on_thought(thought.strip())
+
+
+class ToolUsageCallbackHandler(BaseCallbackHandler):
+    """
+    Records the names of the tools invoked during an agent run.
+    """
+    def __init__(self):
+        self.tools_used: List[str] = []
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        if name:
+            self.tools_used.append(name)
+
+
+class TokenUsageCallbackHandler(BaseCallbackHandler):
+    """
+    Counts LLM calls and the prompt/completion tokens reported by the model.
+    """
+    def __init__(self):
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        self.llm_calls += 1
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.prompt_tokens += usage.get("input_tokens", 0)
+                    self.completion_tokens += usage.get("output_tokens", 0)
+
 
 class AIAgent:
     """
     Orchestrates the LLM, tools, and memory to create a Langchain agent.
     """
-    def __init__(self, llm: BaseChatModel, tools: List[BaseTool], memory: BaseMemory):
+    def __init__(self, llm: BaseChatModel, tools: List[BaseTool], memory: BaseMemory, engine: str = AGENT_ENGINE,
+                 pack_context: bool = CONTEXT_PACKING_ENABLED):
         """
         Initializes the AIAgent.
 
@@ -25,11 +272,19 @@ class AIAgent:
             llm (BaseChatModel): The language model instance.
             tools (List[BaseTool]): A list of tools the agent can use.
             memory (BaseMemory): The memory system for conversational context.
+            engine (str): 'react' for the text ReAct loop or 'tool_calling' for native
+                          Gemini function calling (expects structured tools).
+            pack_context (bool): Fit history and scratchpad into the prompt token budget on every call.
         """
+        if engine not in ("react", "tool_calling"):
+            raise ValueError(f"Unknown agent engine '{engine}'. Use 'react' or 'tool_calling'.")
         self._llm = llm
         self._tools = tools
         self._memory = memory
+        self._engine = engine
+        self._pack_context = pack_context
         self._agent_executor: AgentExecutor | None = None
+        self.context_packer: Optional[ContextPacker] = None
         logger.info("AIAgent initialized.")
 
     def _create_agent_prompt(self) -> PromptTemplate:
@@ -67,6 +322,34 @@ Thought:{agent_scratchpad}
         logger.debug("Agent prompt created.")
         return prompt
 
+    def _create_tool_calling_prompt(self) -> ChatPromptTemplate:
+        """
+        Creates the chat prompt for the native function-calling agent.
+        Tool schemas travel as structured declarations, so the prompt carries no tool prose.
+        """
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", AGENT_SYSTEM_PROMPT + "\n" + PARALLEL_TOOLS_HINT),
+            MessagesPlaceholder("chat_history", optional=True),
+            ("human", "{input}"),
+            MessagesPlaceholder("agent_scratchpad"),
+        ])
+        logger.debug("Tool-calling agent prompt created.")
+        return prompt
+
+    def _fixed_prompt_text(self) -> str:
+        """
+        Returns the prompt text sent on every call: everything except history, question and scratchpad.
+        """
+        if self._engine == "tool_calling":
+            from langchain_core.utils.function_calling import convert_to_openai_tool
+            schemas = json.dumps([convert_to_openai_tool(tool) for tool in self._tools])
+            return AGENT_SYSTEM_PROMPT + "\n" + PARALLEL_TOOLS_HINT + "\n" + schemas
+        return self._create_agent_prompt().format(
+            tools=render_text_description(self._tools),
+            tool_names=", ".join(tool.name for tool in self._tools),
+            chat_history="", input="", agent_scratchpad=""
+        )
+
     def get_runnable_agent(self) -> Runnable:
         """
         Creates and returns the Langchain Runnable agent.
@@ -75,20 +358,73 @@ Thought:{agent_scratchpad}
             Runnable: The Langchain agent ready to be invoked.
         """
         if self._agent_executor is None:
-            prompt = self._create_agent_prompt()
+            if self._engine == "tool_calling":
+                agent = create_tool_calling_agent(self._llm, self._tools, self._create_tool_calling_prompt())
+            else:
+                # Create the ReAct agent
+                agent = create_react_agent(self._llm, self._tools, self._create_agent_prompt())
 
-            # Create the ReAct agent
-            agent = create_react_agent(self._llm, self._tools, prompt)
+            if self._pack_context:
+                # Memory supplies the full history; the packer trims it and the scratchpad before each LLM call.
+                self.context_packer = ContextPacker(get_token_counter(self._llm), self._fixed_prompt_text(),
+                                                    as_messages=self._engine == "tool_calling")
+                agent = RunnableLambda(self.context_packer.pack) | agent
 
             # Create the agent executor
-            self._agent_executor = AgentExecutor(
+            self._agent_executor = GeminiAgentExecutor(
                 agent=agent,
                 tools=self._tools,
                 memory=self._memory,
                 verbose=True,     #Set to True for detailed agent trace in console
                 handle_parsing_errors=True,
-                max_iterations=7, # Limit tool usage to prevent infinite loops
-                early_stopping_method="generate"
+                max_iterations=AGENT_MAX_ITERATIONS,
+                engine=self._engine,
+                # Multi-action (function-calling) agents only support the "force" stop.
+                early_stopping_method="force" if self._engine == "tool_calling" else "generate"
             )
-            logger.info("Langchain AgentExecutor created.")
+            logger.info(f"Langchain AgentExecutor created (engine={self._engine}).")
         return self._agent_executor
+
+
+def stream_agent_response(agent_executor: AgentExecutor,
+                          inputs: Dict[str, Any],
+                          on_thought: Optional[Callable[[str], None]] = None,
+                          on_answer: Optional[Callable[[str], None]] = None,
+                          on_step: Optional[Callable[[str, Any, str], None]] = None) -> Dict[str, Any]:
+    """
+    Runs the agent executor in streaming mode, reporting progress through callbacks.
+
+    Args:
+        agent_executor (AgentExecutor): The executor returned by AIAgent.get_runnable_agent().
+        inputs (Dict[str, Any]): The executor inputs (e.g. {"input": "..."}).
+        on_thought (Optional[Callable[[str], None]]): Receives streamed reasoning text.
+        on_answer (Optional[Callable[[str], None]]): Receives streamed final answer text.
+        on_step (Optional[Callable[[str, Any, str], None]]): Receives (tool, tool_input, observation)
+                                                            after each tool call.
+
+    Returns:
+        Dict[str, Any]: The executor output, plus 'time_to_first_token' and 'total_time' in seconds
+                        and the 'tools_used' during the run.
+    """
+    # The ReAct engine marks its answer in the text; a tool-calling answer is the call without tool calls.
+    react = getattr(agent_executor, "engine", "react") == "react"
+    handler = StreamingCallbackHandler(on_thought=on_thought, on_answer=on_answer,
+                                       answer_marker=FINAL_ANSWER_MARKER if react else None)
+    tool_usage = ToolUsageCallbackHandler()
+    start_time = time.perf_counter()
+    result: Dict[str, Any] = {}
+
+    for chunk in agent_executor.stream(inputs, config={"callbacks": [handler, tool_usage]}):
+        if on_step:
+            for step in chunk.get("steps", []):
+                on_step(step.action.tool, step.action.tool_input, str(step.observation))
+        if "output" in chunk:
+            result["output"] = chunk["output"]
+
+    total_time = time.perf_counter() - start_time
+    first_token_at = handler.first_token_at
+    result["time_to_first_token"] = (first_token_at - start_time) if first_token_at else total_time
+    result["total_time"] = total_time
+    result["tools_used"] = tool_usage.tools_used
+    logger.debug(f"Streamed agent response: ttft={result['time_to_first_token']:.2f}s, total={total_time:.2f}s")
+    return result
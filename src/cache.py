@@ -0,0 +1,565 @@
+# src/cache.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+from src.config import (
+    LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_BYTES, LLM_CACHE_PATH,
+    TOOL_CACHE_TTLS, TOOL_CACHE_MAX_ENTRIES, TOOL_CACHE_MAX_BYTES, TOOL_CACHE_PATH
+)
+from src.tool_runtime import ToolFailure
+from src.utils import logger
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with per-entry TTL and optional size cap.
+    """
+    def __init__(self, max_entries: int = 512, max_bytes: Optional[int] = None, default_ttl: Optional[float] = None):
+        """
+        Initializes the LRUCache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept.
+            max_bytes (Optional[int]): Maximum total size of entries, if set.
+            default_ttl (Optional[float]): Seconds an entry stays valid; None means no expiry.
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, size: int = 0) -> None:
+        """
+        Stores a value, evicting least recently used entries when over capacity.
+
+        Args:
+            key (str): Cache key.
+            value (Any): Value to store.
+            ttl (Optional[float]): Seconds until expiry; defaults to the cache TTL.
+            size (int): Size of the value in bytes, used for the size cap.
+        """
+        ttl = self._default_ttl if ttl is None else ttl
+        expires_at = (time.time() + ttl) if ttl is not None else None
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self._max_entries
+                or (self._max_bytes is not None and self._bytes > self._max_bytes)
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Removes a key if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns entry count, size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class SQLiteStore:
+    """
+    Key-value store in a SQLite file, shared by every process that opens the same path.
+
+    Entries carry an expiry time; the store is trimmed to `max_bytes` by evicting
+    the least recently accessed entries.
+    """
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+        "expires_at REAL, last_access REAL NOT NULL)"
+    )
+
+    def __init__(self, path: str, max_bytes: int, trim_every: int = 50):
+        """
+        Initializes the SQLiteStore.
+
+        Args:
+            path (str): Database file path; parent directories are created.
+            max_bytes (int): Maximum total value size kept on disk.
+            trim_every (int): Number of writes between size checks.
+        """
+        self._path = path
+        self._max_bytes = max_bytes
+        self._trim_every = trim_every
+        self._writes = 0
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads, so keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        """Returns the stored value and its expiry time (None if it never expires), or None if missing or expired."""
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        now = time.time()
+        if expires_at is not None and expires_at < now:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        return value, expires_at
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Stores a value with an optional TTL in seconds."""
+        now = time.time()
+        expires_at = (now + ttl) if ttl is not None else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), expires_at, now)
+        )
+        with self._write_lock:
+            self._writes += 1
+            should_trim = self._writes % self._trim_every == 0
+        if should_trim:
+            self.trim()
+
+    def delete(self, key: str) -> None:
+        """Removes a key if present."""
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def trim(self) -> int:
+        """
+        Removes expired entries, then least recently accessed ones until under the size cap.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?",
+                               (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        while total > self._max_bytes:
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 64").fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in rows])
+            total -= sum(size for _, size in rows)
+            removed += len(rows)
+        if removed:
+            logger.debug(f"Trimmed {removed} entries from {self._path}")
+        return removed
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        self._connect().execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns entry count and total size on disk."""
+        count, total = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": total}
+
+
+class TieredCache:
+    """
+    Two-tier cache: an in-memory LRU in front of an optional SQLite store.
+
+    Values are kept deserialized in memory and serialized to text on disk.
+    Disk hits are promoted into the memory tier for the rest of their lifetime.
+    """
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteStore] = None,
+                 serialize: Callable[[Any], str] = str,
+                 deserialize: Callable[[str], Any] = lambda value: value):
+        """
+        Initializes the TieredCache.
+
+        Args:
+            memory (LRUCache): In-memory tier.
+            disk (Optional[SQLiteStore]): On-disk tier, if any.
+            serialize (Callable[[Any], str]): Converts values to text for the disk tier.
+            deserialize (Callable[[str], Any]): Converts disk text back to values.
+        """
+        self._memory = memory
+        self._disk = disk
+        self._serialize = serialize
+        self._deserialize = deserialize
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value from the fastest tier that has it, or None."""
+        value = self._memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+        if self._disk is not None:
+            try:
+                entry = self._disk.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                raw, expires_at = entry
+                value = self._deserialize(raw)
+                ttl = max(expires_at - time.time(), 0.0) if expires_at is not None else None
+                self._memory.set(key, value, ttl=ttl, size=len(raw))
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores a value in both tiers."""
+        raw = self._serialize(value)
+        self._memory.set(key, value, ttl=ttl, size=len(raw))
+        if self._disk is not None:
+            try:
+                self._disk.set(key, raw, ttl=ttl)
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        """Removes a key from both tiers."""
+        self._memory.delete(key)
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def clear(self) -> None:
+        """Removes all entries from both tiers."""
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns per-tier hit counters and sizes."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.disk_hits) / lookups) if lookups else 0.0,
+                "memory": self._memory.stats(),
+            }
+        if self._disk is not None:
+            stats["disk"] = self._disk.stats()
+        return stats
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight wait for and share its result (or exception).
+    """
+    class _Call:
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Runs `fn` once per key among concurrent callers.
+
+        Args:
+            key (str): Identity of the call.
+            fn (Callable[[], Any]): The work to run.
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another caller's execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._Call()
+                self._calls[key] = call
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_WHITESPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Strips trailing whitespace from each line and from the end of the prompt.
+
+    Indentation and line breaks are kept: they carry meaning in code, YAML, CSV or regex
+    text, so prompts differing in them must not share a cached completion.
+    """
+    return _TRAILING_WHITESPACE.sub("", prompt).rstrip()
+
+
+class LLMCompletionCache(BaseCache):
+    """
+    Langchain cache for LLM completions backed by a TieredCache.
+
+    Keys combine a hash of the normalized prompt with the model parameters
+    (the `llm_string` Langchain passes in), so different models or temperatures
+    never share entries.
+    """
+    def __init__(self, cache: TieredCache, ttl: Optional[float] = LLM_CACHE_TTL):
+        """
+        Initializes the LLMCompletionCache.
+
+        Args:
+            cache (TieredCache): Storage for serialized generations.
+            ttl (Optional[float]): Seconds a completion stays valid.
+        """
+        self._cache = cache
+        self._ttl = ttl
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(normalize_prompt(prompt).encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(llm_string.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        return self._cache.get(self.make_key(prompt, llm_string))
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self._cache.set(self.make_key(prompt, llm_string), list(return_val), ttl=self._ttl)
+
+    def clear(self, **kwargs: Any) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit-rate counters for both tiers."""
+        return self._cache.stats()
+
+
+_llm_cache: Optional[LLMCompletionCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCompletionCache:
+    """
+    Returns the process-wide LLM completion cache, creating it on first use.
+
+    The SQLite tier is shared by every Streamlit worker process on the host.
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            try:
+                disk = SQLiteStore(LLM_CACHE_PATH, max_bytes=LLM_CACHE_MAX_BYTES)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM disk cache unavailable, using memory only: {e}")
+                disk = None
+            tiered = TieredCache(
+                LRUCache(max_entries=LLM_CACHE_MAX_ENTRIES, default_ttl=LLM_CACHE_TTL),
+                disk,
+                serialize=dumps,
+                deserialize=loads
+            )
+            _llm_cache = LLMCompletionCache(tiered)
+            logger.info(f"LLM completion cache initialized (path={LLM_CACHE_PATH})")
+        return _llm_cache
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases a lookup query and collapses whitespace and trailing punctuation."""
+    return _WHITESPACE.sub(" ", query).strip().lower().strip(" ?!.")
+
+
+class ToolResultCache:
+    """
+    Caches results of lookup tools (web search, Wikipedia) by normalized query.
+
+    Identical concurrent queries are coalesced into one outbound request, and
+    failed calls are never cached.
+    """
+    def __init__(self, cache: TieredCache, ttls: Dict[str, float]):
+        """
+        Initializes the ToolResultCache.
+
+        Args:
+            cache (TieredCache): Storage for tool results.
+            ttls (Dict[str, float]): Seconds a result stays valid, per tool name.
+        """
+        self._cache = cache
+        self._ttls = ttls
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, key: str, amount: int = 1) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0, "bytes_saved": 0})
+            stats[key] += amount
+
+    def wrap(self, name: str, func: Callable[[str], str]) -> Callable[[str], str]:
+        """
+        Returns a cached version of a single-query tool function.
+
+        Args:
+            name (str): Tool name, selecting the TTL.
+            func (Callable[[str], str]): The tool function taking a query string.
+
+        Returns:
+            Callable[[str], str]: The cached function.
+        """
+        ttl = self._ttls.get(name)
+
+        @wraps(func)
+        def wrapper(query: str) -> str:
+            key = hashlib.sha256(f"{name}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._count(name, "hits")
+                self._count(name, "bytes_saved", len(cached.encode("utf-8")))
+                return cached
+
+            def fetch() -> str:
+                result = func(query)
+                if not isinstance(result, ToolFailure):
+                    self._cache.set(key, str(result), ttl=ttl)
+                return result
+
+            result, shared = self._flight.do(key, fetch)
+            if shared:
+                self._count(name, "coalesced")
+                self._count(name, "bytes_saved", len(str(result).encode("utf-8")))
+            else:
+                self._count(name, "misses")
+            return result
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns per-tool hit rates and bytes saved, plus tier statistics."""
+        with self._lock:
+            tools = {}
+            for name, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+                tools[name] = dict(stats)
+                tools[name]["hit_rate"] = ((stats["hits"] + stats["coalesced"]) / lookups) if lookups else 0.0
+        return {"tools": tools, "tiers": self._cache.stats()}
+
+
+_tool_cache: Optional[ToolResultCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Returns the process-wide tool result cache, with a disk tier if TOOL_CACHE_PATH is set."""
+    global _tool_cache
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            disk = None
+            if TOOL_CACHE_PATH:
+                try:
+                    disk = SQLiteStore(TOOL_CACHE_PATH, max_bytes=TOOL_CACHE_MAX_BYTES)
+                except sqlite3.Error as e:
+                    logger.warning(f"Tool disk cache unavailable, using memory only: {e}")
+            memory = LRUCache(max_entries=TOOL_CACHE_MAX_ENTRIES, max_bytes=TOOL_CACHE_MAX_BYTES)
+            _tool_cache = ToolResultCache(TieredCache(memory, disk), TOOL_CACHE_TTLS)
+            logger.info(f"Tool result cache initialized (disk={TOOL_CACHE_PATH or 'off'})")
+        return _tool_cache
+
+
+def cached_tool(name: str, func: Callable[[str], str]) -> Callable[[str], str]:
+    """
+    Wraps a lookup tool function with the shared result cache.
+
+    Args:
+        name (str): Tool name as registered with the agent.
+        func (Callable[[str], str]): The tool function taking a query string.
+
+    Returns:
+        Callable[[str], str]: The cached function.
+    """
+    return get_tool_cache().wrap(name, func)
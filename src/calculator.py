@@ -0,0 +1,219 @@
+# src/calculator.py
+
+import ast
+import math
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, Union
+import numpy as np
+from src.config import CALC_MAX_EXPRESSION_LENGTH, CALC_MAX_RESULT_DIGITS, CALC_MAX_VECTOR_LENGTH, CALC_CACHE_SIZE
+
+Number = Union[int, float]
+Evaluator = Callable[[], Any]
+
+# Integer results may not grow beyond this many bits (~CALC_MAX_RESULT_DIGITS decimal digits).
+_MAX_RESULT_BITS = int(CALC_MAX_RESULT_DIGITS * math.log2(10))
+
+
+class CalculatorError(ValueError):
+    """Raised when an expression is not allowed or cannot be evaluated."""
+
+
+def _check_int(value: Any) -> Any:
+    if isinstance(value, int) and value.bit_length() > _MAX_RESULT_BITS:
+        raise CalculatorError(f"Result exceeds {CALC_MAX_RESULT_DIGITS} digits.")
+    return value
+
+
+def _digits(value: Number) -> float:
+    return math.log10(abs(value)) if value else 0.0
+
+
+def _power(base: Any, exponent: Any) -> Any:
+    # Checked before computing: 9**9**9 would otherwise spend minutes building a huge integer.
+    if isinstance(base, np.ndarray) or isinstance(exponent, np.ndarray):
+        return np.power(base, exponent)
+    if abs(base) > 1 and exponent > 0 and exponent * _digits(base) > CALC_MAX_RESULT_DIGITS:
+        raise CalculatorError(f"Result of {base}**{exponent} would exceed {CALC_MAX_RESULT_DIGITS} digits.")
+    return operator.pow(base, exponent)
+
+
+def _factorial(n: Any) -> Any:
+    if isinstance(n, np.ndarray):
+        return np.array([_factorial(x.item()) for x in n], dtype=np.float64)
+    if n != int(n) or n < 0:
+        raise CalculatorError("factorial() is only defined for non-negative integers.")
+    if math.lgamma(n + 1) / math.log(10) > CALC_MAX_RESULT_DIGITS:
+        raise CalculatorError(f"factorial({n:g}) would exceed {CALC_MAX_RESULT_DIGITS} digits.")
+    return math.factorial(int(n))
+
+
+def _ufunc(func: Callable) -> Callable:
+    def apply(value: Any) -> Any:
+        result = func(value)
+        return result if isinstance(result, np.ndarray) else result.item()
+    return apply
+
+
+def _reduction(func: Callable) -> Callable:
+    def apply(*values: Any) -> Any:
+        data = values[0] if len(values) == 1 else np.array(values, dtype=np.float64)
+        return np.asarray(func(data)).item()
+    return apply
+
+
+_BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _power,
+}
+
+_UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "sqrt": _ufunc(np.sqrt),
+    "abs": _ufunc(np.abs),
+    "exp": _ufunc(np.exp),
+    "log": _ufunc(np.log),
+    "ln": _ufunc(np.log),
+    "log10": _ufunc(np.log10),
+    "log2": _ufunc(np.log2),
+    "sin": _ufunc(np.sin),
+    "cos": _ufunc(np.cos),
+    "tan": _ufunc(np.tan),
+    "asin": _ufunc(np.arcsin),
+    "acos": _ufunc(np.arccos),
+    "atan": _ufunc(np.arctan),
+    "floor": _ufunc(np.floor),
+    "ceil": _ufunc(np.ceil),
+    "round": _ufunc(np.round),
+    "factorial": _factorial,
+    "sum": _reduction(np.sum),
+    "mean": _reduction(np.mean),
+    "median": _reduction(np.median),
+    "std": _reduction(np.std),
+    "min": _reduction(np.min),
+    "max": _reduction(np.max),
+}
+
+CONSTANTS: Dict[str, float] = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+def _compile_node(node: ast.AST) -> Evaluator:
+    """Turns a whitelisted AST node into a closure; anything else is rejected."""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise CalculatorError(f"Unsupported literal: {value!r}")
+        _check_int(value)
+        return lambda: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in CONSTANTS:
+            raise CalculatorError(f"Unknown name '{node.id}'. Constants: {', '.join(CONSTANTS)}")
+        value = CONSTANTS[node.id]
+        return lambda: value
+
+    if isinstance(node, (ast.Tuple, ast.List)):
+        if len(node.elts) > CALC_MAX_VECTOR_LENGTH:
+            raise CalculatorError(f"Vectors are limited to {CALC_MAX_VECTOR_LENGTH} elements.")
+        items = [_compile_node(elt) for elt in node.elts]
+
+        def vector():
+            values = [item() for item in items]
+            if any(isinstance(v, np.ndarray) for v in values):
+                raise CalculatorError("Nested vectors are not supported.")
+            return np.array(values, dtype=np.float64)
+        return vector
+
+    if isinstance(node, ast.BinOp):
+        op = _BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda: _check_int(op(left(), right()))
+
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        operand = _compile_node(node.operand)
+        return lambda: op(operand())
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            name = node.func.id if isinstance(node.func, ast.Name) else ast.dump(node.func)
+            raise CalculatorError(f"Unsupported function '{name}'. Available: {', '.join(FUNCTIONS)}")
+        func = FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+        if not args:
+            raise CalculatorError(f"{node.func.id}() needs an argument.")
+        return lambda: func(*(arg() for arg in args))
+
+    raise CalculatorError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=CALC_CACHE_SIZE)
+def compile_expression(expression: str) -> Evaluator:
+    """
+    Parses an expression into a whitelisted AST and compiles it into a reusable evaluator.
+
+    Compiled evaluators are cached by expression text, so repeated expressions skip parsing.
+
+    Args:
+        expression (str): A math expression, e.g. '2**10 % 7', 'sqrt(2)' or '[1, 2, 3] * 2'.
+
+    Returns:
+        Evaluator: A zero-argument callable that returns the result.
+
+    Raises:
+        CalculatorError: If the expression is too long, malformed or uses unsupported syntax.
+    """
+    if len(expression) > CALC_MAX_EXPRESSION_LENGTH:
+        raise CalculatorError(f"Expression longer than {CALC_MAX_EXPRESSION_LENGTH} characters.")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise CalculatorError(f"Invalid expression: {e.msg}") from None
+    return _compile_node(tree)
+
+
+def format_result(value: Any) -> str:
+    """Formats a scalar like Python's str(); vectors print whole-number elements without '.0'."""
+    if isinstance(value, np.ndarray):
+        return "[" + ", ".join(
+            str(int(x)) if x.is_integer() and abs(x) < 1e15 else str(x) for x in value.tolist()
+        ) + "]"
+    return str(value)
+
+
+def evaluate(expression: str) -> Any:
+    """
+    Evaluates an expression with the cached compiled evaluator.
+
+    Scalars follow Python semantics (exact integers, true division). Comma-separated
+    values and list literals become float vectors evaluated element-wise with NumPy.
+
+    Args:
+        expression (str): The expression to evaluate.
+
+    Returns:
+        Any: An int, a float or a NumPy vector.
+
+    Raises:
+        CalculatorError: If the expression is not allowed or its result exceeds the limits.
+        ZeroDivisionError, FloatingPointError, OverflowError: On arithmetic errors.
+    """
+    evaluator = compile_expression(expression)
+    with np.errstate(all="raise"):
+        return evaluator()
@@ -0,0 +1,225 @@
+# src/circuit_breaker.py
+
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional
+from src.config import (
+    CIRCUIT_BREAKER_TOOLS, CIRCUIT_BREAKER_WINDOW, CIRCUIT_BREAKER_MIN_CALLS, CIRCUIT_BREAKER_FAILURE_RATE,
+    CIRCUIT_BREAKER_OPEN_SECONDS
+)
+from src.tool_runtime import ToolFailure
+from src.utils import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(ToolFailure):
+    """Observation returned without calling a tool whose circuit is open."""
+    kind = "circuit_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of one external tool and fails fast while it is down.
+
+    Outcomes are counted in one-second buckets over a rolling window. Once the window
+    holds at least `min_calls` calls and the failure rate reaches `failure_rate`, the
+    breaker opens: calls are rejected without touching the service. After
+    `open_seconds` it turns half-open and lets a single probe call through; success
+    closes it, failure opens it again.
+    """
+    def __init__(self, name: str, window: float = CIRCUIT_BREAKER_WINDOW, min_calls: int = CIRCUIT_BREAKER_MIN_CALLS,
+                 failure_rate: float = CIRCUIT_BREAKER_FAILURE_RATE, open_seconds: float = CIRCUIT_BREAKER_OPEN_SECONDS):
+        """
+        Initializes the CircuitBreaker.
+
+        Args:
+            name (str): Tool name, used in logs and observations.
+            window (float): Seconds of history the failure rate is computed over.
+            min_calls (int): Calls in the window before the breaker may open.
+            failure_rate (float): Failure rate (0-1) that opens the breaker.
+            open_seconds (float): Seconds the breaker stays open before a probe call.
+        """
+        self.name = name
+        self._window = window
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._open_seconds = open_seconds
+        self._buckets: "deque[list]" = deque()  # [second, calls, failures]
+        self._calls = 0
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _prune_locked(self, now: float) -> None:
+        horizon = int(now - self._window)
+        while self._buckets and self._buckets[0][0] <= horizon:
+            _, calls, failures = self._buckets.popleft()
+            self._calls -= calls
+            self._failures -= failures
+
+    def _state_locked(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self._open_seconds:
+            self._state = HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open; next call is a probe")
+        return self._state
+
+    def _open_locked(self, now: float, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._times_opened += 1
+        logger.warning(f"Circuit for {self.name} opened ({reason}); failing fast for {self._open_seconds:.0f}s")
+
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._state_locked(time.monotonic())
+
+    def acquire(self) -> Optional[str]:
+        """
+        Decides whether a call may go through, reserving the probe slot when half-open.
+
+        Returns:
+            Optional[str]: The state the call was admitted in ('closed' or 'half_open'),
+                           to be passed to `record`, or None if the call is rejected.
+        """
+        with self._lock:
+            state = self._state_locked(time.monotonic())
+            if state == CLOSED:
+                return CLOSED
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return HALF_OPEN
+            self._rejected += 1
+            return None
+
+    def record(self, failed: bool, admitted: str = CLOSED) -> None:
+        """
+        Records the outcome of an admitted call and applies state transitions.
+
+        Args:
+            failed (bool): Whether the call failed.
+            admitted (str): The state returned by `acquire` for this call.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if admitted == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open_locked(now, "probe failed")
+                else:
+                    self._state = CLOSED
+                    self._buckets.clear()
+                    self._calls = self._failures = 0
+                    logger.info(f"Circuit for {self.name} closed; probe succeeded")
+                return
+            if self._state != CLOSED:
+                return  # Started before the breaker opened; the outcome is stale
+
+            self._prune_locked(now)
+            second = int(now)
+            if not self._buckets or self._buckets[-1][0] != second:
+                self._buckets.append([second, 0, 0])
+            self._buckets[-1][1] += 1
+            self._buckets[-1][2] += failed
+            self._calls += 1
+            self._failures += failed
+            if (failed and self._calls >= self._min_calls
+                    and self._failures / self._calls >= self._failure_rate):
+                self._open_locked(now, f"{self._failures}/{self._calls} calls failed in {self._window:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the breaker state and its rolling counts.
+
+        Returns:
+            Dict[str, Any]: state, calls and failures in the window, error_rate, times opened,
+                            calls rejected, and seconds until the next probe when open.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune_locked(now)
+            state = self._state_locked(now)
+            return {
+                "state": state,
+                "calls": self._calls,
+                "failures": self._failures,
+                "error_rate": (self._failures / self._calls) if self._calls else 0.0,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+                "retry_in": max(0.0, self._open_seconds - (now - self._opened_at)) if state == OPEN else 0.0,
+            }
+
+
+class BreakerRegistry:
+    """Process-wide circuit breakers for the tools that call external services."""
+    def __init__(self, tools: Iterable[str] = CIRCUIT_BREAKER_TOOLS):
+        """
+        Initializes the BreakerRegistry.
+
+        Args:
+            tools (Iterable[str]): Names of the tools guarded by a breaker.
+        """
+        self._breakers = {name: CircuitBreaker(name) for name in tools}
+
+    def get(self, name: str) -> Optional[CircuitBreaker]:
+        """Returns a tool's breaker, or None if the tool has none."""
+        return self._breakers.get(name)
+
+    def wrap(self, name: str, func: Callable[..., str]) -> Callable[..., str]:
+        """
+        Guards a tool function with its breaker; tools without a breaker are returned unchanged.
+
+        ToolFailure results (including timeouts) count as failures.
+
+        Args:
+            name (str): Tool name as registered with the agent.
+            func (Callable[..., str]): The tool function.
+
+        Returns:
+            Callable[..., str]: The guarded function.
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            return func
+
+        @wraps(func)
+        def guarded(*args, **kwargs):
+            admitted = breaker.acquire()
+            if admitted is None:
+                return CircuitOpen(f"Error in {name}: the service is currently unavailable (circuit open after "
+                                   "repeated failures). Do not retry it now; answer without it or use another tool.")
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                breaker.record(True, admitted)
+                raise
+            breaker.record(isinstance(result, ToolFailure), admitted)
+            return result
+        return guarded
+
+    def is_open(self, name: str) -> bool:
+        """Returns True while a tool's breaker rejects calls and it should be hidden from the agent."""
+        breaker = self._breakers.get(name)
+        return breaker is not None and breaker.state == OPEN
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns per-tool breaker statistics."""
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
+
+
+_breaker_registry = BreakerRegistry()
+
+
+def get_breaker_registry() -> BreakerRegistry:
+    """Returns the process-wide circuit breaker registry."""
+    return _breaker_registry
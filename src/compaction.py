@@ -0,0 +1,244 @@
+# src/compaction.py
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from src.config import (
+    COMPACTION_TOKEN_BUDGET, COMPACTION_CHARS_PER_TOKEN, COMPACTION_STORE_MAX_BYTES, COMPACTION_EXPAND_MAX_TOKENS
+)
+from src.embeddings import HashedNgramEmbedder
+from src.utils import logger
+
+# Sentence ends, except after an initial such as the 'F.' in 'John F. Kennedy'.
+_SENTENCE_END = re.compile(r"(?<!\s[A-Z]\.)(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])|\n+")
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+# Small preference for earlier sentences, which tend to carry definitions and summaries.
+_POSITION_WEIGHT = 0.1
+
+_tokenizer = HashedNgramEmbedder()
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximates the LLM token count of a text from its length."""
+    return math.ceil(len(text) / COMPACTION_CHARS_PER_TOKEN)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Splits text into sentences and lines, dropping empty pieces."""
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence and sentence.strip()]
+
+
+def bm25_scores(query: str, sentences: List[str]) -> np.ndarray:
+    """
+    Scores sentences against a query with Okapi BM25, treating each sentence as a document.
+
+    Args:
+        query (str): The question the sentences should answer.
+        sentences (List[str]): Candidate sentences.
+
+    Returns:
+        np.ndarray: One float score per sentence; 0 when no query term occurs.
+    """
+    terms = list(dict.fromkeys(_tokenizer.tokenize(query)))
+    if not terms or not sentences:
+        return np.zeros(len(sentences))
+    column = {term: j for j, term in enumerate(terms)}
+    tf = np.zeros((len(sentences), len(terms)))
+    lengths = np.empty(len(sentences))
+    for i, sentence in enumerate(sentences):
+        tokens = _tokenizer.tokenize(sentence)
+        lengths[i] = len(tokens)
+        for token, count in Counter(tokens).items():
+            j = column.get(token)
+            if j is not None:
+                tf[i, j] = count
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(sentences) - df + 0.5) / (df + 0.5))
+    norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * lengths / max(lengths.mean(), 1.0))
+    return (tf * (_BM25_K1 + 1) / (tf + norm[:, None])) @ idf
+
+
+def summarize(query: str, text: str, budget_tokens: int) -> str:
+    """
+    Extracts the sentences most relevant to `query` that fit in `budget_tokens`.
+
+    Only sentences sharing a term with the query are kept (the leading sentences when
+    none do), so the extract may be much shorter than the budget. Sentences keep their
+    original order; '…' marks where text was left out.
+
+    Args:
+        query (str): The question guiding the selection.
+        text (str): Text to compact.
+        budget_tokens (int): Approximate token budget for the result.
+
+    Returns:
+        str: The extract.
+    """
+    sentences = split_sentences(text)
+    relevance = bm25_scores(query, sentences)
+    scores = relevance + _POSITION_WEIGHT * relevance.max(initial=1.0) / (1.0 + np.arange(len(sentences)))
+    candidates = np.flatnonzero(relevance > 0) if relevance.any() else np.arange(len(sentences))
+    budget_chars = budget_tokens * COMPACTION_CHARS_PER_TOKEN
+    chosen, used = [], 0
+    for i in candidates[np.argsort(-scores[candidates], kind="stable")]:
+        length = len(sentences[i]) + 1
+        if used + length > budget_chars:
+            continue
+        chosen.append(i)
+        used += length
+    if not chosen:  # A single sentence longer than the budget
+        return sentences[0][:budget_chars] + " …" if sentences else ""
+    chosen.sort()
+    parts, previous = [], -1
+    for i in chosen:
+        if i != previous + 1:
+            parts.append("…")
+        parts.append(sentences[i])
+        previous = i
+    if previous != len(sentences) - 1:
+        parts.append("…")
+    return " ".join(parts)
+
+
+class ObservationStore:
+    """
+    Keeps the full text of compacted observations so the agent can expand them.
+
+    Entries are keyed by content hash and evicted least recently used beyond a byte limit.
+    """
+    def __init__(self, max_bytes: int = COMPACTION_STORE_MAX_BYTES):
+        """
+        Initializes the ObservationStore.
+
+        Args:
+            max_bytes (int): Total size of stored observations.
+        """
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        """Stores a text and returns its id."""
+        observation_id = "obs_" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+        with self._lock:
+            if observation_id in self._entries:
+                self._entries.move_to_end(observation_id)
+                return observation_id
+            self._entries[observation_id] = text
+            self._bytes += len(text)
+            while self._bytes > self._max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return observation_id
+
+    def get(self, observation_id: str) -> Optional[str]:
+        """Returns a stored text, or None if it is unknown or was evicted."""
+        with self._lock:
+            text = self._entries.get(observation_id)
+            if text is not None:
+                self._entries.move_to_end(observation_id)
+            return text
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number and total size of stored observations."""
+        with self._lock:
+            return {"observations": len(self._entries), "bytes": self._bytes}
+
+
+class ObservationCompactor:
+    """
+    Shrinks long tool observations before they are appended to the agent scratchpad.
+
+    The ReAct prompt is resent on every iteration, so a long observation is paid for
+    on every later step. Observations over the token budget are replaced by an
+    extractive BM25 summary against the user's question; the full text stays in the
+    ObservationStore and the agent can fetch it with the expand_observation tool.
+    """
+    def __init__(self, budget_tokens: int = COMPACTION_TOKEN_BUDGET, store: Optional[ObservationStore] = None):
+        """
+        Initializes the ObservationCompactor.
+
+        Args:
+            budget_tokens (int): Approximate token budget per observation.
+            store (Optional[ObservationStore]): Where full observations are kept.
+        """
+        self.budget_tokens = budget_tokens
+        self.store = store or ObservationStore()
+        self._lock = threading.Lock()
+        self._observations = 0
+        self._compacted = 0
+        self._tokens_in = 0
+        self._tokens_out = 0
+
+    def compact(self, question: str, observation: str) -> str:
+        """
+        Returns the observation unchanged if it fits the budget, else a summary with a pointer to the full text.
+
+        Args:
+            question (str): The user's question.
+            observation (str): Tool output.
+
+        Returns:
+            str: The observation to put in the scratchpad.
+        """
+        tokens = estimate_tokens(observation)
+        if tokens <= self.budget_tokens:
+            with self._lock:
+                self._observations += 1
+                self._tokens_in += tokens
+                self._tokens_out += tokens
+            return observation
+        observation_id = self.store.put(observation)
+        note = (f"\n[Compacted from ~{tokens} tokens. For the full text use expand_observation "
+                f"with input '{observation_id}'.]")
+        compacted = summarize(question, observation, self.budget_tokens - estimate_tokens(note)) + note
+        with self._lock:
+            self._observations += 1
+            self._compacted += 1
+            self._tokens_in += tokens
+            self._tokens_out += estimate_tokens(compacted)
+        logger.info(f"Compacted observation {observation_id} from ~{tokens} to ~{estimate_tokens(compacted)} tokens")
+        return compacted
+
+    def expand(self, observation_id: str, query: str = "") -> str:
+        """
+        Returns a stored observation, focused on `query` when it exceeds COMPACTION_EXPAND_MAX_TOKENS.
+
+        Args:
+            observation_id (str): Id from a compacted observation.
+            query (str): Optional focus for very long texts.
+
+        Returns:
+            str: The full (or focused) text, or an error message.
+        """
+        text = self.store.get(observation_id.strip())
+        if text is None:
+            return f"Error: Unknown or expired observation '{observation_id}'."
+        if estimate_tokens(text) <= COMPACTION_EXPAND_MAX_TOKENS:
+            return text
+        return summarize(query or text[:200], text, COMPACTION_EXPAND_MAX_TOKENS)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns observation counts and estimated tokens per observation before and after compaction."""
+        with self._lock:
+            return {
+                "observations": self._observations,
+                "compacted": self._compacted,
+                "tokens_in": self._tokens_in,
+                "tokens_out": self._tokens_out,
+                "tokens_saved": self._tokens_in - self._tokens_out,
+            }
+
+
+_compactor = ObservationCompactor()
+
+
+def get_observation_compactor() -> ObservationCompactor:
+    """Returns the process-wide observation compactor."""
+    return _compactor
@@ -5,8 +5,40 @@ import os
 # --- LLM Configuration ---
 GEMINI_MODEL_NAME: str = "gemini-2.0-flash"
 # You might want to use "gemini-2.0-flash" for multimodal tasks, but gemini-pro is text-only.
+LLM_POOL_MAX_CLIENTS = 32  # Max shared Gemini clients (one channel each) per process
+LLM_POOL_IDLE_TIMEOUT = 900  # Seconds an unused pooled client is kept before eviction
+
+# --- LLM Completion Cache ---
+LLM_CACHE_ENABLED = True
+LLM_CACHE_SAMPLED = False  # Also cache sampled (temperature > 0) calls; deterministic calls are always cached
+LLM_CACHE_TTL = 3600  # Seconds a cached completion stays valid
+LLM_CACHE_MAX_ENTRIES = 512  # In-memory LRU tier
+LLM_CACHE_MAX_BYTES = 64 * 1024 * 1024  # On-disk SQLite tier, shared across worker processes
+LLM_CACHE_PATH = "cache/llm_cache.sqlite3"
+
+# --- Semantic Answer Cache ---
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.88  # Minimum cosine similarity between inputs to reuse an answer
+SEMANTIC_CACHE_CAPACITY = 2048  # Cached answers per process (LRU eviction beyond this)
+SEMANTIC_CACHE_DEFAULT_TTL = 86400  # Seconds for answers produced without tools
+SEMANTIC_CACHE_TOOL_TTLS = {  # Seconds per tool used; 0 means never cache such answers
+    "current_time": 30,
+    "weather": 600,
+    "currency_converter": 900,
+    "web_search": 3600,
+    "wikipedia": 7 * 86400,
+    "calculator": 0,
+    "csv_analyzer": 0,
+    "python_executor": 0,
+    "regex_matcher": 0,
+    "dataset_info": 0,
+    "dataset_query": 0,
+}
 
 # --- Agent Configuration ---
+AGENT_ENGINE = "react"  # Options: "react" (text ReAct loop), "tool_calling" (native Gemini function calling)
+AGENT_MAX_ITERATIONS = 7  # Limit tool usage to prevent infinite loops
+MAX_PARALLEL_TOOLS = 8  # Worker threads shared by all sessions for concurrent tool calls in one step
 AGENT_SYSTEM_PROMPT: str = """
 You are a highly capable AI assistant named Gemini Agent.
 You are designed to be helpful, friendly, and comprehensive.
@@ -17,6 +49,27 @@ If a question is a simple knowledge recall, you can answer directly.
 Maintain a consistent friendly tone.
 """
 
+# --- Observation Compaction ---
+COMPACTION_ENABLED = True  # Summarize long tool observations before they enter the agent scratchpad
+COMPACTION_TOKEN_BUDGET = 300  # Approximate tokens kept per observation
+COMPACTION_CHARS_PER_TOKEN = 4  # Characters per token used to estimate observation size
+COMPACTION_EXPAND_MAX_TOKENS = 2000  # Tokens returned by expand_observation; longer texts are summarized to this
+COMPACTION_STORE_MAX_BYTES = 16 * 1024 * 1024  # Full observations kept for expand_observation
+
+# --- Context Packing ---
+CONTEXT_PACKING_ENABLED = True  # Fit history and scratchpad into CONTEXT_MAX_TOKENS on every LLM call
+CONTEXT_MAX_TOKENS = 8000  # Prompt budget per LLM call
+CONTEXT_RECENT_TURNS = 3  # Latest conversation turns kept before relevance-ranked older ones
+CONTEXT_SUMMARY_TOKENS = 200  # Budget for the summary standing in for omitted turns
+CONTEXT_SCRATCHPAD_SHARE = 0.6  # Largest share of the free budget the agent scratchpad may take
+CONTEXT_EXACT_TOKEN_COUNTS = False  # Count with the model's tokenizer (one network call per new text); False estimates
+CONTEXT_TOKEN_CACHE_SIZE = 4096  # Distinct texts whose token counts are memoized
+
+# --- Fast Path (answers trivial prompts without the agent) ---
+FAST_PATH_ENABLED = True
+FAST_PATH_ASSUMED_AGENT_SECONDS = 4.0  # Agent latency assumed for "time saved" until agent runs are measured
+FAST_PATH_AGENT_SMOOTHING = 0.1  # Weight of each measured agent run in the moving average
+
 # --- Logging Configuration ---
 LOG_FILE: str = "logs/agent.log"
 LOG_LEVEL: str = "INFO" # DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -27,15 +80,116 @@ APP_ICON: str = "✨🤖" # E.g., "🤖", "🚀", "💬"
 
 
 # --- Enhanced Memory Configuration ---
-MEMORY_TYPE = "buffer"  # Options: "buffer", "window", "summary"
+MEMORY_TYPE = "buffer"  # Options: "buffer", "window", "summary", "recall"
 MEMORY_WINDOW_SIZE = 6  # For ConversationBufferWindowMemory
-MAX_TOKEN_LIMIT = 2000  # For ConversationSummaryBufferMemory
+SUMMARY_RECENT_TURNS = 4  # Turns "summary" memory keeps verbatim; older ones are folded into the running summary
+SUMMARY_FOLD_BATCH = 4  # Turns folded into the summary per LLM call
+SUMMARY_WORKERS = 2  # Background threads folding summaries for all sessions
+SUMMARY_MAX_TOKENS = 300  # Length of the running summary when folded without an LLM
+RECALL_TOP_K = 4  # Earlier turns "recall" memory retrieves by similarity to the new input
+RECALL_RECENT_TURNS = 3  # Latest turns "recall" memory always includes
+RECALL_MAX_TURNS = 10000  # Turns indexed per session; the oldest are overwritten beyond this
+RECALL_MIN_SIMILARITY = 0.15  # Cosine similarity an earlier turn needs to be recalled
+RECALL_EMBEDDING_DIM = 256  # Dimensions of the int8 turn embeddings
 
 # --- Tool Configuration ---
 TOOL_TIMEOUT = 10  # Seconds before tool times out
+TOOL_TIMEOUTS = {  # Per-tool overrides of TOOL_TIMEOUT, in seconds
+    "current_time": 2,
+    "calculator": 2,
+    "regex_matcher": 3,
+    "python_executor": 6,
+    "weather": 12,
+    "currency_converter": 12,
+    "csv_analyzer": 20,
+    "dataset_query": 20,
+}
+TOOL_RUNTIME_MAX_WORKERS = 16  # Worker threads executing tool calls
+TOOL_RUNTIME_MAX_ABANDONED = 8  # Stuck threads tolerated before new calls fail fast
+TOOL_CACHE_TTLS = {  # Seconds a web_search / wikipedia result is reused for the same query
+    "web_search": 900,
+    "wikipedia": 86400,
+}
+TOOL_CACHE_MAX_ENTRIES = 1024  # In-memory LRU tier
+TOOL_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Per tier
+TOOL_CACHE_PATH = "cache/tool_cache.sqlite3"  # On-disk tier; set to None for memory only
+CIRCUIT_BREAKER_TOOLS = ("weather", "currency_converter", "web_search", "wikipedia")  # Tools calling external services
+CIRCUIT_BREAKER_WINDOW = 60  # Seconds of calls the failure rate is computed over
+CIRCUIT_BREAKER_MIN_CALLS = 4  # Calls in the window before a breaker may open
+CIRCUIT_BREAKER_FAILURE_RATE = 0.5  # Failure rate that opens a breaker and hides the tool from the agent
+CIRCUIT_BREAKER_OPEN_SECONDS = 30  # Seconds a breaker stays open before a probe call is let through
+
+# --- Tool Metrics ---
+METRICS_LATENCY_MIN = 1e-5  # Seconds; faster calls share the first latency bucket
+METRICS_LATENCY_MAX = 300  # Seconds; slower calls share the last bucket
+METRICS_BUCKETS_PER_DOUBLING = 4  # Histogram resolution; percentiles are accurate to 2 ** (1 / 4), about 19%
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Serves /metrics and /metrics.json when set; 0 disables
+
+# --- Calculator ---
+CALC_MAX_EXPRESSION_LENGTH = 500  # Characters accepted by the calculator tool
+CALC_MAX_RESULT_DIGITS = 1000  # Largest integer result; powers and factorials are checked before computing
+CALC_MAX_VECTOR_LENGTH = 10_000  # Elements in one vector literal
+CALC_CACHE_SIZE = 1024  # Compiled expressions kept in the LRU cache
+
+# --- CSV Analysis ---
+CSV_CHUNK_ROWS = 100_000  # Rows parsed per chunk by the streaming analyzer
+CSV_QUANTILE_SAMPLE = 4096  # Values per column kept to approximate percentiles
+CSV_CATEGORY_MAX_DISTINCT = 1000  # Text columns with at most this many distinct values are inferred as categorical
+CSV_MEMORY_MAP = False  # Memory-map uploaded files; mapped pages are reclaimable but count toward RSS
+CSV_UPLOAD_DIR = "uploads"  # Uploaded files the csv_analyzer tool may read by name
+DATASET_MAX_BYTES = 512 * 1024 * 1024  # Memory for parsed uploaded datasets; least recently used are evicted
+DATASET_SESSION_MAX_BYTES = 128 * 1024 * 1024  # Share of DATASET_MAX_BYTES one session's datasets may hold
+DATASET_CACHE_DIR = "cache/datasets"  # Parquet copies of parsed datasets (needs pyarrow); None disables
+DATASET_MAX_RESULT_ROWS = 20  # Rows returned by the dataset_query tool
+
+# --- Regex Matching ---
+REGEX_CACHE_SIZE = 256  # Compiled patterns kept in the LRU cache
+REGEX_MAX_PATTERN_LENGTH = 1000  # Characters accepted in a pattern
+REGEX_MAX_MATCHES = 200  # Matches returned by the regex_matcher tool
+REGEX_TIME_BUDGET = 1.0  # Seconds for patterns that can backtrack catastrophically (run in the sandbox)
+REGEX_INPROCESS_MAX_CHARS = 10000  # Larger inputs always run on RE2 or in the sandbox; re backtracking is superlinear
+
+# --- Python Sandbox (python_executor tool) ---
+SANDBOX_POOL_SIZE = 4  # Warm worker processes
+SANDBOX_MAX_RUNS_PER_WORKER = 50  # Runs before a worker is replaced with a fresh process
+SANDBOX_WALL_TIMEOUT = 3  # Seconds per run
+SANDBOX_ACQUIRE_TIMEOUT = 2  # Seconds to wait for a free worker; with the run limit, below TOOL_TIMEOUTS["python_executor"]
+SANDBOX_CPU_SECONDS = 3  # CPU time per run (RLIMIT_CPU)
+SANDBOX_MEMORY_BYTES = 512 * 1024 * 1024  # Address space per worker (RLIMIT_AS)
+SANDBOX_MAX_OUTPUT = 10_000  # Characters of printed output returned to the agent
+
+# --- HTTP Client (weather and currency tools) ---
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5/weather")
+EXCHANGERATE_BASE_URL = os.getenv("EXCHANGERATE_BASE_URL", "https://v6.exchangerate-api.com/v6")
+HTTP_POOL_CONNECTIONS = 10  # Hosts with a kept-alive connection pool
+HTTP_POOL_MAXSIZE = TOOL_RUNTIME_MAX_WORKERS  # Keep-alive connections per host, sized to tool concurrency
+HTTP_PER_HOST_CONCURRENCY = 8  # Max in-flight requests per host
+HTTP_MAX_RETRIES = 2  # Retries for idempotent GETs on connection errors, timeouts, 429 and 5xx
+HTTP_BACKOFF_BASE = 0.25  # Seconds; doubled per retry, with jitter
+HTTP_BACKOFF_MAX = 2.0  # Upper bound for a single backoff delay
+HTTP_MIN_ATTEMPT_SECONDS = 1.0  # A retry needs this long left before the tool deadline, after its backoff
+
+# --- Exchange Rates ---
+FX_RATE_TTL = 3600  # Seconds a fetched rate table is used for conversions
+FX_REFRESH_AHEAD = 0.8  # Fraction of FX_RATE_TTL after which the table is refreshed in the background
+EXCHANGERATE_RECORDED_TABLE = os.getenv("EXCHANGERATE_RECORDED_TABLE")  # Recorded API response(s) for offline use
 
 # --- Session Management ---
-SESSION_EXPIRATION = 3600  # 1 hour session expiration (for persistent memory)
+SESSION_EXPIRATION = 3600  # Idle seconds before a session's agent is evicted and its persisted history expires
+SESSION_MEMORY_CEILING = 512 * 1024 * 1024  # Estimated agent state across all sessions of a worker; LRU eviction beyond this
+SESSION_BASE_BYTES = 2 * 1024 * 1024  # Estimated fixed cost of one session's agent (executor, prompt, tool wrappers)
+SESSION_SWEEP_INTERVAL = 30  # Seconds between sweeps for idle sessions
+SESSION_TRANSCRIPT_MAX_MESSAGES = 200  # Messages kept for display; older ones stay in the persistent history
+SESSION_METRICS_WINDOW = 500  # Response times kept per session for the performance charts
+SESSION_COOKIE = "galactic_session"  # Browser cookie holding the signed session token
+SESSION_SECRET = os.getenv("SESSION_SECRET")  # Key signing session tokens; shared by all workers of a deployment
+SESSION_SECRET_PATH = "cache/session_secret"  # Generated key used when SESSION_SECRET is unset
+PERSISTENT_BACKEND = os.getenv("PERSISTENT_BACKEND", "sqlite")  # "sqlite", "redis" or "none" (history lives only in the browser session)
+PERSISTENT_SQLITE_PATH = "cache/chat_history.sqlite3"  # Single-node store; WAL mode lets worker processes share it
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = 32  # Connection pool size shared by all sessions of a process
+REDIS_KEY_PREFIX = "chat_history:"  # Key prefix of the per-session message lists
 
 # --- New UI Settings ---
 ENABLE_MEMORY_MANAGEMENT = True
+ENABLE_STREAMING = True  # Stream reasoning steps and answer tokens into the chat bubble
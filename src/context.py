@@ -0,0 +1,218 @@
+# src/context.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from langchain_core.agents import AgentAction
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, get_buffer_string
+from src.compaction import bm25_scores, estimate_tokens, summarize
+from src.config import (
+    CONTEXT_MAX_TOKENS, CONTEXT_RECENT_TURNS, CONTEXT_SUMMARY_TOKENS, CONTEXT_SCRATCHPAD_SHARE,
+    CONTEXT_EXACT_TOKEN_COUNTS, CONTEXT_TOKEN_CACHE_SIZE
+)
+from src.utils import logger
+
+# Consecutive failed token-count calls after which a counter stops calling the model.
+_MAX_COUNT_FAILURES = 3
+
+
+class TokenCounter:
+    """
+    Counts tokens with the model's tokenizer, memoized per text.
+
+    Counting through the model (for Gemini, a count_tokens request) is exact but not
+    free, so each distinct text is counted once and kept in an LRU cache. If the model
+    cannot count, the character-based estimate is used instead.
+    """
+    def __init__(self, llm: Any = None, exact: bool = CONTEXT_EXACT_TOKEN_COUNTS,
+                 cache_size: int = CONTEXT_TOKEN_CACHE_SIZE):
+        """
+        Initializes the TokenCounter.
+
+        Args:
+            llm (Any): Model providing `get_num_tokens`; None uses the estimate.
+            exact (bool): Ask the model for counts; False always uses the estimate.
+            cache_size (int): Distinct texts whose counts are kept.
+        """
+        self._count_tokens = getattr(llm, "get_num_tokens", None) if exact else None
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._failures = 0
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        """Returns the token count of `text`."""
+        if not text:
+            return 0
+        if self._count_tokens is None:
+            return estimate_tokens(text)
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+        try:
+            tokens = self._count_tokens(text)
+            self._failures = 0
+        except Exception as e:
+            self._failures += 1
+            if self._failures >= _MAX_COUNT_FAILURES:
+                logger.warning(f"Token counting failed {self._failures} times ({e}); using estimates from now on")
+                self._count_tokens = None
+            return estimate_tokens(text)
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+
+def _step_text(action: AgentAction, observation: Any) -> str:
+    return f"{action.log}\nObservation: {observation}\n"
+
+
+class ContextPacker:
+    """
+    Assembles each agent prompt within a token budget.
+
+    The fixed part (system prompt, tool descriptions, format instructions) and the
+    question are always sent. The remaining budget goes first to the scratchpad, up to
+    CONTEXT_SCRATCHPAD_SHARE of it; older observations are summarized when the
+    scratchpad does not fit. History gets the rest: the most recent turns, then the
+    turns most relevant to the question, in chronological order, with a short
+    extractive summary standing in for the turns left out. The result depends only on
+    the inputs, so identical inputs produce identical prompts.
+    """
+    def __init__(self, counter: TokenCounter, fixed_text: str, max_tokens: int = CONTEXT_MAX_TOKENS,
+                 as_messages: bool = False, recent_turns: int = CONTEXT_RECENT_TURNS,
+                 summary_tokens: int = CONTEXT_SUMMARY_TOKENS, scratchpad_share: float = CONTEXT_SCRATCHPAD_SHARE):
+        """
+        Initializes the ContextPacker.
+
+        Args:
+            counter (TokenCounter): Token counter for the model.
+            fixed_text (str): Prompt text sent on every call (system prompt and tool descriptions).
+            max_tokens (int): Prompt budget per LLM call.
+            as_messages (bool): Return history as messages (chat prompts) instead of a transcript string.
+            recent_turns (int): Latest turns kept before relevance-ranked ones.
+            summary_tokens (int): Budget for the summary of omitted turns.
+            scratchpad_share (float): Largest share of the free budget the scratchpad may use.
+        """
+        self._counter = counter
+        self._fixed_text = fixed_text
+        self._fixed_tokens: Optional[int] = None  # Counted on the first call, never while the agent is built
+        self._max_tokens = max_tokens
+        self._as_messages = as_messages
+        self._recent_turns = recent_turns
+        self._summary_tokens = summary_tokens
+        self._scratchpad_share = scratchpad_share
+        self.last_tokens: Dict[str, int] = {}
+
+    def _pack_steps(self, steps: List[Tuple[AgentAction, Any]], question: str, budget: int) -> Tuple[list, int]:
+        costs = [self._counter.count(_step_text(action, observation)) for action, observation in steps]
+        total = sum(costs)
+        packed = list(steps)
+        # Shrink observations from the oldest; the latest one is what the model is reacting to.
+        for i in range(len(packed) - 1):
+            if total <= budget:
+                break
+            action, observation = packed[i]
+            shorter = summarize(question, str(observation), max(self._summary_tokens // 2, 1))
+            packed[i] = (action, shorter)
+            cost = self._counter.count(_step_text(action, shorter))
+            total += cost - costs[i]
+            costs[i] = cost
+        return packed, total
+
+    @staticmethod
+    def _turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+        turns: List[List[BaseMessage]] = []
+        for message in messages:
+            if not turns or isinstance(message, (HumanMessage, SystemMessage)):
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def _pack_history(self, history: Union[str, List[BaseMessage], None], question: str,
+                      budget: int) -> Tuple[Union[str, List[BaseMessage]], int, int]:
+        if isinstance(history, str):
+            history = [SystemMessage(content=history)] if history else []
+        turns = self._turns(list(history or []))
+        if not turns:
+            return ([] if self._as_messages else ""), 0, 0
+        texts = [get_buffer_string(turn) for turn in turns]
+        costs = [self._counter.count(text) for text in texts]
+
+        if sum(costs) <= budget:
+            chosen = list(range(len(turns)))
+        else:
+            budget -= self._summary_tokens
+            # Running summaries from a summary memory are pinned; then the latest turns; then by relevance.
+            pinned = [i for i, turn in enumerate(turns) if isinstance(turn[0], SystemMessage)]
+            recent = list(range(len(turns) - 1, -1, -1))[:self._recent_turns]
+            relevance = bm25_scores(question, texts)
+            ranked = [int(i) for i in np.argsort(-relevance, kind="stable") if relevance[i] > 0]
+            chosen, used = [], 0
+            for i in dict.fromkeys(pinned + recent + ranked):
+                if used + costs[i] <= budget:
+                    chosen.append(i)
+                    used += costs[i]
+            chosen.sort()
+
+        kept = set(chosen)
+        omitted = [texts[i] for i in range(len(turns)) if i not in kept]
+        messages = [message for i in chosen for message in turns[i]]
+        if omitted:
+            summary = summarize(question, "\n".join(omitted), self._summary_tokens)
+            messages.insert(0, SystemMessage(content=f"Summary of {len(omitted)} earlier turns: {summary}"))
+        tokens = sum(costs[i] for i in chosen) + (self._counter.count(messages[0].content) if omitted else 0)
+        return (messages if self._as_messages else get_buffer_string(messages)), tokens, len(omitted)
+
+    def pack(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fits chat history and intermediate steps into the budget.
+
+        Args:
+            inputs (Dict[str, Any]): Agent inputs with 'input', 'chat_history' and 'intermediate_steps'.
+
+        Returns:
+            Dict[str, Any]: The inputs with packed 'chat_history' and 'intermediate_steps'.
+        """
+        question = str(inputs.get("input", ""))
+        if self._fixed_tokens is None:
+            self._fixed_tokens = self._counter.count(self._fixed_text)
+        available = max(0, self._max_tokens - self._fixed_tokens - self._counter.count(question))
+        steps, step_tokens = self._pack_steps(list(inputs.get("intermediate_steps", [])), question,
+                                              int(available * self._scratchpad_share))
+        history, history_tokens, omitted = self._pack_history(inputs.get("chat_history"), question,
+                                                              available - step_tokens)
+        self.last_tokens = {
+            "fixed": self._fixed_tokens,
+            "history": history_tokens,
+            "scratchpad": step_tokens,
+            "total": self._fixed_tokens + history_tokens + step_tokens + self._counter.count(question),
+            "omitted_turns": omitted,
+        }
+        return {**inputs, "chat_history": history, "intermediate_steps": steps}
+
+
+# Keyed by id(llm); the model is stored alongside so its id cannot be reused while cached.
+_counters: Dict[int, Tuple[Any, TokenCounter]] = {}
+_counters_lock = threading.Lock()
+
+
+def get_token_counter(llm: Any) -> TokenCounter:
+    """Returns the token counter shared by every agent using `llm`, so counts are memoized across sessions."""
+    with _counters_lock:
+        entry = _counters.get(id(llm))
+        if entry is None:
+            entry = _counters[id(llm)] = (llm, TokenCounter(llm))
+        return entry[1]
@@ -0,0 +1,252 @@
+# src/csv_stream.py
+
+import io
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Set, Union
+import numpy as np
+import pandas as pd
+from src.config import (
+    CSV_CHUNK_ROWS, CSV_QUANTILE_SAMPLE, CSV_CATEGORY_MAX_DISTINCT, CSV_UPLOAD_DIR, CSV_MEMORY_MAP
+)
+
+_INT_TYPES = (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32, np.int64)
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max accumulated chunk by chunk.
+
+    Chunks are combined with Chan et al.'s parallel update, so two accumulators built
+    over different parts of a file can be merged into the exact full-file statistics.
+    """
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """Adds a chunk of non-null values."""
+        if values.size == 0:
+            return
+        chunk = RunningStats()
+        chunk.count = int(values.size)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        self.merge(chunk)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Folds another accumulator into this one."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation, as reported by pandas' describe()."""
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else float("nan")
+
+
+class QuantileSketch:
+    """
+    Uniform bottom-k sample used to approximate quantiles in bounded memory.
+
+    Each value gets a random priority and the k lowest priorities are kept, which is a
+    uniform sample of everything seen so far; sketches are merged by the same rule.
+    """
+    def __init__(self, size: int = CSV_QUANTILE_SAMPLE, seed: Optional[int] = None):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._values = np.empty(0, dtype=np.float64)
+        self._priorities = np.empty(0, dtype=np.float64)
+        self.seen = 0
+
+    def _keep_lowest(self, values: np.ndarray, priorities: np.ndarray) -> None:
+        if values.size > self.size:
+            keep = np.argpartition(priorities, self.size - 1)[:self.size]
+            values, priorities = values[keep], priorities[keep]
+        self._values, self._priorities = values, priorities
+
+    def update(self, values: np.ndarray) -> None:
+        """Adds a chunk of non-null values."""
+        if values.size == 0:
+            return
+        self.seen += int(values.size)
+        self._keep_lowest(np.concatenate([self._values, values.astype(np.float64, copy=False)]),
+                          np.concatenate([self._priorities, self._rng.random(values.size)]))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Folds another sketch into this one."""
+        self.seen += other.seen
+        self._keep_lowest(np.concatenate([self._values, other._values]),
+                          np.concatenate([self._priorities, other._priorities]))
+
+    @property
+    def exact(self) -> bool:
+        """True while every value seen is still in the sample."""
+        return self.seen <= self.size
+
+    def quantile(self, q: float) -> float:
+        return float(np.quantile(self._values, q)) if self._values.size else float("nan")
+
+
+@dataclass
+class ColumnProfile:
+    """Streaming summary of one CSV column."""
+    name: str
+    nulls: int = 0
+    non_null: int = 0
+    numeric: bool = True
+    integral: bool = True
+    stats: RunningStats = field(default_factory=RunningStats)
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+    distinct: Optional[Set[str]] = field(default_factory=set)
+
+    def update(self, series: pd.Series) -> None:
+        self.nulls += int(series.isna().sum())
+        values = series.dropna()
+        self.non_null += int(values.size)
+        if self.numeric and (pd.api.types.is_bool_dtype(values) or not pd.api.types.is_numeric_dtype(values)):
+            # A non-numeric value anywhere makes this a text column.
+            self.numeric = False
+            self.stats, self.sketch = RunningStats(), QuantileSketch()
+        if self.numeric:
+            self.integral = self.integral and pd.api.types.is_integer_dtype(series)
+            array = values.to_numpy(dtype=np.float64)
+            self.stats.update(array)
+            self.sketch.update(array)
+        if self.distinct is not None:
+            # Decides category vs object for text columns. Numeric chunks count too: a later
+            # chunk can still turn the column into text, and its earlier values must be included.
+            self.distinct.update(map(str, values.unique()))
+            if len(self.distinct) > CSV_CATEGORY_MAX_DISTINCT:
+                self.distinct = None
+
+    @property
+    def compact_dtype(self) -> str:
+        """Smallest dtype that holds the column: a downcast int, float64, category or object."""
+        if self.numeric and self.stats.count:
+            if self.integral and not self.nulls:
+                for dtype in _INT_TYPES:
+                    info = np.iinfo(dtype)
+                    if info.min <= self.stats.min and self.stats.max <= info.max:
+                        return np.dtype(dtype).name
+            return "float64"
+        if not self.numeric and self.distinct is not None and len(self.distinct) * 2 <= self.non_null:
+            return "category"
+        return "object"
+
+
+@dataclass
+class CSVProfile:
+    """Result of a streaming pass over a CSV."""
+    rows: int = 0
+    chunks: int = 0
+    columns: Dict[str, ColumnProfile] = field(default_factory=dict)
+
+    def compact_dtypes(self) -> Dict[str, str]:
+        """Dtype mapping that can be passed to pandas.read_csv to load the file compactly."""
+        return {name: column.compact_dtype for name, column in self.columns.items()}
+
+
+def resolve_upload_path(value: str, upload_dir: str = CSV_UPLOAD_DIR) -> Optional[str]:
+    """
+    Returns the absolute path if `value` names an existing file inside the upload directory.
+
+    Paths outside the upload directory are never resolved, so the agent cannot read arbitrary files.
+    """
+    candidate = value.strip().strip("'\"")
+    if not candidate or "\n" in candidate or len(candidate) > 1024:
+        return None
+    root = os.path.realpath(upload_dir)
+    path = os.path.realpath(candidate if os.path.isabs(candidate) else os.path.join(root, os.path.basename(candidate)))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+
+def iter_csv_chunks(source: Union[str, io.TextIOBase], chunk_rows: int = CSV_CHUNK_ROWS,
+                    memory_map: bool = CSV_MEMORY_MAP, **read_csv_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Yields DataFrame chunks from a file path or an open text buffer.
+
+    Args:
+        source (Union[str, io.TextIOBase]): Path to a CSV file, or a text buffer.
+        chunk_rows (int): Rows per chunk.
+        memory_map (bool): Map a file path into memory instead of reading it through a buffer.
+
+    Returns:
+        Iterator[pd.DataFrame]: The chunks, in file order.
+    """
+    if isinstance(source, str):
+        read_csv_kwargs["memory_map"] = memory_map
+    with pd.read_csv(source, chunksize=chunk_rows, **read_csv_kwargs) as reader:
+        yield from reader
+
+
+def profile_csv(source: Union[str, io.TextIOBase], chunk_rows: int = CSV_CHUNK_ROWS,
+                memory_map: bool = CSV_MEMORY_MAP) -> CSVProfile:
+    """
+    Computes per-column statistics in one streaming pass.
+
+    Memory use is bounded by the chunk size and the quantile sample, not the file size.
+
+    Args:
+        source (Union[str, io.TextIOBase]): Path to a CSV file, or a text buffer.
+        chunk_rows (int): Rows per chunk.
+        memory_map (bool): Map a file path into memory instead of reading it through a buffer.
+
+    Returns:
+        CSVProfile: Row count and column profiles.
+    """
+    profile = CSVProfile()
+    for chunk in iter_csv_chunks(source, chunk_rows, memory_map):
+        profile.rows += len(chunk)
+        profile.chunks += 1
+        for name in chunk.columns:
+            column = profile.columns.get(name)
+            if column is None:
+                column = profile.columns[name] = ColumnProfile(str(name))
+            column.update(chunk[name])
+    return profile
+
+
+def format_profile(profile: CSVProfile) -> str:
+    """
+    Renders a profile as a describe()-style table plus inferred dtypes.
+
+    Args:
+        profile (CSVProfile): The profile to render.
+
+    Returns:
+        str: Text for the agent.
+    """
+    numeric = [c for c in profile.columns.values() if c.numeric and c.stats.count]
+    table = pd.DataFrame({
+        c.name: {
+            "count": c.stats.count, "mean": c.stats.mean, "std": c.stats.std, "min": c.stats.min,
+            "25%": c.sketch.quantile(0.25), "50%": c.sketch.quantile(0.5), "75%": c.sketch.quantile(0.75),
+            "max": c.stats.max,
+        } for c in numeric
+    })
+    dtypes = ", ".join(
+        f"{c.name}: {c.compact_dtype}" + (f" ({len(c.distinct)} values)" if c.compact_dtype == "category" else "")
+        for c in profile.columns.values()
+    )
+    lines = [f"CSV Analysis ({profile.rows} rows, {len(profile.columns)} columns):", "", table.to_string()]
+    if not all(c.sketch.exact for c in numeric):
+        lines += ["", f"Percentiles are approximate (uniform sample of {CSV_QUANTILE_SAMPLE} values per column)."]
+    lines += ["", f"Inferred dtypes: {dtypes}"]
+    return "\n".join(lines)
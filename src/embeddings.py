@@ -0,0 +1,75 @@
+# src/embeddings.py
+
+import re
+import zlib
+from typing import Iterable, List
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "what", "whats", "s", "of", "for", "to", "in",
+    "on", "at", "me", "please", "can", "you", "tell", "now", "right", "current", "currently",
+    "i", "do", "does", "it", "its", "and", "how", "much", "many", "who", "where", "when",
+    "about", "like", "today", "give", "show", "there", "be", "my", "were",
+})
+
+
+class HashedNgramEmbedder:
+    """
+    Local, CPU-only text embedding based on hashed word and character n-grams.
+
+    Features are hashed into a fixed-size vector with a sign bit (the "hashing trick"),
+    so no vocabulary or model download is needed and embedding is deterministic across
+    processes. Vectors are L2-normalized, making dot products cosine similarities.
+    """
+    def __init__(self, dim: int = 512, char_ngrams: Iterable[int] = (3, 4)):
+        """
+        Initializes the HashedNgramEmbedder.
+
+        Args:
+            dim (int): Embedding dimensionality.
+            char_ngrams (Iterable[int]): Character n-gram sizes taken from each word.
+        """
+        self.dim = dim
+        self._char_ngrams = tuple(char_ngrams)
+
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercases text and returns its content words."""
+        words = _TOKEN_PATTERN.findall(text.lower().replace("'", ""))
+        content = [word for word in words if word not in _STOPWORDS]
+        return content or words
+
+    def _features(self, text: str) -> List[str]:
+        words = self.tokenize(text)
+        features = [f"w:{word}" for word in words]
+        for word in words:
+            padded = f"<{word}>"
+            for n in self._char_ngrams:
+                features.extend(f"c:{padded[i:i + n]}" for i in range(max(1, len(padded) - n + 1)))
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embeds a single text.
+
+        Args:
+            text (str): Input text.
+
+        Returns:
+            np.ndarray: L2-normalized float32 vector of shape (dim,).
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            # Word features carry more weight than the character n-grams they overlap with.
+            weight = 2.0 if feature.startswith("w:") else 1.0
+            vector[h % self.dim] += weight if (h >> 31) & 1 else -weight
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        """Embeds several texts into a (n, dim) float32 matrix."""
+        rows = [self.embed(text) for text in texts]
+        return np.vstack(rows) if rows else np.zeros((0, self.dim), dtype=np.float32)
@@ -0,0 +1,224 @@
+# src/fx_rates.py
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from src.config import FX_RATE_TTL, FX_REFRESH_AHEAD, EXCHANGERATE_BASE_URL, EXCHANGERATE_RECORDED_TABLE
+from src.http_client import get_http_client
+from src.utils import logger
+
+
+class RateTableError(Exception):
+    """Raised when exchange rates cannot be fetched or a currency is unknown."""
+
+
+@dataclass
+class RateTable:
+    """Exchange rates from one base currency, as returned by ExchangeRate-API."""
+    base: str
+    rates: Dict[str, float]
+    fetched_at: float
+
+
+def fetch_rate_table(base: str) -> Dict[str, float]:
+    """
+    Fetches the latest rate table for a base currency from ExchangeRate-API.
+
+    Args:
+        base (str): Base currency code (e.g., 'USD').
+
+    Returns:
+        Dict[str, float]: Conversion rates keyed by currency code.
+
+    Raises:
+        RateTableError: If the API key is missing or the API reports an error.
+    """
+    api_key = os.getenv("EXCHANGERATE_API_KEY")
+    if not api_key:
+        raise RateTableError("ExchangeRate-API key not configured. Please set EXCHANGERATE_API_KEY in .env.")
+    response = get_http_client().get(f"{EXCHANGERATE_BASE_URL}/{api_key}/latest/{base}", timeout=5)
+    response.raise_for_status()
+    data = response.json()
+    if data.get("result") != "success":
+        raise RateTableError(f"Could not retrieve rates for {base}. {data.get('error-type', 'Unknown error')}")
+    return data["conversion_rates"]
+
+
+def load_recorded_tables(path: str) -> List[dict]:
+    """
+    Reads recorded ExchangeRate-API responses (one object or a list of them) from a JSON file.
+
+    Args:
+        path (str): Path to the recording.
+
+    Returns:
+        List[dict]: The recorded responses.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+class RateTableCache:
+    """
+    Caches whole rate tables per base currency and derives cross rates locally.
+
+    A conversion is answered from any fresh cached table: directly from the source
+    currency's table, inverted from the target currency's table, or as a cross rate
+    through a third base that lists both. Tables nearing expiry are refreshed in the
+    background so lookups rarely wait on the network.
+    """
+    def __init__(self,
+                 fetcher: Callable[[str], Dict[str, float]] = fetch_rate_table,
+                 ttl: float = FX_RATE_TTL,
+                 refresh_ahead: float = FX_REFRESH_AHEAD):
+        """
+        Initializes the RateTableCache.
+
+        Args:
+            fetcher (Callable[[str], Dict[str, float]]): Fetches the rate table for a base currency.
+            ttl (float): Seconds a table stays valid.
+            refresh_ahead (float): Fraction of the TTL after which a background refresh starts.
+        """
+        self._fetcher = fetcher
+        self._ttl = ttl
+        self._refresh_after = ttl * refresh_ahead
+        self._tables: Dict[str, RateTable] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._refreshing: set = set()
+        self._stats = {"direct_hits": 0, "inverse_hits": 0, "cross_hits": 0, "misses": 0, "fetches": 0,
+                       "background_refreshes": 0, "fetch_errors": 0}
+
+    def load_table(self, base: str, rates: Dict[str, float], fetched_at: Optional[float] = None) -> None:
+        """Stores a rate table, e.g. from a recording."""
+        base = base.upper()
+        with self._lock:
+            self._tables[base] = RateTable(base, dict(rates), time.time() if fetched_at is None else fetched_at)
+
+    def load_recorded(self, path: str) -> None:
+        """Loads recorded ExchangeRate-API responses; recorded tables never expire."""
+        for response in load_recorded_tables(path):
+            self.load_table(response["base_code"], response["conversion_rates"], fetched_at=float("inf"))
+        logger.info(f"Loaded recorded exchange rates from {path}")
+
+    def _lookup_locked(self, source: str, target: str, now: float) -> Optional[tuple]:
+        fresh = {base: table for base, table in self._tables.items() if now - table.fetched_at < self._ttl}
+        table = fresh.get(source)
+        if table is not None:
+            if target not in table.rates:
+                raise RateTableError(f"Invalid target currency '{target}'. "
+                                     f"Supported currencies: {', '.join(table.rates.keys())}")
+            return table.rates[target], table, "direct_hits"
+        table = fresh.get(target)
+        if table is not None and table.rates.get(source):
+            return 1.0 / table.rates[source], table, "inverse_hits"
+        for table in fresh.values():
+            if table.rates.get(source) and target in table.rates:
+                return table.rates[target] / table.rates[source], table, "cross_hits"
+        return None
+
+    def _fetch(self, base: str) -> None:
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(base, threading.Lock())
+        with fetch_lock:
+            # Another caller may have fetched this base while we waited.
+            with self._lock:
+                table = self._tables.get(base)
+                if table is not None and time.time() - table.fetched_at < self._refresh_after:
+                    return
+            try:
+                rates = self._fetcher(base)
+            except Exception:
+                with self._lock:
+                    self._stats["fetch_errors"] += 1
+                raise
+            self.load_table(base, rates)
+            with self._lock:
+                self._stats["fetches"] += 1
+
+    def _refresh_in_background(self, base: str) -> None:
+        def refresh():
+            try:
+                self._fetch(base)
+                with self._lock:
+                    self._stats["background_refreshes"] += 1
+            except Exception as e:
+                logger.warning(f"Background refresh of {base} rates failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(base)
+
+        with self._lock:
+            if base in self._refreshing:
+                return
+            self._refreshing.add(base)
+        threading.Thread(target=refresh, name=f"fx-refresh-{base}", daemon=True).start()
+
+    def get_rate(self, source: str, target: str) -> float:
+        """
+        Returns the rate to convert `source` into `target`, fetching a table only if none fits.
+
+        Args:
+            source (str): Source currency code.
+            target (str): Target currency code.
+
+        Returns:
+            float: Units of `target` per unit of `source`.
+
+        Raises:
+            RateTableError: If rates cannot be fetched or a currency is unknown.
+        """
+        source, target = source.strip().upper(), target.strip().upper()
+        if source == target:
+            return 1.0
+        now = time.time()
+        with self._lock:
+            found = self._lookup_locked(source, target, now)
+        if found is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            self._fetch(source)
+            with self._lock:
+                found = self._lookup_locked(source, target, time.time())
+            if found is None:
+                raise RateTableError(f"No exchange rate available from {source} to {target}.")
+
+        rate, table, kind = found
+        with self._lock:
+            self._stats[kind] += 1
+        if now - table.fetched_at > self._refresh_after:
+            self._refresh_in_background(table.base)
+        return rate
+
+    def stats(self) -> Dict[str, int]:
+        """Returns cached bases and counters for local hits, misses, fetches and refreshes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_bases"] = len(self._tables)
+        local = stats["direct_hits"] + stats["inverse_hits"] + stats["cross_hits"]
+        stats["network_free_rate"] = ((local - stats["misses"]) / local) if local else 0.0
+        return stats
+
+
+_rate_cache: Optional[RateTableCache] = None
+_rate_cache_lock = threading.Lock()
+
+
+def get_rate_cache() -> RateTableCache:
+    """
+    Returns the process-wide rate table cache.
+
+    If EXCHANGERATE_RECORDED_TABLE points to a recorded API response, the cache is
+    seeded from it and works without network access.
+    """
+    global _rate_cache
+    with _rate_cache_lock:
+        if _rate_cache is None:
+            _rate_cache = RateTableCache()
+            if EXCHANGERATE_RECORDED_TABLE:
+                _rate_cache.load_recorded(EXCHANGERATE_RECORDED_TABLE)
+        return _rate_cache
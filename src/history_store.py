@@ -0,0 +1,249 @@
+# src/history_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from src.config import (
+    PERSISTENT_BACKEND, PERSISTENT_SQLITE_PATH, REDIS_URL, REDIS_MAX_CONNECTIONS, REDIS_KEY_PREFIX,
+    SESSION_EXPIRATION
+)
+from src.utils import logger
+
+# Writes between sweeps of expired sessions from the SQLite store.
+_PURGE_EVERY = 200
+
+
+def _dumps(message: BaseMessage) -> str:
+    return json.dumps(message_to_dict(message), ensure_ascii=False)
+
+
+def _loads(rows: Sequence[Any]) -> List[BaseMessage]:
+    return messages_from_dict([json.loads(row) for row in rows])
+
+
+class SQLiteHistoryStore:
+    """
+    Chat messages of all sessions in one SQLite file (WAL mode), shared by every process that opens it.
+
+    Each session has an expiry that is pushed back on every append; expired sessions
+    read as empty and are deleted periodically.
+    """
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS messages ("
+        "id INTEGER PRIMARY KEY, session_id TEXT NOT NULL, message TEXT NOT NULL);"
+        "CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);"
+        "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, expires_at REAL)"
+    )
+
+    def __init__(self, path: str = PERSISTENT_SQLITE_PATH):
+        """
+        Initializes the SQLiteHistoryStore.
+
+        Args:
+            path (str): Database file path; parent directories are created.
+        """
+        self._path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads, so keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, messages: Sequence[BaseMessage], ttl: Optional[float]) -> None:
+        """Appends messages to a session in one transaction and renews its expiry."""
+        conn = self._connect()
+        expires_at = (time.time() + ttl) if ttl else None
+        rows = [(session_id, _dumps(message)) for message in messages]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO messages (session_id, message) VALUES (?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO sessions (session_id, expires_at) VALUES (?, ?)",
+                         (session_id, expires_at))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._write_lock:
+            self._writes += 1
+            should_purge = self._writes % _PURGE_EVERY == 0
+        if should_purge:
+            self.purge_expired()
+
+    def load(self, session_id: str) -> List[BaseMessage]:
+        """Returns a session's messages in order; empty if it is unknown or expired."""
+        conn = self._connect()
+        row = conn.execute("SELECT expires_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return []
+        if row[0] is not None and row[0] < time.time():
+            self.delete(session_id)
+            return []
+        rows = conn.execute("SELECT message FROM messages WHERE session_id = ? ORDER BY id", (session_id,))
+        return _loads([message for message, in rows])
+
+    def delete(self, session_id: str) -> None:
+        """Removes a session and its messages."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.execute("COMMIT")
+
+    def purge_expired(self) -> int:
+        """
+        Deletes all expired sessions.
+
+        Returns:
+            int: Number of removed sessions.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM messages WHERE session_id IN "
+                     "(SELECT session_id FROM sessions WHERE expires_at IS NOT NULL AND expires_at < ?)", (now,))
+        removed = conn.execute("DELETE FROM sessions WHERE expires_at IS NOT NULL AND expires_at < ?",
+                               (now,)).rowcount
+        conn.execute("COMMIT")
+        if removed:
+            logger.debug(f"Purged {removed} expired sessions from {self._path}")
+        return removed
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """Chat history of one session in a SQLiteHistoryStore."""
+    def __init__(self, session_id: str, store: SQLiteHistoryStore, ttl: Optional[float] = SESSION_EXPIRATION):
+        """
+        Initializes the SQLiteChatMessageHistory.
+
+        Args:
+            session_id (str): Session identifier.
+            store (SQLiteHistoryStore): Shared store.
+            ttl (Optional[float]): Seconds the session is kept after its last append; None keeps it forever.
+        """
+        self.session_id = session_id
+        self._store = store
+        self._ttl = ttl
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self._store.load(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self._store.append(self.session_id, messages, self._ttl)
+
+    def clear(self) -> None:
+        self._store.delete(self.session_id)
+
+
+class PooledRedisChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat history of one session in a Redis list.
+
+    Clients share a connection pool per URL instead of connecting per history, and
+    an append is a single pipelined round trip (RPUSH of all messages plus EXPIRE).
+    """
+    def __init__(self, session_id: str, client: Any, ttl: Optional[float] = SESSION_EXPIRATION,
+                 key_prefix: str = REDIS_KEY_PREFIX):
+        """
+        Initializes the PooledRedisChatMessageHistory.
+
+        Args:
+            session_id (str): Session identifier.
+            client (Any): redis.Redis client (or a compatible stand-in).
+            ttl (Optional[float]): Seconds the session is kept after its last append; None keeps it forever.
+            key_prefix (str): Prefix of the list key.
+        """
+        self.session_id = session_id
+        self._client = client
+        self._ttl = ttl
+        self._key = f"{key_prefix}{session_id}"
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return _loads(self._client.lrange(self._key, 0, -1))
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        if not messages:
+            return
+        pipe = self._client.pipeline(transaction=False)
+        pipe.rpush(self._key, *[_dumps(message) for message in messages])
+        if self._ttl:
+            pipe.expire(self._key, int(self._ttl))
+        pipe.execute()
+
+    def clear(self) -> None:
+        self._client.delete(self._key)
+
+
+_sqlite_stores: Dict[str, SQLiteHistoryStore] = {}
+_redis_clients: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+
+
+def get_sqlite_store(path: str = PERSISTENT_SQLITE_PATH) -> SQLiteHistoryStore:
+    """Returns the process-wide history store for a SQLite file."""
+    with _stores_lock:
+        store = _sqlite_stores.get(path)
+        if store is None:
+            store = _sqlite_stores[path] = SQLiteHistoryStore(path)
+        return store
+
+
+def get_redis_client(url: str = REDIS_URL) -> Optional[Any]:
+    """
+    Returns a Redis client backed by the process-wide connection pool for `url`.
+
+    Returns:
+        Optional[Any]: The client, or None if the server cannot be reached.
+    """
+    with _stores_lock:
+        if url in _redis_clients:
+            return _redis_clients[url]
+        import redis
+        pool = redis.ConnectionPool.from_url(url, max_connections=REDIS_MAX_CONNECTIONS, decode_responses=True)
+        client = redis.Redis(connection_pool=pool)
+        try:
+            client.ping()
+        except Exception as e:
+            logger.error(f"Redis at {url} is unavailable ({e}); chat history will not be persisted")
+            client = None
+        _redis_clients[url] = client
+        return client
+
+
+def get_chat_history(session_id: str, backend: str = PERSISTENT_BACKEND,
+                     ttl: Optional[float] = SESSION_EXPIRATION) -> Optional[BaseChatMessageHistory]:
+    """
+    Returns the persistent chat history of a session.
+
+    Args:
+        session_id (str): Session identifier.
+        backend (str): 'sqlite', 'redis' or 'none'.
+        ttl (Optional[float]): Seconds a session is kept after its last message.
+
+    Returns:
+        Optional[BaseChatMessageHistory]: The history, or None if persistence is off or unavailable.
+    """
+    if backend == "sqlite":
+        return SQLiteChatMessageHistory(session_id, get_sqlite_store(), ttl)
+    if backend == "redis":
+        client = get_redis_client()
+        return PooledRedisChatMessageHistory(session_id, client, ttl) if client is not None else None
+    return None
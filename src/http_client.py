@@ -0,0 +1,184 @@
+# src/http_client.py
+
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from src.config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX, HTTP_PER_HOST_CONCURRENCY, HTTP_MIN_ATTEMPT_SECONDS
+)
+from src.tool_runtime import tool_deadline
+from src.utils import logger
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Seconds kept back from a tool's deadline so the tool can still report the failure in time.
+_DEADLINE_MARGIN = 0.25
+
+
+class HTTPClient:
+    """
+    Shared HTTP client for tools, built on one pooled requests.Session.
+
+    Connections are kept alive and reused across calls and sessions. Idempotent GETs
+    are retried on connection errors, timeouts and retryable status codes with
+    jittered exponential backoff, and concurrent requests per host are capped.
+    Inside a tool call, attempts and retries are fitted into the time left before
+    the tool's deadline, so a retry never outlives the call that wanted it.
+    """
+    def __init__(self,
+                 pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_base: float = HTTP_BACKOFF_BASE,
+                 backoff_max: float = HTTP_BACKOFF_MAX,
+                 per_host_concurrency: int = HTTP_PER_HOST_CONCURRENCY,
+                 min_attempt_seconds: float = HTTP_MIN_ATTEMPT_SECONDS):
+        """
+        Initializes the HTTPClient.
+
+        Args:
+            pool_connections (int): Number of hosts to keep connection pools for.
+            pool_maxsize (int): Maximum keep-alive connections per host.
+            max_retries (int): Retries after the first attempt for idempotent requests.
+            backoff_base (float): Base delay in seconds, doubled per retry.
+            backoff_max (float): Upper bound for a single backoff delay.
+            per_host_concurrency (int): Maximum in-flight requests per host.
+            min_attempt_seconds (float): Time a retry needs before the tool deadline, after its backoff.
+        """
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._per_host_concurrency = per_host_concurrency
+        self._min_attempt_seconds = min_attempt_seconds
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _host_limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self._per_host_concurrency)
+                self._host_limits[host] = limit
+            return limit
+
+    def _record(self, host: str, **increments: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                "requests": 0, "retries": 0, "failures": 0, "total_seconds": 0.0, "max_seconds": 0.0
+            })
+            for key, value in increments.items():
+                if key == "max_seconds":
+                    stats[key] = max(stats[key], value)
+                else:
+                    stats[key] += value
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Returns the jittered delay before retry number `attempt` (starting at 1)."""
+        delay = min(self._backoff_max, self._backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def _can_retry(self, attempt: int, delay: float, deadline: Optional[float]) -> bool:
+        if attempt >= self._max_retries:
+            return False
+        return deadline is None or time.monotonic() + delay + self._min_attempt_seconds + _DEADLINE_MARGIN <= deadline
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 5,
+            **kwargs: Any) -> requests.Response:
+        """
+        Sends a GET request with retries.
+
+        Args:
+            url (str): Request URL.
+            params (Optional[Dict[str, Any]]): Query parameters.
+            timeout (float): Per-attempt timeout in seconds; shortened to the time left when
+                             called from a tool with a deadline.
+
+        Returns:
+            requests.Response: The final response. Retryable status codes are returned
+                               as-is once retries (or the tool's time) are exhausted.
+
+        Raises:
+            requests.exceptions.RequestException: If every attempt failed to get a response.
+        """
+        host = urlsplit(url).netloc
+        limit = self._host_limit(host)
+        deadline = tool_deadline()
+        attempt = 0
+        while True:
+            attempt_timeout = timeout
+            if deadline is not None:
+                attempt_timeout = max(min(timeout, deadline - _DEADLINE_MARGIN - time.monotonic()), 0.1)
+            delay = self.backoff_delay(attempt + 1)
+            start = time.perf_counter()
+            try:
+                with limit:
+                    response = self._session.get(url, params=params, timeout=attempt_timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                elapsed = time.perf_counter() - start
+                self._record(host, requests=1, total_seconds=elapsed, max_seconds=elapsed)
+                if not self._can_retry(attempt, delay, deadline):
+                    self._record(host, failures=1)
+                    raise
+                error = str(e)
+            else:
+                elapsed = time.perf_counter() - start
+                self._record(host, requests=1, total_seconds=elapsed, max_seconds=elapsed)
+                if response.status_code not in RETRYABLE_STATUS_CODES or not self._can_retry(attempt, delay, deadline):
+                    if response.status_code >= 500:
+                        self._record(host, failures=1)
+                    return response
+                error = f"HTTP {response.status_code}"
+                response.close()
+
+            attempt += 1
+            self._record(host, retries=1)
+            logger.warning(f"GET {host} failed ({error}); retry {attempt}/{self._max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns per-host request, retry, failure and latency counters.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Counters keyed by host, including mean latency.
+        """
+        with self._lock:
+            snapshot = {}
+            for host, stats in self._stats.items():
+                snapshot[host] = dict(stats)
+                snapshot[host]["mean_seconds"] = (stats["total_seconds"] / stats["requests"]) if stats["requests"] else 0.0
+            return snapshot
+
+
+_http_client = HTTPClient()
+
+
+def is_service_failure(error: requests.exceptions.RequestException) -> bool:
+    """
+    Tells an outage or rate limit apart from a rejected request.
+
+    Connection errors, timeouts, 5xx and 429 responses mean the service is unhealthy;
+    other 4xx responses (e.g. an unknown city) are answers about the request itself.
+
+    Args:
+        error (requests.exceptions.RequestException): The error raised for a request.
+
+    Returns:
+        bool: True if the service itself failed.
+    """
+    response = getattr(error, "response", None)
+    return response is None or response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500
+
+
+def get_http_client() -> HTTPClient:
+    """Returns the process-wide HTTP client shared by the tools."""
+    return _http_client
@@ -1,22 +1,218 @@
 # src/llm_model.py
 
 import os
+import contextvars
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
-from src.config import GEMINI_MODEL_NAME
+from langchain_core.messages import BaseMessageChunk
+from langchain_core.runnables import RunnableConfig
+from src.config import (
+    GEMINI_MODEL_NAME, LLM_POOL_MAX_CLIENTS, LLM_POOL_IDLE_TIMEOUT, LLM_CACHE_ENABLED, LLM_CACHE_SAMPLED
+)
+from src.cache import get_llm_cache
 from src.utils import logger
 
+PoolKey = Tuple[str, str, float]
+
+# Set while CachedChatGoogleGenerativeAI.stream() runs its call through invoke().
+_stream_through_cache: contextvars.ContextVar[bool] = contextvars.ContextVar("stream_through_cache", default=False)
+
+
+class CachedChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """
+    ChatGoogleGenerativeAI whose stream() consults the completion cache.
+
+    BaseChatModel.stream() calls the API directly and never looks at `cache`, so the
+    agent (which always streams) missed it on every call. With a cache attached,
+    stream() goes through invoke() instead: a hit is returned as one message, and a
+    miss still streams tokens to the callbacks before the result is stored.
+    """
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, *,
+               stop: Optional[List[str]] = None, **kwargs: Any) -> Iterator[BaseMessageChunk]:
+        if not isinstance(self.cache, BaseCache) or "stream" in kwargs:
+            yield from super().stream(input, config, stop=stop, **kwargs)
+            return
+        token = _stream_through_cache.set(True)
+        try:
+            message = self.invoke(input, config=config, stop=stop, **kwargs)
+        finally:
+            _stream_through_cache.reset(token)
+        yield message
+
+    def _should_stream(self, *, async_api: bool, run_manager: Any = None, **kwargs: Any) -> bool:
+        if _stream_through_cache.get() and "stream" not in kwargs:
+            kwargs["stream"] = True
+        return super()._should_stream(async_api=async_api, run_manager=run_manager, **kwargs)
+
+
+class _PoolUsageHandler(BaseCallbackHandler):
+    """Marks a pooled client as used whenever it starts a call."""
+    def __init__(self, pool: "LLMClientPool", key: PoolKey):
+        self._pool = pool
+        self._key = key
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self._pool.touch(self._key)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], **kwargs: Any) -> None:
+        self._pool.touch(self._key)
+
+
+class LLMClientPool:
+    """
+    Process-wide, thread-safe pool of chat model clients shared across sessions.
+
+    Clients are keyed by (API key hash, model, temperature) so sessions with the same
+    configuration reuse one warm HTTP/gRPC channel instead of opening their own.
+    Sessions keep the client they acquired, so a client counts as used on every call
+    it makes, not only when it is handed out, and only clients idle for the whole
+    timeout are evicted.
+    """
+    def __init__(self, max_clients: int = LLM_POOL_MAX_CLIENTS, idle_timeout: float = LLM_POOL_IDLE_TIMEOUT):
+        """
+        Initializes the LLMClientPool.
+
+        Args:
+            max_clients (int): Maximum number of open clients; the least recently used is evicted beyond this.
+            idle_timeout (float): Seconds after the last call or acquire before a client is evicted.
+        """
+        self._max_clients = max_clients
+        self._idle_timeout = idle_timeout
+        self._clients: "OrderedDict[PoolKey, Tuple[BaseChatModel, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(api_key: str, model: str, temperature: float) -> PoolKey:
+        """Builds a pool key without keeping the raw API key in memory."""
+        key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        return (key_hash, model, float(temperature))
+
+    def acquire(self, api_key: str, model: str, temperature: float,
+                factory: Callable[[], BaseChatModel]) -> BaseChatModel:
+        """
+        Returns a pooled client, creating it with `factory` on a miss.
+
+        Args:
+            api_key (str): Google API key the client authenticates with.
+            model (str): Model name.
+            temperature (float): Sampling temperature.
+            factory (Callable[[], BaseChatModel]): Creates a new client when none is pooled.
+
+        Returns:
+            BaseChatModel: A shared chat model client.
+        """
+        key = self.make_key(api_key, model, temperature)
+        with self._lock:
+            self._evict_idle_locked()
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._hits += 1
+                self._clients[key] = (entry[0], time.monotonic())
+                self._clients.move_to_end(key)
+                return entry[0]
+
+        # Building a client can be slow; other keys are served meanwhile.
+        client = factory()
+        if isinstance(client.callbacks, list) or client.callbacks is None:
+            client.callbacks = list(client.callbacks or []) + [_PoolUsageHandler(self, key)]
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                # Another thread built the same client first; share theirs.
+                self._hits += 1
+                self._clients[key] = (entry[0], time.monotonic())
+                self._clients.move_to_end(key)
+                return entry[0]
+            self._misses += 1
+            self._clients[key] = (client, time.monotonic())
+            while len(self._clients) > self._max_clients:
+                evicted_key, _ = self._clients.popitem(last=False)
+                self._evictions += 1
+                logger.info(f"LLM pool full; evicted client for model {evicted_key[1]}")
+            return client
+
+    def touch(self, key: PoolKey) -> None:
+        """Records a call made by the pooled client for `key`."""
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients[key] = (entry[0], time.monotonic())
+                self._clients.move_to_end(key)
+
+    def evict_idle(self) -> int:
+        """
+        Drops clients that have been neither acquired nor used within the idle timeout.
+
+        Returns:
+            int: Number of evicted clients.
+        """
+        with self._lock:
+            return self._evict_idle_locked()
+
+    def _evict_idle_locked(self) -> int:
+        cutoff = time.monotonic() - self._idle_timeout
+        expired = [key for key, (_, last_used) in self._clients.items() if last_used < cutoff]
+        for key in expired:
+            del self._clients[key]
+        if expired:
+            self._evictions += len(expired)
+            logger.info(f"Evicted {len(expired)} idle LLM client(s) from pool")
+        return len(expired)
+
+    def clear(self) -> None:
+        """Drops all pooled clients."""
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns pool counters.
+
+        Returns:
+            Dict[str, Any]: Open clients, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "open_clients": len(self._clients),
+                "max_clients": self._max_clients,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0,
+            }
+
+
+_client_pool = LLMClientPool()
+
+
+def get_client_pool() -> LLMClientPool:
+    """Returns the process-wide LLM client pool."""
+    return _client_pool
+
+
 class GeminiLLM:
     """
     Manages the initialization and retrieval of the Google Gemini LLM.
     """
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, temperature: float = 0.7):
         """
         Initializes the GeminiLLM handler.
 
         Args:
             api_key (str | None): Google API key. If None, it will try to
                                   read from GOOGLE_API_KEY environment variable.
+            temperature (float): Sampling temperature (0.0-1.0).
         """
         if api_key is None:
             api_key = os.getenv("GOOGLE_API_KEY")
@@ -24,26 +220,38 @@ class GeminiLLM:
                 logger.error("GOOGLE_API_KEY not found. Please set it in .env or provide as argument.")
                 raise ValueError("GOOGLE_API_KEY is required to initialize GeminiLLM.")
         self._api_key = api_key
+        self._temperature = temperature
         self._llm: BaseChatModel | None = None
         logger.info(f"GeminiLLM initialized with model: {GEMINI_MODEL_NAME}")
 
+    def _is_cacheable(self) -> bool:
+        # Only deterministic calls are safe to replay unless sampled caching is opted into.
+        return LLM_CACHE_ENABLED and (self._temperature == 0 or LLM_CACHE_SAMPLED)
+
+    def _create_llm(self) -> BaseChatModel:
+        try:
+            llm = CachedChatGoogleGenerativeAI(
+                model=GEMINI_MODEL_NAME,
+                google_api_key=self._api_key,
+                temperature=self._temperature, # Adjust creativity (0.0-1.0)
+                convert_system_message_to_human=True, # Recommended for Gemini
+                cache=get_llm_cache() if self._is_cacheable() else None
+            )
+            logger.info(f"Successfully loaded Google Gemini LLM: {GEMINI_MODEL_NAME}")
+            return llm
+        except Exception as e:
+            logger.error(f"Failed to load Google Gemini LLM: {e}")
+            raise
+
     def get_llm(self) -> BaseChatModel:
         """
-        Returns an initialized ChatGoogleGenerativeAI instance.
+        Returns a pooled ChatGoogleGenerativeAI instance.
 
         Returns:
             BaseChatModel: The Langchain ChatGoogleGenerativeAI model.
         """
         if self._llm is None:
-            try:
-                self._llm = ChatGoogleGenerativeAI(
-                    model=GEMINI_MODEL_NAME,
-                    google_api_key=self._api_key,
-                    temperature=0.7, # Adjust creativity (0.0-1.0)
-                    convert_system_message_to_human=True # Recommended for Gemini
-                )
-                logger.info(f"Successfully loaded Google Gemini LLM: {GEMINI_MODEL_NAME}")
-            except Exception as e:
-                logger.error(f"Failed to load Google Gemini LLM: {e}")
-                raise
+            self._llm = get_client_pool().acquire(
+                self._api_key, GEMINI_MODEL_NAME, self._temperature, self._create_llm
+            )
         return self._llm
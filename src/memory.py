@@ -1,8 +1,18 @@
 
-from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory, ConversationSummaryBufferMemory
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory
+from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
 from langchain_core.memory import BaseMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, get_buffer_string
 from langchain_core.prompts import PromptTemplate
-from src.config import MEMORY_WINDOW_SIZE, MAX_TOKEN_LIMIT
+import numpy as np
+from src.config import (
+    MEMORY_WINDOW_SIZE, SUMMARY_RECENT_TURNS, SUMMARY_FOLD_BATCH, SUMMARY_WORKERS, SUMMARY_MAX_TOKENS,
+    RECALL_TOP_K, RECALL_RECENT_TURNS, RECALL_MAX_TURNS, RECALL_MIN_SIMILARITY, RECALL_EMBEDDING_DIM
+)
+from src.embeddings import HashedNgramEmbedder
 from src.utils import logger
 
 SUMMARIZATION_PROMPT = PromptTemplate.from_template(
@@ -13,51 +23,456 @@ SUMMARIZATION_PROMPT = PromptTemplate.from_template(
     "New summary:"
 )
 
-def get_conversation_memory(memory_type: str = "buffer", session_id: str = "default") -> BaseMemory:
+# Shared by all sessions; folds never run on the thread serving a user's turn.
+_summary_pool = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="memory-summary")
+
+
+class _SummaryState:
+    """Running summary and unsummarized turns of one session."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.summary = ""
+        self.pending: List[List[BaseMessage]] = []  # Turns waiting to be folded into the summary
+        self.recent: List[List[BaseMessage]] = []  # Verbatim window
+        self.folding = False
+        self.idle = threading.Event()
+        self.idle.set()
+        self.generation = 0  # Bumped by clear() so an in-flight fold does not restore old turns
+        self.folds = 0
+        self.failures = 0
+
+
+_summary_states: Dict[str, _SummaryState] = {}
+_summary_states_lock = threading.Lock()
+
+
+def _summary_state(session_id: str) -> _SummaryState:
+    with _summary_states_lock:
+        state = _summary_states.get(session_id)
+        if state is None:
+            state = _summary_states[session_id] = _SummaryState()
+        return state
+
+
+def _split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    # A turn starts at each human message.
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if not turns or isinstance(message, HumanMessage):
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+class BackgroundSummaryMemory(BaseMemory):
+    """
+    Conversation memory with a verbatim window of recent turns and a running summary of older ones.
+
+    Turns that leave the window are folded into the summary by a background worker,
+    so saving a turn and loading the history never wait for the LLM. Turns still
+    waiting to be folded are returned verbatim, so nothing is lost in between. The
+    summary lives in a per-session registry and survives the memory object being
+    recreated, e.g. when the agent is rebuilt. Without an LLM, old turns are folded
+    with a local extractive summary. With `chat_memory`, every turn is also persisted
+    there, and a new process rebuilds the summary from it on first use.
+    """
+    session_id: str = "default"
+    llm: Optional[Any] = None
+    chat_memory: Optional[BaseChatMessageHistory] = None
+    memory_key: str = "chat_history"
+    return_messages: bool = True
+    recent_turns: int = SUMMARY_RECENT_TURNS
+    prompt: PromptTemplate = SUMMARIZATION_PROMPT
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    @property
+    def _state(self) -> _SummaryState:
+        return _summary_state(self.session_id)
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.chat_memory is None:
+            return
+        state = self._state
+        with state.lock:
+            if state.summary or state.pending or state.recent:
+                return
+        turns = _split_turns(self.chat_memory.messages)
+        with state.lock:
+            if state.summary or state.pending or state.recent:
+                return
+            split = max(0, len(turns) - self.recent_turns)
+            state.pending, state.recent = turns[:split], turns[split:]
+        if turns:
+            logger.info(f"Restored {len(turns)} turns of session {self.session_id} into summary memory")
+        self._schedule_fold(state)
+
+    def _schedule_fold(self, state: _SummaryState) -> None:
+        with state.lock:
+            schedule = bool(state.pending) and not state.folding
+            if schedule:
+                state.folding = True
+                state.idle.clear()
+        if schedule:
+            _summary_pool.submit(self._fold)
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns the summary (as a system message) followed by all turns not yet folded into it."""
+        state = self._state
+        with state.lock:
+            messages = [SystemMessage(content=state.summary)] if state.summary else []
+            for turn in state.pending + state.recent:
+                messages.extend(turn)
+        return {self.memory_key: messages if self.return_messages else get_buffer_string(messages)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Appends a turn and schedules folding of turns that left the verbatim window."""
+        input_key = "input" if "input" in inputs else next(iter(inputs))
+        output_key = "output" if "output" in outputs else next(iter(outputs))
+        turn = [HumanMessage(content=str(inputs[input_key])), AIMessage(content=str(outputs[output_key]))]
+        state = self._state
+        with state.lock:
+            state.recent.append(turn)
+            overflow = len(state.recent) - self.recent_turns
+            if overflow > 0:
+                state.pending.extend(state.recent[:overflow])
+                del state.recent[:overflow]
+        self._schedule_fold(state)
+        if self.chat_memory is not None:
+            self.chat_memory.add_messages(turn)
+
+    def _summarize(self, summary: str, new_lines: str) -> str:
+        if self.llm is None:
+            from src.compaction import summarize
+            return summarize(new_lines, f"{summary}\n{new_lines}".strip(), SUMMARY_MAX_TOKENS)
+        result = self.llm.invoke(self.prompt.format(summary=summary or "(none)", new_lines=new_lines))
+        return str(getattr(result, "content", result)).strip()
+
+    def _fold(self) -> None:
+        state = self._state
+        while True:
+            with state.lock:
+                batch = state.pending[:SUMMARY_FOLD_BATCH]
+                summary, generation = state.summary, state.generation
+                if not batch:
+                    state.folding = False
+                    state.idle.set()
+                    return
+            try:
+                new_summary = self._summarize(summary, "\n".join(get_buffer_string(turn) for turn in batch))
+            except Exception as e:
+                # Keep the turns verbatim; the next saved turn retries the fold.
+                logger.error(f"Summary fold failed for session {self.session_id}: {e}")
+                with state.lock:
+                    state.failures += 1
+                    state.folding = False
+                    state.idle.set()
+                return
+            with state.lock:
+                if state.generation == generation:
+                    state.summary = new_summary
+                    del state.pending[:len(batch)]
+                    state.folds += 1
+
+    def wait_for_summary(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until pending turns are folded; returns False on timeout."""
+        return self._state.idle.wait(timeout)
+
+    def clear(self) -> None:
+        state = self._state
+        with state.lock:
+            state.summary = ""
+            state.pending.clear()
+            state.recent.clear()
+            state.generation += 1
+        if self.chat_memory is not None:
+            self.chat_memory.clear()
+
+
+_recall_embedder = HashedNgramEmbedder(dim=RECALL_EMBEDDING_DIM)
+# Approximate size of a message object beyond its text, used by memory_footprint.
+_MESSAGE_OVERHEAD_BYTES = 512
+_SEARCH_BLOCK_ROWS = 1024
+
+
+class RecallIndex:
+    """
+    Embeddings and text of a session's turns in a fixed-capacity ring buffer.
+
+    Vectors are quantized to int8 with one float32 scale per row, so a turn costs
+    dim + 4 bytes of index; once `capacity` turns are stored the oldest is
+    overwritten. Search is a single matrix-vector product over the filled rows.
+    """
+    def __init__(self, capacity: int = RECALL_MAX_TURNS, dim: int = RECALL_EMBEDDING_DIM):
+        """
+        Initializes the RecallIndex.
+
+        Args:
+            capacity (int): Turns kept; older turns are overwritten.
+            dim (int): Embedding dimensionality.
+        """
+        self.capacity = capacity
+        # Grown by doubling up to capacity, so short sessions stay small.
+        self._vectors = np.zeros((min(64, capacity), dim), dtype=np.int8)
+        self._scales = np.zeros(len(self._vectors), dtype=np.float32)
+        self._turns: List[Optional[Tuple[str, str]]] = [None] * len(self._vectors)
+        self.total = 0  # Turns ever added; the turn with number t lives in row t % capacity
+        self.text_bytes = 0  # Characters of the stored turn texts
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the vector matrix and row scales."""
+        return self._vectors.nbytes + self._scales.nbytes
+
+    def add(self, vector: np.ndarray, turn: Tuple[str, str]) -> None:
+        """Stores the embedding and (input, output) text of the next turn."""
+        row = self.total % self.capacity
+        if row >= len(self._vectors):
+            size = min(len(self._vectors) * 2, self.capacity)
+            self._vectors = np.resize(self._vectors, (size, self._vectors.shape[1]))
+            self._scales = np.resize(self._scales, size)
+            self._turns.extend([None] * (size - len(self._turns)))
+        peak = float(np.abs(vector).max())
+        scale = peak / 127.0 if peak > 0 else 1.0
+        self._vectors[row] = np.rint(vector / scale).astype(np.int8)
+        self._scales[row] = scale
+        if self._turns[row] is not None and self.total >= self.capacity:
+            self.text_bytes -= sum(len(text) for text in self._turns[row])
+        self._turns[row] = turn
+        self.text_bytes += sum(len(text) for text in turn)
+        self.total += 1
+
+    def turn(self, number: int) -> Tuple[str, str]:
+        """Returns the (input, output) text of a stored turn by its number."""
+        return self._turns[number % self.capacity]
+
+    def search(self, query: np.ndarray, k: int, before: int, min_similarity: float = 0.0) -> List[int]:
+        """
+        Finds the stored turns most similar to `query`.
+
+        Args:
+            query (np.ndarray): L2-normalized query embedding.
+            k (int): Turns to return at most.
+            before (int): Only turns numbered below this are considered.
+            min_similarity (float): Cosine similarity a turn needs to be returned.
+
+        Returns:
+            List[int]: Turn numbers, most similar first.
+        """
+        first = max(0, self.total - self.capacity)
+        if k <= 0 or before <= first:
+            return []
+        rows = len(self)
+        scores = np.empty(rows, dtype=np.float32)
+        # int8 rows are widened one cache-sized block at a time instead of converting the whole matrix.
+        block = np.empty((min(rows, _SEARCH_BLOCK_ROWS), self._vectors.shape[1]), dtype=np.float32)
+        for start in range(0, rows, _SEARCH_BLOCK_ROWS):
+            end = min(start + _SEARCH_BLOCK_ROWS, rows)
+            np.copyto(block[:end - start], self._vectors[start:end])
+            np.matmul(block[:end - start], query, out=scores[start:end])
+        scores *= self._scales[:rows]
+        for number in range(before, self.total):
+            scores[number % self.capacity] = -np.inf
+        k = min(k, before - first)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        # Row r holds the turn numbered r, shifted by whole laps of the ring.
+        lap = first - first % self.capacity
+        return [int(r) + lap + (self.capacity if r + lap < first else 0) for r in top if scores[r] >= min_similarity]
+
+
+class _RecallState:
+    """Recall index of one session."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = RecallIndex()
+
+
+_recall_states: Dict[str, _RecallState] = {}
+_recall_states_lock = threading.Lock()
+
+
+def _recall_state(session_id: str) -> _RecallState:
+    with _recall_states_lock:
+        state = _recall_states.get(session_id)
+        if state is None:
+            state = _recall_states[session_id] = _RecallState()
+        return state
+
+
+class VectorRecallMemory(BaseMemory):
+    """
+    Conversation memory that returns the latest turns plus the earlier turns most relevant to the new input.
+
+    Every turn is embedded locally (hashed n-grams, no model call) into a per-session
+    RecallIndex, so history stays bounded in both prompt size and process memory
+    however long the session runs. Returned turns are in chronological order. With
+    `chat_memory`, every turn is also persisted there, and a new process re-indexes
+    the session from it on first use.
+    """
+    session_id: str = "default"
+    chat_memory: Optional[BaseChatMessageHistory] = None
+    memory_key: str = "chat_history"
+    input_key: str = "input"
+    return_messages: bool = True
+    top_k: int = RECALL_TOP_K
+    recent_turns: int = RECALL_RECENT_TURNS
+    min_similarity: float = RECALL_MIN_SIMILARITY
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.chat_memory is None or _recall_state(self.session_id).index.total:
+            return
+        turns = [turn for turn in _split_turns(self.chat_memory.messages) if len(turn) >= 2]
+        turns = [(str(turn[0].content), str(turn[-1].content)) for turn in turns[-RECALL_MAX_TURNS:]]
+        vectors = [_recall_embedder.embed(f"{human}\n{ai}") for human, ai in turns]
+        state = _recall_state(self.session_id)
+        with state.lock:
+            if state.index.total:
+                return
+            for vector, turn in zip(vectors, turns):
+                state.index.add(vector, turn)
+        if turns:
+            logger.info(f"Restored {len(turns)} turns of session {self.session_id} into recall memory")
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns the most relevant earlier turns and the latest turns for `inputs[input_key]`."""
+        query = str(inputs.get(self.input_key, ""))
+        vector = _recall_embedder.embed(query) if query else None
+        state = _recall_state(self.session_id)
+        with state.lock:
+            index = state.index
+            recent_start = max(index.total - self.recent_turns, index.total - len(index))
+            relevant = index.search(vector, self.top_k, recent_start, self.min_similarity) \
+                if vector is not None else []
+            numbers = sorted(relevant) + list(range(recent_start, index.total))
+            turns = [index.turn(number) for number in numbers]
+        messages: List[BaseMessage] = []
+        for human, ai in turns:
+            messages.extend((HumanMessage(content=human), AIMessage(content=ai)))
+        return {self.memory_key: messages if self.return_messages else get_buffer_string(messages)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Embeds the turn and adds it to the session's index."""
+        input_key = self.input_key if self.input_key in inputs else next(iter(inputs))
+        output_key = "output" if "output" in outputs else next(iter(outputs))
+        human, ai = str(inputs[input_key]), str(outputs[output_key])
+        vector = _recall_embedder.embed(f"{human}\n{ai}")
+        state = _recall_state(self.session_id)
+        with state.lock:
+            state.index.add(vector, (human, ai))
+        if self.chat_memory is not None:
+            self.chat_memory.add_messages([HumanMessage(content=human), AIMessage(content=ai)])
+
+    def clear(self) -> None:
+        state = _recall_state(self.session_id)
+        with state.lock:
+            state.index = RecallIndex()
+        if self.chat_memory is not None:
+            self.chat_memory.clear()
+
+
+def drop_memory_state(session_id: str) -> None:
+    """Forgets the cached summary and recall index of a session."""
+    with _summary_states_lock:
+        _summary_states.pop(session_id, None)
+    with _recall_states_lock:
+        _recall_states.pop(session_id, None)
+
+
+def memory_footprint(memory: BaseMemory) -> int:
+    """
+    Estimates the bytes a memory holds in this process.
+
+    Histories kept in a persistent backend are not counted; they are read on demand.
+
+    Args:
+        memory (BaseMemory): A memory from get_conversation_memory.
+
+    Returns:
+        int: Approximate size of the memory's in-process state.
+    """
+    if isinstance(memory, BackgroundSummaryMemory):
+        state = memory._state
+        with state.lock:
+            messages = [message for turn in state.pending + state.recent for message in turn]
+            return len(state.summary) + sum(len(str(m.content)) + _MESSAGE_OVERHEAD_BYTES for m in messages)
+    if isinstance(memory, VectorRecallMemory):
+        state = _recall_state(memory.session_id)
+        with state.lock:
+            return state.index.nbytes + state.index.text_bytes + len(state.index) * 2 * _MESSAGE_OVERHEAD_BYTES
+    chat_memory = getattr(memory, "chat_memory", None)
+    if isinstance(chat_memory, InMemoryChatMessageHistory):
+        return sum(len(str(m.content)) + _MESSAGE_OVERHEAD_BYTES for m in chat_memory.messages)
+    return 0
+
+
+def get_conversation_memory(memory_type: str = "buffer", session_id: str = "default",
+                            llm: Optional[Any] = None,
+                            chat_memory: Optional[BaseChatMessageHistory] = None) -> BaseMemory:
     """
     Initializes and returns a memory instance with enhanced options.
     
     Args:
-        memory_type (str): Type of memory ('buffer', 'window', 'summary')
+        memory_type (str): Type of memory ('buffer', 'window', 'summary', 'recall')
         session_id (str): Session identifier for persistent memories
+        llm (Optional[Any]): Model that writes the running summary for 'summary' memory
+        chat_memory (Optional[BaseChatMessageHistory]): Persistent history the memory reads and appends to
         
     Returns:
         BaseMemory: A Langchain memory object
     """
+    # LangChain memories default to an in-process history when none is given.
+    history = {"chat_memory": chat_memory} if chat_memory is not None else {}
     if memory_type == "window":
         memory = ConversationBufferWindowMemory(
             memory_key="chat_history",
             k=MEMORY_WINDOW_SIZE,
-            return_messages=True
+            return_messages=True,
+            **history
         )
         logger.info(f"ConversationBufferWindowMemory initialized (window={MEMORY_WINDOW_SIZE}).")
     elif memory_type == "summary":
-        memory = ConversationSummaryBufferMemory(
+        memory = BackgroundSummaryMemory(
+            session_id=session_id,
+            llm=llm,
+            chat_memory=chat_memory,
             memory_key="chat_history",
-            max_token_limit=MAX_TOKEN_LIMIT,
-            return_messages=True,
-            llm=None,  # Will be set later when LLM is available
-            prompt=SUMMARIZATION_PROMPT
+            return_messages=True
+        )
+        logger.info(f"BackgroundSummaryMemory initialized (recent_turns={SUMMARY_RECENT_TURNS}).")
+    elif memory_type == "recall":
+        memory = VectorRecallMemory(
+            session_id=session_id,
+            chat_memory=chat_memory,
+            memory_key="chat_history",
+            return_messages=True
         )
-        logger.info(f"ConversationSummaryBufferMemory initialized (max_tokens={MAX_TOKEN_LIMIT}).")
+        logger.info(f"VectorRecallMemory initialized (top_k={RECALL_TOP_K}, recent_turns={RECALL_RECENT_TURNS}).")
     else:  # Default to buffer
         memory = ConversationBufferMemory(
             memory_key="chat_history",
-            return_messages=True
+            return_messages=True,
+            **history
         )
         logger.info("ConversationBufferMemory initialized.")
     
     return memory
 
-# For Redis-based persistent memory (uncomment when needed)
-def get_persistent_memory(session_id: str) -> BaseMemory:
-    from langchain.memory import RedisChatMessageHistory
-    history = RedisChatMessageHistory(
-        session_id=session_id, 
-        url="redis://localhost:6379/0"
-    )
-    return ConversationBufferMemory(
-        chat_memory=history,
-        memory_key="chat_history",
-        return_messages=True
-    )
+def get_persistent_memory(session_id: str, memory_type: str = "buffer", llm: Optional[Any] = None) -> BaseMemory:
+    """
+    Returns a memory whose history is kept in the configured persistent backend (PERSISTENT_BACKEND).
+
+    Falls back to an in-process history when persistence is off or the backend is unreachable.
+    """
+    from src.history_store import get_chat_history
+    return get_conversation_memory(memory_type, session_id, llm=llm, chat_memory=get_chat_history(session_id))
@@ -0,0 +1,230 @@
+# src/metrics.py
+
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from src.config import METRICS_LATENCY_MIN, METRICS_LATENCY_MAX, METRICS_BUCKETS_PER_DOUBLING
+from src.utils import logger
+
+_BUCKET_COUNT = int(math.ceil(math.log2(METRICS_LATENCY_MAX / METRICS_LATENCY_MIN) * METRICS_BUCKETS_PER_DOUBLING)) + 1
+# Upper bound (seconds) of each latency bucket; the last one also holds everything slower.
+BUCKET_BOUNDS: List[float] = [
+    METRICS_LATENCY_MIN * 2 ** ((i + 1) / METRICS_BUCKETS_PER_DOUBLING) for i in range(_BUCKET_COUNT)
+]
+_SCALE = METRICS_BUCKETS_PER_DOUBLING / math.log(2)
+
+
+def bucket_index(seconds: float) -> int:
+    """Returns the log-spaced bucket for a latency."""
+    if seconds <= METRICS_LATENCY_MIN:
+        return 0
+    return min(_BUCKET_COUNT - 1, int(math.log(seconds / METRICS_LATENCY_MIN) * _SCALE))
+
+
+class _ToolCounters:
+    __slots__ = ("calls", "errors", "timeouts", "seconds", "max_seconds", "output_bytes", "max_output_bytes", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.output_bytes = 0
+        self.max_output_bytes = 0
+        self.buckets = [0] * _BUCKET_COUNT
+
+
+def _percentile(counters: _ToolCounters, q: float) -> float:
+    if not counters.calls:
+        return 0.0
+    rank = q * counters.calls
+    seen = 0
+    for i, n in enumerate(counters.buckets):
+        seen += n
+        if seen >= rank:
+            return min(BUCKET_BOUNDS[i], counters.max_seconds)
+    return counters.max_seconds
+
+
+class ToolMetrics:
+    """
+    Per-tool call counts, latency histograms, failures and output sizes.
+
+    Every thread records into its own shard, so the hot path takes no lock and
+    threads never contend; a snapshot merges the shards. Latencies go into
+    log-spaced buckets, so reported percentiles are bucket upper bounds (capped at
+    the slowest call), at most one bucket width, 2 ** (1 / METRICS_BUCKETS_PER_DOUBLING),
+    above the true value.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[str, _ToolCounters]] = []
+        self._shards_lock = threading.Lock()
+
+    def _counters(self, tool: str) -> _ToolCounters:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        counters = shard.get(tool)
+        if counters is None:
+            counters = shard[tool] = _ToolCounters()
+        return counters
+
+    def record(self, tool: str, seconds: float, output_bytes: int = 0, error: bool = False) -> None:
+        """
+        Records one completed call.
+
+        Args:
+            tool (str): Tool name.
+            seconds (float): Call latency.
+            output_bytes (int): Size of the returned text.
+            error (bool): Whether the call failed.
+        """
+        counters = self._counters(tool)
+        counters.calls += 1
+        counters.errors += error
+        counters.seconds += seconds
+        if seconds > counters.max_seconds:
+            counters.max_seconds = seconds
+        counters.output_bytes += output_bytes
+        if output_bytes > counters.max_output_bytes:
+            counters.max_output_bytes = output_bytes
+        counters.buckets[bucket_index(seconds)] += 1
+
+    def record_timeout(self, tool: str) -> None:
+        """Records a call the caller stopped waiting for."""
+        self._counters(tool).timeouts += 1
+
+    def _merged(self) -> Dict[str, _ToolCounters]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: Dict[str, _ToolCounters] = {}
+        for shard in shards:
+            for tool, counters in list(shard.items()):
+                total = merged.get(tool)
+                if total is None:
+                    total = merged[tool] = _ToolCounters()
+                total.calls += counters.calls
+                total.errors += counters.errors
+                total.timeouts += counters.timeouts
+                total.seconds += counters.seconds
+                total.max_seconds = max(total.max_seconds, counters.max_seconds)
+                total.output_bytes += counters.output_bytes
+                total.max_output_bytes = max(total.max_output_bytes, counters.max_output_bytes)
+                total.buckets = [a + b for a, b in zip(total.buckets, counters.buckets)]
+        return merged
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns per-tool statistics.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Keyed by tool: calls, errors, timeouts, error_rate, mean/p50/p95/p99/max
+                                       latency in milliseconds, and total/mean/max output bytes.
+        """
+        snapshot = {}
+        for tool, c in sorted(self._merged().items()):
+            snapshot[tool] = {
+                "calls": c.calls,
+                "errors": c.errors,
+                "timeouts": c.timeouts,
+                "error_rate": ((c.errors + c.timeouts) / (c.calls + c.timeouts)) if c.calls + c.timeouts else 0.0,
+                "mean_ms": (c.seconds / c.calls * 1000) if c.calls else 0.0,
+                "p50_ms": _percentile(c, 0.50) * 1000,
+                "p95_ms": _percentile(c, 0.95) * 1000,
+                "p99_ms": _percentile(c, 0.99) * 1000,
+                "max_ms": c.max_seconds * 1000,
+                "output_bytes": c.output_bytes,
+                "mean_output_bytes": (c.output_bytes / c.calls) if c.calls else 0.0,
+                "max_output_bytes": c.max_output_bytes,
+            }
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """Renders all counters and histograms in the Prometheus text exposition format."""
+        merged = self._merged()
+        lines = []
+        for metric, kind, attr in (("tool_calls_total", "counter", "calls"), ("tool_errors_total", "counter", "errors"),
+                                   ("tool_timeouts_total", "counter", "timeouts"),
+                                   ("tool_output_bytes_total", "counter", "output_bytes")):
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(f'{metric}{{tool="{tool}"}} {getattr(c, attr)}' for tool, c in sorted(merged.items()))
+        lines.append("# TYPE tool_latency_seconds histogram")
+        for tool, c in sorted(merged.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKET_BOUNDS, c.buckets):
+                cumulative += n
+                if n:  # Empty buckets add no information for cumulative counts
+                    lines.append(f'tool_latency_seconds_bucket{{tool="{tool}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'tool_latency_seconds_bucket{{tool="{tool}",le="+Inf"}} {c.calls}')
+            lines.append(f'tool_latency_seconds_sum{{tool="{tool}"}} {c.seconds:.6f}')
+            lines.append(f'tool_latency_seconds_count{{tool="{tool}"}} {c.calls}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clears every shard."""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+_tool_metrics = ToolMetrics()
+
+
+def get_tool_metrics() -> ToolMetrics:
+    """Returns the process-wide tool metrics registry."""
+    return _tool_metrics
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = _tool_metrics.to_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(_tool_metrics.snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serves /metrics (Prometheus) and /metrics.json from a background thread, once per process.
+
+    Args:
+        port (int): Port to listen on.
+        host (str): Interface to bind.
+
+    Returns:
+        Optional[ThreadingHTTPServer]: The server, or None if the port could not be bound.
+    """
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logger.error(f"Could not start metrics endpoint on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Serving tool metrics on http://{host}:{port}/metrics")
+        return _metrics_server
@@ -0,0 +1,199 @@
+# src/regex_engine.py
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from src.config import (
+    REGEX_CACHE_SIZE, REGEX_MAX_MATCHES, REGEX_TIME_BUDGET, REGEX_MAX_PATTERN_LENGTH, REGEX_INPROCESS_MAX_CHARS
+)
+from src.sandbox import SandboxTimeout, get_sandbox_pool
+
+try:  # Python 3.11+
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+try:  # Optional linear-time engine (pip install google-re2)
+    import re2
+except ImportError:
+    re2 = None
+
+Match = Union[str, Tuple[str, ...]]
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+_BACKREFERENCES = {sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS}
+# Each unbounded repeat ('*', '+', '{n,}') can multiply the backtracking work by the input length:
+# '\d*\d*\d*z' or '.*a.*b.*c' take polynomial time, so more than this many leave the in-process path.
+_MAX_UNBOUNDED_REPEATS = 1
+
+
+class RegexTimeout(Exception):
+    """Raised when matching exceeds its time budget."""
+
+
+@dataclass
+class RegexResult:
+    """Matches found for a pattern, capped at a maximum count."""
+    matches: List[Match]
+    truncated: bool
+    engine: str
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def compile_pattern(pattern: str) -> re.Pattern:
+    """
+    Compiles a pattern once; later calls with the same text reuse the compiled object.
+
+    Raises:
+        re.error: If the pattern is invalid or longer than REGEX_MAX_PATTERN_LENGTH.
+    """
+    if len(pattern) > REGEX_MAX_PATTERN_LENGTH:
+        raise re.error(f"pattern longer than {REGEX_MAX_PATTERN_LENGTH} characters")
+    return re.compile(pattern)
+
+
+def _scan(subpattern, in_repeat: bool, counts: dict) -> bool:
+    for op, av in subpattern:
+        if op in _REPEATS:
+            low, high, item = av
+            repeats = high > 1
+            if high == sre_constants.MAXREPEAT:
+                counts["unbounded"] += 1
+            # A quantified piece inside another quantifier can be split exponentially many ways.
+            if (in_repeat and repeats) or _scan(item, in_repeat or repeats, counts):
+                return True
+        elif op == sre_constants.BRANCH:
+            # Alternation under a quantifier, e.g. (a|aa)*, backtracks across overlapping branches.
+            if in_repeat or any(_scan(branch, in_repeat, counts) for branch in av[1]):
+                return True
+        elif op == sre_constants.SUBPATTERN:
+            if _scan(av[-1], in_repeat, counts):
+                return True
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if _scan(av[1], in_repeat, counts):
+                return True
+        elif op in _BACKREFERENCES:
+            return True
+        elif isinstance(av, sre_parse.SubPattern) and _scan(av, in_repeat, counts):
+            return True
+    return False
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def is_risky(pattern: str) -> bool:
+    """
+    Returns True if a pattern can backtrack catastrophically.
+
+    Flags nested quantifiers ('(a+)+'), quantified alternations ('(a|aa)*'), backreferences
+    and patterns with more than one unbounded repeat of any kind ('\\d*\\d*z', '.*a.*b').
+    The check is conservative: many flagged patterns are harmless, but they are then run
+    on RE2 or under a time budget rather than rejected.
+    """
+    counts = {"unbounded": 0}
+    risky = _scan(sre_parse.parse(pattern), False, counts)
+    return risky or counts["unbounded"] > _MAX_UNBOUNDED_REPEATS
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _compile_re2(pattern: str):
+    try:
+        return re2.compile(pattern)
+    except Exception:  # Backreferences and lookarounds are not supported by RE2
+        return None
+
+
+def _as_match(match) -> Match:
+    # Same shape as re.findall: whole match, the only group, or a tuple of groups.
+    groups = match.groups()
+    if not groups:
+        return match.group(0)
+    return groups[0] if len(groups) == 1 else groups
+
+
+def iter_matches(pattern: str, source: Union[str, Iterable[str]]) -> Iterator[Match]:
+    """
+    Lazily yields matches from a string or from an iterable of lines (e.g. an open file).
+
+    Lines are matched one at a time, so large inputs are never held in memory whole;
+    matches cannot span line boundaries in that mode.
+
+    Args:
+        pattern (str): Regular expression pattern.
+        source (Union[str, Iterable[str]]): Text, or an iterable of text chunks.
+
+    Returns:
+        Iterator[Match]: Matches in input order.
+    """
+    regex = compile_pattern(pattern)
+    chunks = [source] if isinstance(source, str) else source
+    for chunk in chunks:
+        for match in regex.finditer(chunk):
+            yield _as_match(match)
+
+
+def find_matches(pattern: str, text: Optional[str] = None, max_matches: int = REGEX_MAX_MATCHES,
+                 path: Optional[str] = None) -> Tuple[List[Match], bool]:
+    """
+    Collects up to `max_matches` matches from `text` or from the file at `path`, read line by line.
+
+    This runs without a time bound; use `search` for untrusted patterns.
+
+    Returns:
+        Tuple[List[Match], bool]: The matches and whether more were available.
+    """
+    if path is not None:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            found = list(islice(iter_matches(pattern, f), max_matches + 1))
+    else:
+        found = list(islice(iter_matches(pattern, text), max_matches + 1))
+    return found[:max_matches], len(found) > max_matches
+
+
+def search(pattern: str, text: Optional[str] = None, path: Optional[str] = None,
+           max_matches: int = REGEX_MAX_MATCHES, time_budget: float = REGEX_TIME_BUDGET) -> RegexResult:
+    """
+    Finds matches with bounded latency.
+
+    Safe patterns on small inputs run in-process on the cached compiled pattern.
+    Patterns that can backtrack catastrophically, and any pattern on an input longer
+    than REGEX_INPROCESS_MAX_CHARS (even 'a+b' is quadratic in re, which retries from
+    every offset), run on RE2 when it is installed, and otherwise in a sandbox process
+    that is killed when the time budget runs out.
+
+    Args:
+        pattern (str): Regular expression pattern.
+        text (Optional[str]): Text to search.
+        path (Optional[str]): File to search line by line instead of `text`.
+        max_matches (int): Maximum number of matches returned.
+        time_budget (float): Seconds allowed outside the in-process path.
+
+    Returns:
+        RegexResult: The matches, whether they were capped, and the engine used.
+
+    Raises:
+        re.error: If the pattern is invalid.
+        RegexTimeout: If matching outside the in-process path does not finish within the time budget.
+        SandboxError: If the sandbox process fails for another reason, e.g. its memory limit.
+    """
+    compile_pattern(pattern)
+    size = os.path.getsize(path) if path is not None else len(text or "")
+    if size <= REGEX_INPROCESS_MAX_CHARS and not is_risky(pattern):
+        matches, truncated = find_matches(pattern, text, max_matches, path)
+        return RegexResult(matches, truncated, "re")
+
+    compiled = _compile_re2(pattern) if re2 is not None and path is None else None
+    if compiled is not None:
+        found = [_as_match(m) for m in islice(compiled.finditer(text), max_matches + 1)]
+        return RegexResult(found[:max_matches], len(found) > max_matches, "re2")
+
+    try:
+        matches, truncated = get_sandbox_pool().run("regex", pattern, text, max_matches, path, timeout=time_budget)
+    except SandboxTimeout as e:
+        raise RegexTimeout(f"{e}. The pattern backtracks too much on this input "
+                           "(e.g. nested quantifiers like '(a+)+', or a repeat over a long text).") from e
+    return RegexResult(matches, truncated, "sandbox")
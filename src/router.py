@@ -0,0 +1,241 @@
+# src/router.py
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.config import FAST_PATH_ENABLED, FAST_PATH_ASSUMED_AGENT_SECONDS, FAST_PATH_AGENT_SMOOTHING
+from src.tool_runtime import ToolFailure
+from src.utils import logger
+
+# (tool name, keyword arguments for the tool's structured entry point, how to format its output)
+Route = Tuple[str, Dict[str, Any], Callable[[str], str]]
+
+ISO_CURRENCIES = frozenset("""
+AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP BYN BZD CAD CDF CHF
+CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD GNF GTQ GYD HKD HNL HRK
+HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD KZT LAK LBP LKR LRD LSL LYD MAD MDL
+MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK NPR NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON
+RSD RUB RWF SAR SBD SCR SDG SEK SGD SHP SLE SOS SRD SSP STN SYP SZL THB TJS TMT TND TOP TRY TTD TWD TZS UAH UGX
+USD UYU UZS VES VND VUV WST XAF XCD XOF XPF YER ZAR ZMW ZWL
+""".split())
+
+_TIME = re.compile(
+    r"^(?:(?:what(?:'s| is)?|tell me|give me|show me)\s+)?(?:the\s+)?(?:current\s+|local\s+)?"
+    r"(?:time|date|date and time|time and date)(?:\s+(?:is it|today|now|right now))*"
+    r"(?:\s+(?:in|for|at)\s+(?P<place>[a-z_/+\-\s]+?))?(?:\s+(?:right\s+)?now)?$",
+    re.IGNORECASE,
+)
+_CURRENCY = re.compile(
+    r"^(?:(?:convert|exchange|how much is|what(?:'s| is))\s+)?(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?P<source>[a-z]{3})"
+    r"\s+(?:to|in|into|as)\s+(?P<target>[a-z]{3})$",
+    re.IGNORECASE,
+)
+_REGEX = re.compile(
+    r"^(?:test|match|run|apply|check)\s+(?:the\s+)?(?:regex|regular expression|pattern)\s+"
+    r"(?P<quote>[`'\"/])(?P<pattern>.+?)(?P=quote)\s+(?:on|against|in|with)\s+"
+    r"(?P<text_quote>[`'\"])(?P<text>.*)(?P=text_quote)$",
+    re.IGNORECASE | re.DOTALL,
+)
+_ARITHMETIC_PREFIX = re.compile(r"^(?:what(?:'s| is)|calculate|compute|evaluate|solve)\s+", re.IGNORECASE)
+_ARITHMETIC_CHARS = re.compile(r"^[\d\s+\-*/%().,\[\]a-z_]+$")
+_ARITHMETIC_OPERATION = re.compile(r"[\d)\]a-z]\s*(?:\*\*|[-+*/%])\s*[\d(\[.a-z]|[a-z_]+\s*\(")
+_FAILURE_PREFIXES = ("Error", "Calculation error", "Unknown timezone")
+
+_timezones: Dict[str, str] = {}
+_timezones_lock = threading.Lock()
+
+
+def _timezone_names() -> Dict[str, str]:
+    # Lower-case zone names and city names ('new york' -> 'America/New_York'), built on first use.
+    with _timezones_lock:
+        if not _timezones:
+            import pytz
+            _timezones.update((zone.lower(), zone) for zone in pytz.all_timezones)
+            for zone in pytz.all_timezones:
+                _timezones.setdefault(zone.rsplit("/", 1)[-1].replace("_", " ").lower(), zone)
+        return _timezones
+
+
+def _plain(output: str) -> str:
+    return output
+
+
+def _parse_time(prompt: str) -> Optional[Route]:
+    match = _TIME.match(prompt)
+    if not match:
+        return None
+    place = (match.group("place") or "utc").strip().lower()
+    zone = _timezone_names().get(place)
+    return ("current_time", {"timezone": zone}, _plain) if zone else None
+
+
+def _parse_currency(prompt: str) -> Optional[Route]:
+    match = _CURRENCY.match(prompt)
+    if not match:
+        return None
+    source, target = match.group("source").upper(), match.group("target").upper()
+    if source not in ISO_CURRENCIES or target not in ISO_CURRENCIES:
+        return None
+    arguments = {"amount": match.group("amount").replace(",", ""), "from_currency": source, "to_currency": target}
+    return "currency_converter", arguments, _plain
+
+
+def _parse_regex(prompt: str) -> Optional[Route]:
+    match = _REGEX.match(prompt)
+    if not match:
+        return None
+    return "regex_matcher", {"pattern": match.group("pattern"), "text": match.group("text")}, _plain
+
+
+def _parse_arithmetic(prompt: str) -> Optional[Route]:
+    expression = _ARITHMETIC_PREFIX.sub("", prompt).rstrip("= ").strip()
+    if not _ARITHMETIC_CHARS.match(expression) or not _ARITHMETIC_OPERATION.search(expression):
+        return None
+    if "," in expression and "(" not in expression and "[" not in expression:
+        return None  # '1,000 + 5' is a thousands separator, not a tuple
+    names = re.findall(r"[a-z_]+", expression)
+    if names:
+        from src.calculator import CONSTANTS, FUNCTIONS
+        if any(name not in FUNCTIONS and name not in CONSTANTS for name in names):
+            return None
+    return "calculator", {"expression": expression}, lambda output: f"{expression} = {output}"
+
+
+# Checked in order; the first parser that recognizes the prompt wins.
+PARSERS: List[Tuple[str, Callable[[str], Optional[Route]]]] = [
+    ("regex", _parse_regex),
+    ("currency", _parse_currency),
+    ("time", _parse_time),
+    ("arithmetic", _parse_arithmetic),
+]
+
+
+@dataclass
+class FastPathAnswer:
+    """An answer produced by a tool without the agent."""
+    intent: str
+    tool: str
+    answer: str
+    seconds: float
+
+
+class FastPathRouter:
+    """
+    Answers trivial prompts with one tool call instead of a full agent run.
+
+    Each intent has a strict local parser; a prompt is only answered directly when a
+    parser recognizes all of it and the tool succeeds, otherwise it goes to the agent.
+    Tools are called through the shared tool registry, so deadlines, circuit breakers
+    and metrics apply as they do for agent calls.
+    """
+    def __init__(self, assumed_agent_seconds: float = FAST_PATH_ASSUMED_AGENT_SECONDS):
+        """
+        Initializes the FastPathRouter.
+
+        Args:
+            assumed_agent_seconds (float): Agent latency used to estimate time saved until real
+                                           agent runs have been measured.
+        """
+        self._agent_seconds = assumed_agent_seconds
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._stats: Dict[str, Dict[str, float]] = {
+            intent: {"matched": 0, "answered": 0, "fallbacks": 0, "fast_seconds": 0.0, "saved_seconds": 0.0}
+            for intent, _ in PARSERS
+        }
+
+    def _tools(self) -> Dict[str, Callable[..., str]]:
+        from src.tools import get_agent_tools
+        return {tool.name: tool.func for tool in get_agent_tools(structured=True)}
+
+    def route(self, prompt: str) -> Optional[FastPathAnswer]:
+        """
+        Answers a prompt directly if it has a recognized intent.
+
+        Args:
+            prompt (str): The user's input.
+
+        Returns:
+            Optional[FastPathAnswer]: The answer, or None if the agent should handle the prompt.
+        """
+        start = time.perf_counter()
+        text = prompt.strip().rstrip("?!. ").strip()
+        with self._lock:
+            self._queries += 1
+        for intent, parse in PARSERS:
+            route = parse(text)
+            if route is not None:
+                break
+        else:
+            return None
+
+        tool_name, arguments, format_output = route
+        tool = self._tools().get(tool_name)  # Missing while the tool's circuit breaker is open
+        output = tool(**arguments) if tool else None
+        seconds = time.perf_counter() - start
+        answered = isinstance(output, str) and not isinstance(output, ToolFailure) \
+            and not output.startswith(_FAILURE_PREFIXES)
+        with self._lock:
+            stats = self._stats[intent]
+            stats["matched"] += 1
+            if not answered:
+                stats["fallbacks"] += 1
+            else:
+                stats["answered"] += 1
+                stats["fast_seconds"] += seconds
+                stats["saved_seconds"] += max(0.0, self._agent_seconds - seconds)
+        if not answered:
+            logger.info(f"Fast path for {intent} fell back to the agent: {str(output)[:100]}")
+            return None
+        logger.info(f"Fast path answered {intent} with {tool_name} in {seconds * 1000:.1f} ms")
+        return FastPathAnswer(intent, tool_name, format_output(output), seconds)
+
+    def record_agent_latency(self, seconds: float) -> None:
+        """Feeds a measured agent run into the moving average used to estimate time saved."""
+        with self._lock:
+            self._agent_seconds += FAST_PATH_AGENT_SMOOTHING * (seconds - self._agent_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns fast-path hit rates and time saved.
+
+        Returns:
+            Dict[str, Any]: queries, answered, hit_rate, saved_seconds, agent_seconds (the moving
+                            average), and per-intent matched/answered/fallbacks, mean_ms and saved_seconds.
+        """
+        with self._lock:
+            intents = {}
+            for intent, s in self._stats.items():
+                intents[intent] = {
+                    "matched": int(s["matched"]),
+                    "answered": int(s["answered"]),
+                    "fallbacks": int(s["fallbacks"]),
+                    "mean_ms": (s["fast_seconds"] / s["answered"] * 1000) if s["answered"] else 0.0,
+                    "saved_seconds": s["saved_seconds"],
+                }
+            answered = sum(s["answered"] for s in intents.values())
+            return {
+                "queries": self._queries,
+                "answered": answered,
+                "hit_rate": (answered / self._queries) if self._queries else 0.0,
+                "saved_seconds": sum(s["saved_seconds"] for s in intents.values()),
+                "agent_seconds": self._agent_seconds,
+                "intents": intents,
+            }
+
+
+_fast_path_router: Optional[FastPathRouter] = None
+_fast_path_router_lock = threading.Lock()
+
+
+def get_fast_path_router() -> Optional[FastPathRouter]:
+    """Returns the process-wide fast-path router, or None if it is disabled."""
+    global _fast_path_router
+    if not FAST_PATH_ENABLED:
+        return None
+    with _fast_path_router_lock:
+        if _fast_path_router is None:
+            _fast_path_router = FastPathRouter()
+        return _fast_path_router
@@ -0,0 +1,314 @@
+# src/sandbox.py
+
+import importlib
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from src.config import (
+    SANDBOX_POOL_SIZE, SANDBOX_MAX_RUNS_PER_WORKER, SANDBOX_WALL_TIMEOUT, SANDBOX_ACQUIRE_TIMEOUT,
+    SANDBOX_CPU_SECONDS, SANDBOX_MEMORY_BYTES, SANDBOX_MAX_OUTPUT
+)
+from src.utils import logger
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; workers then run without rlimits.
+    resource = None
+
+
+_STARTUP_TIMEOUT = 60  # Seconds a new worker may take to import its modules
+
+
+class SandboxError(Exception):
+    """Raised when a sandboxed task cannot produce a result."""
+
+
+class SandboxTimeout(SandboxError):
+    """Raised when a sandboxed task exceeds its wall-clock limit."""
+
+
+def run_restricted_python(code: str, max_output: int = SANDBOX_MAX_OUTPUT) -> str:
+    """
+    Executes a Python snippet with a restricted set of builtins and captures its printed output.
+
+    Args:
+        code (str): Python code to execute.
+        max_output (int): Maximum number of output characters kept.
+
+    Returns:
+        str: Captured output, or a note that the code produced none.
+    """
+    output = []
+    size = 0
+    truncated = False
+
+    def capture_print(*args, **kwargs):
+        nonlocal size, truncated
+        if truncated:
+            return
+        line = " ".join(map(str, args))
+        if size + len(line) > max_output:
+            line = line[:max(0, max_output - size)]
+            truncated = True
+        output.append(line)
+        size += len(line) + 1
+
+    # Restricted environment for safe execution
+    safe_globals = {"__builtins__": {
+        "print": capture_print,
+        "range": range,
+        "len": len,
+        "int": int,
+        "float": float,
+        "str": str,
+        "list": list,
+        "dict": dict,
+        "set": set,
+        "tuple": tuple,
+    }}
+    exec(code, safe_globals, {})
+    if truncated:
+        output.append(f"... [output truncated at {max_output} characters]")
+    return "\n".join(output) if output else "Code executed successfully (no output)."
+
+
+# Tasks a sandbox worker may run, by name, as "module:function". Workers import a
+# task's module on first use; arguments and results must be picklable.
+SANDBOX_TASKS: Dict[str, str] = {
+    "python": "src.sandbox:run_restricted_python",
+    "regex": "src.regex_engine:find_matches",
+}
+
+
+def _resolve_task(task: str, cache: Dict[str, Callable[..., Any]]) -> Callable[..., Any]:
+    func = cache.get(task)
+    if func is None:
+        module, name = SANDBOX_TASKS[task].split(":")
+        func = cache[task] = getattr(importlib.import_module(module), name)
+    return func
+
+
+def _apply_memory_limit(memory_bytes: Optional[int]) -> None:
+    if resource is not None and memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def _apply_cpu_budget(cpu_seconds: Optional[float]) -> None:
+    # RLIMIT_CPU counts the whole process lifetime, so each run gets "used so far + budget".
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, cpu_seconds: Optional[float], memory_bytes: Optional[int]) -> None:
+    """Entry point of a sandbox process: runs tasks received over `conn` until it is closed."""
+    _apply_memory_limit(memory_bytes)
+    tasks: Dict[str, Callable[..., Any]] = {}
+    conn.send(("ready", None))
+    while True:
+        try:
+            task, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        _apply_cpu_budget(cpu_seconds)
+        try:
+            conn.send(("ok", _resolve_task(task, tasks)(*args)))
+        except MemoryError:
+            conn.send(("error", "MemoryError: memory limit exceeded"))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "runs")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.runs = 0
+
+    def stop(self) -> None:
+        try:
+            self.conn.close()
+        finally:
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join(timeout=1)
+
+
+class SandboxPool:
+    """
+    Pool of warm sandbox processes that run untrusted snippets outside the server process.
+
+    Each worker runs under address-space and per-run CPU-time rlimits. A run that
+    exceeds its wall-clock timeout gets its worker killed, and workers are recycled
+    after a number of runs. Replacement workers are started in the background so
+    callers rarely wait for a cold interpreter.
+    """
+    def __init__(self,
+                 size: int = SANDBOX_POOL_SIZE,
+                 max_runs_per_worker: int = SANDBOX_MAX_RUNS_PER_WORKER,
+                 wall_timeout: float = SANDBOX_WALL_TIMEOUT,
+                 acquire_timeout: float = SANDBOX_ACQUIRE_TIMEOUT,
+                 cpu_seconds: Optional[float] = SANDBOX_CPU_SECONDS,
+                 memory_bytes: Optional[int] = SANDBOX_MEMORY_BYTES):
+        """
+        Initializes the SandboxPool.
+
+        Args:
+            size (int): Number of warm worker processes.
+            max_runs_per_worker (int): Runs after which a worker is replaced.
+            wall_timeout (float): Default wall-clock limit per run, in seconds.
+            acquire_timeout (float): Seconds to wait for a free worker.
+            cpu_seconds (Optional[float]): CPU-time limit per run.
+            memory_bytes (Optional[int]): Address-space limit per worker.
+        """
+        methods = multiprocessing.get_all_start_methods()
+        if "forkserver" in methods:
+            # Workers fork from a server that already imported this module, so a new worker is cheap.
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload([__name__])
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        self._size = size
+        self._max_runs = max_runs_per_worker
+        self._wall_timeout = wall_timeout
+        self._acquire_timeout = acquire_timeout
+        self._cpu_seconds = cpu_seconds
+        self._memory_bytes = memory_bytes
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {"runs": 0, "errors": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "spawned": 0}
+
+    def _spawn(self, attempts: int = 3) -> None:
+        for attempt in range(1, attempts + 1):
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(child_conn, self._cpu_seconds, self._memory_bytes),
+                name="sandbox-worker",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            worker = _Worker(process, parent_conn)
+            # Only hand out workers that finished starting, so interpreter startup never eats into a run's time limit.
+            try:
+                ready = parent_conn.poll(_STARTUP_TIMEOUT) and parent_conn.recv()[0] == "ready"
+            except (EOFError, OSError):
+                ready = False
+            if ready:
+                with self._lock:
+                    self._stats["spawned"] += 1
+                self._idle.put(worker)
+                return
+            worker.stop()
+            logger.error(f"Sandbox worker failed to start (attempt {attempt}/{attempts})")
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.stop()
+        threading.Thread(target=self._spawn, name="sandbox-spawn", daemon=True).start()
+
+    def start(self) -> None:
+        """Starts the warm workers in the background; safe to call more than once."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self._size):
+            threading.Thread(target=self._spawn, name="sandbox-spawn", daemon=True).start()
+
+    def wait_until_warm(self, timeout: float = 30.0) -> bool:
+        """Starts the pool and blocks until every worker is idle and ready, or the timeout passes."""
+        self.start()
+        deadline = time.monotonic() + timeout
+        while self._idle.qsize() < self._size:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def run(self, task: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Runs a named task in a sandbox worker.
+
+        Args:
+            task (str): Name of a task in SANDBOX_TASKS.
+            timeout (Optional[float]): Wall-clock limit in seconds for the run itself, once a worker is free.
+
+        Returns:
+            Any: The task result.
+
+        Raises:
+            SandboxError: On timeout, resource-limit violations, worker crashes or task errors.
+        """
+        self.start()
+        timeout = self._wall_timeout if timeout is None else timeout
+        try:
+            worker = self._idle.get(timeout=self._acquire_timeout)
+        except queue.Empty:
+            raise SandboxTimeout(f"No sandbox worker available within {self._acquire_timeout:.1f}s")
+        deadline = time.monotonic() + timeout
+
+        with self._lock:
+            self._stats["runs"] += 1
+        try:
+            worker.conn.send((task, args))
+            if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                self._replace(worker)
+                raise SandboxTimeout(f"Execution exceeded the {timeout:.1f}s time limit and was stopped")
+            status, result = worker.conn.recv()
+        except (EOFError, OSError):
+            # The worker died, typically from the CPU-time rlimit (SIGXCPU) or the OOM killer.
+            worker.process.join(timeout=1)
+            with self._lock:
+                self._stats["crashes"] += 1
+            self._replace(worker)
+            raise SandboxError(f"Sandbox process terminated (exit code {worker.process.exitcode}); "
+                               "the code likely exceeded its CPU or memory limit.")
+
+        worker.runs += 1
+        if worker.runs >= self._max_runs:
+            with self._lock:
+                self._stats["recycled"] += 1
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+
+        if status != "ok":
+            with self._lock:
+                self._stats["errors"] += 1
+            raise SandboxError(result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Returns run, timeout, crash and recycling counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["idle_workers"] = self._idle.qsize()
+        return stats
+
+
+_sandbox_pool: Optional[SandboxPool] = None
+_sandbox_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Returns the process-wide sandbox pool, starting its workers on first use."""
+    global _sandbox_pool
+    with _sandbox_pool_lock:
+        if _sandbox_pool is None:
+            _sandbox_pool = SandboxPool()
+            _sandbox_pool.start()
+            logger.info(f"Sandbox pool started with {SANDBOX_POOL_SIZE} workers")
+        return _sandbox_pool
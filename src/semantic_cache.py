@@ -0,0 +1,233 @@
+# src/semantic_cache.py
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from src.config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_CAPACITY,
+    SEMANTIC_CACHE_DEFAULT_TTL, SEMANTIC_CACHE_TOOL_TTLS
+)
+from src.embeddings import HashedNgramEmbedder
+from src.router import ISO_CURRENCIES
+from src.utils import logger
+
+# Numbers and currency codes, whose order decides the answer ("100 USD to EUR" vs "100 EUR to USD").
+_ENTITY_PATTERN = re.compile(r"\d+(?:\.\d+)?|\b[a-z]{3}\b", re.IGNORECASE)
+
+
+@dataclass
+class SemanticCacheEntry:
+    """A cached agent answer and the input it was produced for."""
+    query: str
+    answer: str
+    tools_used: List[str]
+    entities: tuple
+    created_at: float
+    expires_at: float
+    hits: int = 0
+
+
+@dataclass
+class SemanticCacheHit:
+    """Result of a successful semantic cache lookup."""
+    entry_id: int
+    answer: str
+    similarity: float
+    cached_query: str
+    age: float = field(default=0.0)
+
+
+class SemanticCache:
+    """
+    Answer cache that matches new inputs to past ones by embedding similarity.
+
+    Embeddings of cached inputs live in a preallocated NumPy matrix, so a lookup is
+    one matrix-vector product. The bag-of-n-grams embedding ignores word order, so a
+    hit also needs the same numbers and currency codes in the same order. Answers
+    only depend on the input itself, so callers should neither look up nor store
+    turns that follow earlier conversation. Entries expire according to the tools used to produce
+    them (time and weather answers go stale quickly, encyclopedic ones do not), and
+    the least recently used entry is evicted when the matrix is full.
+    """
+    def __init__(self,
+                 embedder: Optional[HashedNgramEmbedder] = None,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 capacity: int = SEMANTIC_CACHE_CAPACITY,
+                 default_ttl: float = SEMANTIC_CACHE_DEFAULT_TTL,
+                 tool_ttls: Optional[Dict[str, float]] = None):
+        """
+        Initializes the SemanticCache.
+
+        Args:
+            embedder (Optional[HashedNgramEmbedder]): Embedding function for inputs.
+            threshold (float): Minimum cosine similarity for a hit.
+            capacity (int): Maximum number of cached answers.
+            default_ttl (float): Lifetime of answers produced without tools, in seconds.
+            tool_ttls (Optional[Dict[str, float]]): Lifetime per tool; 0 disables caching
+                                                    answers that used that tool.
+        """
+        self._embedder = embedder or HashedNgramEmbedder()
+        self._threshold = threshold
+        self._capacity = capacity
+        self._default_ttl = default_ttl
+        self._tool_ttls = SEMANTIC_CACHE_TOOL_TTLS if tool_ttls is None else tool_ttls
+        self._vectors = np.zeros((capacity, self._embedder.dim), dtype=np.float32)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._entries: List[Optional[SemanticCacheEntry]] = [None] * capacity
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+                       "expired": 0, "rejected_near_hits": 0, "false_hits": 0}
+
+    def ttl_for(self, tools_used: Iterable[str]) -> float:
+        """Returns how long an answer may be reused, given the tools that produced it."""
+        ttls = [self._tool_ttls.get(tool, self._default_ttl) for tool in tools_used]
+        return min(ttls) if ttls else self._default_ttl
+
+    def lookup(self, query: str) -> Optional[SemanticCacheHit]:
+        """
+        Finds a fresh cached answer for an input similar enough to `query`.
+
+        Args:
+            query (str): The user input.
+
+        Returns:
+            Optional[SemanticCacheHit]: The cached answer, or None on a miss.
+        """
+        vector = self._embedder.embed(query)
+        now = time.time()
+        with self._lock:
+            if not self._valid.any():
+                self._stats["misses"] += 1
+                return None
+            similarities = self._vectors @ vector
+            similarities[~self._valid] = -1.0
+            index = int(np.argmax(similarities))
+            similarity = float(similarities[index])
+            entry = self._entries[index]
+
+            if similarity < self._threshold or entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry.expires_at < now:
+                self._invalidate(index)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            if entry.entities != self._entities(query):
+                # "100 USD to EUR", "200 USD to EUR" and "100 EUR to USD" embed almost identically.
+                self._stats["rejected_near_hits"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            entry.hits += 1
+            self._last_used[index] = now
+            self._stats["hits"] += 1
+            return SemanticCacheHit(
+                entry_id=index,
+                answer=entry.answer,
+                similarity=similarity,
+                cached_query=entry.query,
+                age=now - entry.created_at
+            )
+
+    def store(self, query: str, answer: str, tools_used: Iterable[str] = ()) -> Optional[int]:
+        """
+        Caches an agent answer unless one of its tools forbids it.
+
+        Args:
+            query (str): The user input.
+            answer (str): The agent's final answer.
+            tools_used (Iterable[str]): Names of the tools the agent called.
+
+        Returns:
+            Optional[int]: The entry id, or None if the answer was not cached.
+        """
+        tools_used = sorted(set(tools_used))
+        ttl = self.ttl_for(tools_used)
+        if ttl <= 0:
+            return None
+        vector = self._embedder.embed(query)
+        now = time.time()
+        with self._lock:
+            index = self._free_slot(now)
+            self._vectors[index] = vector
+            self._valid[index] = True
+            self._last_used[index] = now
+            self._entries[index] = SemanticCacheEntry(
+                query=query,
+                answer=answer,
+                tools_used=tools_used,
+                entities=self._entities(query),
+                created_at=now,
+                expires_at=now + ttl
+            )
+            self._stats["stores"] += 1
+            return index
+
+    def report_false_hit(self, entry_id: int) -> None:
+        """Records that a served answer did not fit the question and drops the entry."""
+        with self._lock:
+            self._stats["false_hits"] += 1
+            self._invalidate(entry_id)
+        logger.info(f"Semantic cache false hit reported for entry {entry_id}")
+
+    def clear(self) -> None:
+        """Drops all cached answers."""
+        with self._lock:
+            self._valid[:] = False
+            self._entries = [None] * self._capacity
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns entry count and hit/miss/false-hit counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = int(self._valid.sum())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] / lookups) if lookups else 0.0
+        stats["false_hit_rate"] = (stats["false_hits"] / stats["hits"]) if stats["hits"] else 0.0
+        return stats
+
+    def _free_slot(self, now: float) -> int:
+        free = np.flatnonzero(~self._valid)
+        if free.size:
+            return int(free[0])
+        expired = [i for i, entry in enumerate(self._entries) if entry is not None and entry.expires_at < now]
+        if expired:
+            self._stats["expired"] += len(expired)
+            for i in expired:
+                self._invalidate(i)
+            return expired[0]
+        index = int(np.argmin(self._last_used))
+        self._invalidate(index)
+        self._stats["evictions"] += 1
+        return index
+
+    def _invalidate(self, index: int) -> None:
+        self._valid[index] = False
+        self._entries[index] = None
+
+    @staticmethod
+    def _entities(text: str) -> tuple:
+        return tuple(token.upper() for token in _ENTITY_PATTERN.findall(text)
+                     if token[0].isdigit() or token.upper() in ISO_CURRENCIES)
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Returns the process-wide semantic cache, or None if it is disabled."""
+    global _semantic_cache
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache()
+            logger.info(f"Semantic cache initialized (capacity={SEMANTIC_CACHE_CAPACITY}, "
+                        f"threshold={SEMANTIC_CACHE_THRESHOLD})")
+        return _semantic_cache
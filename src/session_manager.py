@@ -0,0 +1,250 @@
+# src/session_manager.py
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import (
+    SESSION_EXPIRATION, SESSION_MEMORY_CEILING, SESSION_BASE_BYTES, SESSION_SWEEP_INTERVAL, SESSION_SECRET,
+    SESSION_SECRET_PATH
+)
+from src.memory import drop_memory_state, memory_footprint
+from src.tools import get_dataset_registry
+from src.utils import logger
+
+
+_secret: Optional[bytes] = None
+_secret_lock = threading.Lock()
+
+
+def _session_secret() -> bytes:
+    # SESSION_SECRET, else a random key kept in SESSION_SECRET_PATH so tokens survive restarts.
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            if SESSION_SECRET:
+                _secret = SESSION_SECRET.encode("utf-8")
+            elif os.path.exists(SESSION_SECRET_PATH):
+                with open(SESSION_SECRET_PATH, "rb") as f:
+                    _secret = f.read().strip()
+            else:
+                directory = os.path.dirname(SESSION_SECRET_PATH)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                _secret = secrets.token_urlsafe(48).encode("ascii")
+                fd = os.open(SESSION_SECRET_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_secret)
+        return _secret
+
+
+def _signature(session_id: str) -> str:
+    digest = hmac.new(_session_secret(), session_id.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def issue_session() -> Tuple[str, str]:
+    """
+    Creates a session id and the signed token that identifies the browser holding it.
+
+    Returns:
+        Tuple[str, str]: The session id (256 random bits) and the token '<id>.<signature>'.
+    """
+    session_id = secrets.token_urlsafe(32)
+    return session_id, f"{session_id}.{_signature(session_id)}"
+
+
+def verify_session_token(token: Optional[str]) -> Optional[str]:
+    """Returns the session id of a token issued by this server, or None if the token is missing or forged."""
+    session_id, _, signature = (token or "").partition(".")
+    if not session_id or not signature:
+        return None
+    return session_id if hmac.compare_digest(signature, _signature(session_id)) else None
+
+
+@dataclass
+class SessionAgent:
+    """The agent state of one session: executor, model, memory and the tools it was built with."""
+    executor: Any
+    llm: Any
+    memory: Any
+    memory_type: str
+    tool_names: Tuple[str, ...]
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+    bytes: int = SESSION_BASE_BYTES
+    extra_bytes: int = 0  # Reported by the caller, e.g. the displayed transcript
+
+
+class SessionManager:
+    """
+    Holds the agents of all sessions in this process and bounds their memory.
+
+    Sessions are kept in least-recently-used order. A session idle for longer than
+    `expiration` is evicted, and while the estimated total exceeds `ceiling` the least
+    recently used sessions are evicted as well, never the one currently being served.
+    Eviction drops the agent and the session's cached summary and recall state; the
+    next request rebuilds the agent from the persistent history, or from the
+    transcript the caller still holds when no backend is available. Memory pressure
+    also unloads the session's datasets, which reload from disk when queried; an idle
+    or manual eviction ends the session and deletes its uploaded datasets.
+    """
+    def __init__(self, expiration: float = SESSION_EXPIRATION, ceiling: int = SESSION_MEMORY_CEILING,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL):
+        """
+        Initializes the SessionManager.
+
+        Args:
+            expiration (float): Idle seconds after which a session is evicted.
+            ceiling (int): Estimated bytes of all sessions beyond which LRU sessions are evicted.
+            sweep_interval (float): Minimum seconds between sweeps for idle sessions.
+        """
+        self._expiration = expiration
+        self._ceiling = ceiling
+        self._sweep_interval = sweep_interval
+        self._sessions: "OrderedDict[str, SessionAgent]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._turn_locks: Dict[str, threading.Lock] = {}
+        self.evictions = {"idle": 0, "memory": 0, "manual": 0}
+
+    def register(self, session_id: str, agent: SessionAgent) -> None:
+        """Stores the agent of a session, replacing any previous one, and enforces the limits."""
+        agent.bytes = SESSION_BASE_BYTES + memory_footprint(agent.memory) + agent.extra_bytes
+        with self._lock:
+            self._sessions[session_id] = agent
+            self._sessions.move_to_end(session_id)
+        self.enforce(current=session_id)
+
+    def get(self, session_id: str) -> Optional[SessionAgent]:
+        """Returns the agent of a session and marks it as used, or None if there is none (or it was evicted)."""
+        with self._lock:
+            agent = self._sessions.get(session_id)
+            if agent is not None:
+                agent.last_access = time.time()
+                self._sessions.move_to_end(session_id)
+        self._maybe_sweep(session_id)
+        return agent
+
+    def update(self, session_id: str, extra_bytes: Optional[int] = None) -> None:
+        """
+        Re-measures a session after a turn and enforces the limits.
+
+        Args:
+            session_id (str): Session identifier.
+            extra_bytes (Optional[int]): Caller-held state to count for the session; None keeps the last value.
+        """
+        with self._lock:
+            agent = self._sessions.get(session_id)
+        if agent is None:
+            return
+        if extra_bytes is not None:
+            agent.extra_bytes = extra_bytes
+        agent.bytes = SESSION_BASE_BYTES + memory_footprint(agent.memory) + agent.extra_bytes
+        agent.last_access = time.time()
+        self.enforce(current=session_id)
+
+    def turn_lock(self, session_id: str) -> threading.Lock:
+        """Returns the lock a request holds while it runs a turn of the session, e.g. to keep two tabs apart."""
+        with self._lock:
+            lock = self._turn_locks.get(session_id)
+            if lock is None:
+                lock = self._turn_locks[session_id] = threading.Lock()
+            return lock
+
+    def evict(self, session_id: str, reason: str = "manual") -> bool:
+        """Drops a session's agent and cached memory state; returns False if it was not held."""
+        with self._lock:
+            agent = self._sessions.pop(session_id, None)
+            lock = self._turn_locks.get(session_id)
+            if lock is not None and not lock.locked():
+                del self._turn_locks[session_id]
+            if agent is not None:
+                self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        drop_memory_state(session_id)
+        if reason == "memory":
+            get_dataset_registry().unload_session(session_id)
+        else:
+            get_dataset_registry().release_session(session_id)
+        if agent is None:
+            return False
+        logger.info(f"Evicted session {session_id} ({reason}, ~{agent.bytes // 1024} KB)")
+        return True
+
+    def _maybe_sweep(self, current: Optional[str]) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self._sweep_interval:
+                return
+            self._last_sweep = now
+        self.enforce(current=current)
+
+    def enforce(self, current: Optional[str] = None) -> List[str]:
+        """
+        Evicts idle sessions, then least recently used ones while over the memory ceiling.
+
+        Args:
+            current (Optional[str]): Session being served, which is never evicted.
+
+        Returns:
+            List[str]: Evicted session ids.
+        """
+        now = time.time()
+        victims: List[Tuple[str, str]] = []
+        with self._lock:
+            total = sum(agent.bytes for agent in self._sessions.values())
+            for session_id, agent in self._sessions.items():  # Least recently used first
+                if session_id == current:
+                    continue
+                if now - agent.last_access > self._expiration:
+                    victims.append((session_id, "idle"))
+                elif total > self._ceiling:
+                    victims.append((session_id, "memory"))
+                else:
+                    continue
+                total -= agent.bytes
+        for session_id, reason in victims:
+            self.evict(session_id, reason)
+        if total > self._ceiling:
+            logger.warning(f"Session memory ~{total // (1024 * 1024)} MB exceeds the ceiling with one session left")
+        return [session_id for session_id, _ in victims]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns live session count, estimated bytes in total and per session, and evictions by reason.
+
+        Returns:
+            Dict[str, Any]: sessions, total_bytes, ceiling_bytes, evictions and per_session
+                            ({session_id: {bytes, idle_seconds, memory_type}}, most recent first).
+        """
+        now = time.time()
+        with self._lock:
+            per_session = {
+                session_id: {
+                    "bytes": agent.bytes,
+                    "idle_seconds": now - agent.last_access,
+                    "memory_type": agent.memory_type,
+                }
+                for session_id, agent in reversed(self._sessions.items())
+            }
+            return {
+                "sessions": len(per_session),
+                "total_bytes": sum(s["bytes"] for s in per_session.values()),
+                "ceiling_bytes": self._ceiling,
+                "evictions": dict(self.evictions),
+                "per_session": per_session,
+            }
+
+
+_session_manager = SessionManager()
+
+
+def get_session_manager() -> SessionManager:
+    """Returns the process-wide session manager."""
+    return _session_manager
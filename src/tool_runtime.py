@@ -0,0 +1,249 @@
+# src/tool_runtime.py
+
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional
+from src.config import TOOL_TIMEOUT, TOOL_TIMEOUTS, TOOL_RUNTIME_MAX_WORKERS, TOOL_RUNTIME_MAX_ABANDONED
+from src.metrics import get_tool_metrics
+from src.utils import logger
+
+
+class ToolFailure(str):
+    """
+    Tool observation that reports a failure.
+
+    It is an ordinary string for the agent, but lets the runtime and callers tell
+    failed calls apart from successful output without parsing the text.
+    """
+    kind = "error"
+
+
+class ToolTimeout(ToolFailure):
+    """Observation returned when a tool exceeds its deadline."""
+    kind = "timeout"
+
+
+class _Job:
+    __slots__ = ("future", "func", "args", "kwargs", "abandoned", "deadline", "context")
+
+    def __init__(self, func: Callable, args: tuple, kwargs: dict, deadline: float):
+        self.future: Future = Future()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.abandoned = False
+        self.deadline = deadline
+        # Workers run the call in the caller's context, so context variables (e.g. the session) carry over.
+        self.context = contextvars.copy_context()
+
+
+# Session on whose behalf tools are called; tools that hold per-session data check it.
+_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("tool_session", default=None)
+
+
+@contextmanager
+def session_scope(session_id: Optional[str]) -> Iterator[None]:
+    """Makes `session_id` the current session for tool calls started inside the block."""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+def current_session() -> Optional[str]:
+    """Returns the session the running tool call belongs to, or None outside a session scope."""
+    return _session.get()
+
+
+# Deadline (time.monotonic()) of the call running on the current worker thread.
+_current = threading.local()
+
+
+def tool_deadline() -> Optional[float]:
+    """Returns the time.monotonic() deadline of the tool call running on this thread, or None outside one."""
+    return getattr(_current, "deadline", None)
+
+
+class ToolRuntime:
+    """
+    Executes tool functions on a managed worker pool under per-tool deadlines.
+
+    Python threads cannot be killed, so a call that misses its deadline is abandoned:
+    the caller gets a ToolTimeout observation immediately, a replacement worker takes
+    the stuck worker's place, and the stuck thread exits as soon as its call returns.
+    The number of abandoned threads is capped; at the cap, new calls fail fast instead
+    of spawning more threads.
+    """
+    def __init__(self, max_workers: int = TOOL_RUNTIME_MAX_WORKERS, max_abandoned: int = TOOL_RUNTIME_MAX_ABANDONED):
+        """
+        Initializes the ToolRuntime.
+
+        Args:
+            max_workers (int): Maximum number of live worker threads.
+            max_abandoned (int): Maximum number of abandoned threads still running stuck calls.
+        """
+        self._max_workers = max_workers
+        self._max_abandoned = max_abandoned
+        self._jobs: "queue.SimpleQueue[_Job]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._live_workers = 0
+        self._idle_workers = 0
+        self._queued_jobs = 0  # Submitted, not yet taken by a worker
+        self._abandoned_workers = 0
+        self._worker_seq = 0
+        self._tool_stats: Dict[str, Dict[str, float]] = {}
+
+    def _can_spawn_locked(self) -> bool:
+        return (self._live_workers < self._max_workers
+                and self._live_workers + self._abandoned_workers < self._max_workers + self._max_abandoned)
+
+    def _spawn_worker_locked(self) -> None:
+        self._worker_seq += 1
+        self._live_workers += 1
+        thread = threading.Thread(target=self._worker_loop, name=f"tool-runtime-{self._worker_seq}", daemon=True)
+        thread.start()
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._lock:
+                self._idle_workers += 1
+            job = self._jobs.get()
+            with self._lock:
+                self._idle_workers -= 1
+                self._queued_jobs -= 1
+
+            if job.future.set_running_or_notify_cancel():
+                _current.deadline = job.deadline
+                try:
+                    job.future.set_result(job.context.run(job.func, *job.args, **job.kwargs))
+                except BaseException as e:
+                    job.future.set_exception(e)
+                finally:
+                    _current.deadline = None
+
+            with self._lock:
+                if job.abandoned:
+                    # A replacement was already started; this thread retires.
+                    self._abandoned_workers -= 1
+                    return
+
+    def _stats_for(self, name: str) -> Dict[str, float]:
+        stats = self._tool_stats.get(name)
+        if stats is None:
+            stats = {"calls": 0, "in_flight": 0, "timeouts": 0, "rejected": 0, "timeout_seconds": 0.0}
+            self._tool_stats[name] = stats
+        return stats
+
+    def run(self, name: str, func: Callable, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Runs `func` on the worker pool and waits at most `timeout` seconds.
+
+        Args:
+            name (str): Tool name, used for per-tool timeouts and statistics.
+            func (Callable): The tool function.
+            timeout (Optional[float]): Deadline in seconds; defaults to the tool's configured timeout.
+
+        Returns:
+            Any: The tool's result, or a ToolTimeout/ToolFailure observation.
+        """
+        timeout = TOOL_TIMEOUTS.get(name, TOOL_TIMEOUT) if timeout is None else timeout
+        job = _Job(func, args, kwargs, time.monotonic() + timeout)
+        with self._lock:
+            stats = self._stats_for(name)
+            stats["timeout_seconds"] = timeout
+            # Idle workers may already be spoken for by queued jobs they have not picked up yet.
+            if self._queued_jobs >= self._idle_workers:
+                if self._can_spawn_locked():
+                    self._spawn_worker_locked()
+                elif self._live_workers == 0:
+                    # Every thread we may own is stuck in an abandoned call.
+                    stats["rejected"] += 1
+                    return ToolFailure(f"Error in {name}: tool runtime is saturated by stuck calls. "
+                                       "Please try again later.")
+            self._queued_jobs += 1
+            stats["calls"] += 1
+            stats["in_flight"] += 1
+        self._jobs.put(job)
+
+        try:
+            return job.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                stats["timeouts"] += 1
+                if not job.future.cancel():
+                    job.abandoned = True
+                    self._live_workers -= 1
+                    self._abandoned_workers += 1
+                    if self._can_spawn_locked():
+                        self._spawn_worker_locked()
+            get_tool_metrics().record_timeout(name)
+            logger.warning(f"Tool '{name}' timed out after {timeout:.1f}s")
+            return ToolTimeout(
+                f"Error in {name}: no result within {timeout:.1f}s (timeout). "
+                "The service may be slow or unavailable; try again later or use another tool."
+            )
+        finally:
+            with self._lock:
+                stats["in_flight"] -= 1
+
+    def wrap(self, name: str, func: Callable, timeout: Optional[float] = None) -> Callable:
+        """
+        Returns a version of `func` that runs through this runtime.
+
+        The wrapper keeps the original signature, so argument schemas can still be derived from it.
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(name, func, *args, timeout=timeout, **kwargs)
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns pool state and per-tool call, in-flight and timeout counters.
+
+        Returns:
+            Dict[str, Any]: {'workers': {...}, 'tools': {name: {...}}}
+        """
+        with self._lock:
+            tools = {}
+            for name, stats in self._tool_stats.items():
+                tools[name] = dict(stats)
+                tools[name]["timeout_rate"] = (stats["timeouts"] / stats["calls"]) if stats["calls"] else 0.0
+            return {
+                "workers": {
+                    "live": self._live_workers,
+                    "idle": self._idle_workers,
+                    "queued": self._queued_jobs,
+                    "abandoned": self._abandoned_workers,
+                    "max_workers": self._max_workers,
+                },
+                "tools": tools,
+            }
+
+
+_tool_runtime = ToolRuntime()
+
+
+def get_tool_runtime() -> ToolRuntime:
+    """Returns the process-wide tool runtime."""
+    return _tool_runtime
+
+
+def timed_tool(name: str, func: Callable) -> Callable:
+    """
+    Wraps a tool function so it runs under its configured deadline.
+
+    Args:
+        name (str): Tool name as registered with the agent.
+        func (Callable): The tool function.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    return _tool_runtime.wrap(name, func)
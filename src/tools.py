@@ -1,41 +1,75 @@
 # src/tools.py
 
-from langchain_community.tools import DuckDuckGoSearchRun, WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain.agents import Tool
-from typing import List, Callable, Optional
-import pytz
+# Heavy dependencies (pandas, NumPy, requests, pytz, the LangChain community tools) are
+# imported inside the functions that need them, so importing this module and building
+# the tool list stays cheap; each cost is paid on the first call of the tool using it.
+from langchain_core.tools import BaseTool, StructuredTool, Tool
+from typing import TYPE_CHECKING, List, Callable, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime
+from time import perf_counter
 from src.utils import logger
+from src.tool_runtime import ToolFailure, current_session, timed_tool
+from src.metrics import get_tool_metrics
+from src.circuit_breaker import get_breaker_registry
+from src.sandbox import SandboxError, get_sandbox_pool
+from src.regex_engine import RegexTimeout, search
+from src.config import (
+    OPENWEATHER_BASE_URL, DATASET_MAX_BYTES, DATASET_SESSION_MAX_BYTES, DATASET_CACHE_DIR, DATASET_MAX_RESULT_ROWS,
+    CSV_UPLOAD_DIR, SESSION_EXPIRATION
+)
+from collections import OrderedDict
 from functools import wraps
-import requests
 import json
 import re
-import pandas as pd
 import io
+import ast
+import hashlib
+import importlib.util
+import threading
 from typing import Dict, Any
 import os
 
-def safe_tool(func: Callable) -> Callable:
+if TYPE_CHECKING:
+    import pandas as pd
+
+def safe_tool(func: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
     """
-    Decorator to handle tool errors gracefully with logging and detailed error messages.
+    Decorator to handle tool errors gracefully and record per-tool metrics.
+    
+    Each call's latency, output size and outcome (a raised exception or a returned
+    ToolFailure counts as an error) go to the process-wide ToolMetrics registry.
     
     Args:
-        func (Callable): The function to be wrapped.
+        func (Optional[Callable]): The function to be wrapped; omit to use as `@safe_tool(name=...)`.
+        name (Optional[str]): Tool name the metrics are recorded under; defaults to the function name.
     
     Returns:
         Callable: The wrapped function with error handling.
     """
+    if func is None:
+        return lambda f: safe_tool(f, name=name)
+    tool_name = name or func.__name__
+    record = get_tool_metrics().record
+    
     @wraps(func)
     def wrapper(*args, **kwargs):
+        start = perf_counter()
         try:
-            return func(*args, **kwargs)
+            result = func(*args, **kwargs)
         except Exception as e:
             logger.error(f"Tool error in {func.__name__}: {str(e)}")
-            return f"Error in {func.__name__}: {str(e)}. Please check input or try again."
+            result = ToolFailure(f"Error in {func.__name__}: {str(e)}. Please check input or try again.")
+        elapsed = perf_counter() - start
+        if isinstance(result, str):
+            size = len(result) if result.isascii() else len(result.encode("utf-8"))
+        else:
+            size = 0
+        record(tool_name, elapsed, size, isinstance(result, ToolFailure))
+        return result
     return wrapper
 
-@safe_tool
+@safe_tool(name="current_time")
 def get_current_time(timezone: str = "UTC") -> str:
     """
     Returns the current time in a specified timezone with validation.
@@ -46,6 +80,8 @@ def get_current_time(timezone: str = "UTC") -> str:
     Returns:
         str: Formatted current time or error message if timezone is invalid.
     """
+    import pytz
+    
     try:
         tz = pytz.timezone(timezone)
         now = datetime.now(tz)
@@ -54,28 +90,30 @@ def get_current_time(timezone: str = "UTC") -> str:
         valid_zones = ", ".join(["UTC", "America/New_York", "Europe/London", "Asia/Tokyo"])
         return f"Unknown timezone '{timezone}'. Valid examples: {valid_zones}"
 
-@safe_tool
+@safe_tool(name="calculator")
 def calculate(expression: str) -> str:
     """
-    Safely evaluates mathematical expressions with input validation.
+    Safely evaluates mathematical expressions with a whitelisted, cached expression compiler.
     
     Args:
-        expression (str): A mathematical expression (e.g., '2+2', '(5*3)/2').
+        expression (str): A mathematical expression (e.g., '2+2', '2**10 % 7', 'sqrt(2)', '[1, 2, 3] * 2').
     
     Returns:
         str: Result of the calculation or error message if invalid.
     """
-    allowed_chars = set("0123456789+-*/(). ")
-    if not expression or not all(c in allowed_chars for c in expression):
-        return "Error: Invalid expression. Use numbers and operators (+, -, *, /, (, )) only."
+    from src.calculator import CalculatorError, evaluate, format_result
+    
+    if not expression or not expression.strip():
+        return "Error: Invalid expression. Provide a mathematical expression such as '(5*3)/2'."
     
     try:
-        result = eval(expression, {"__builtins__": {}}, {})
-        return str(result)
-    except Exception as e:
+        return format_result(evaluate(expression))
+    except CalculatorError as e:
+        return f"Error: {str(e)}"
+    except ArithmeticError as e:
         return f"Calculation error: {str(e)}. Ensure the expression is valid."
 
-@safe_tool
+@safe_tool(name="weather")
 def get_weather(city: str) -> str:
     """
     Retrieves current weather data for a specified city using OpenWeatherMap API.
@@ -86,15 +124,17 @@ def get_weather(city: str) -> str:
     Returns:
         str: Formatted weather information or error message if request fails.
     """
+    import requests
+    from src.http_client import get_http_client, is_service_failure
+    
     api_key = os.getenv("OPENWEATHER_API_KEY")
     if not api_key:
         return "Error: OpenWeatherMap API key not configured. Please set OPENWEATHER_API_KEY in .env."
     
-    base_url = "http://api.openweathermap.org/data/2.5/weather"
     params = {"q": city, "appid": api_key, "units": "metric"}
     
     try:
-        response = requests.get(base_url, params=params, timeout=5)
+        response = get_http_client().get(OPENWEATHER_BASE_URL, params=params, timeout=5)
         response.raise_for_status()
         data = response.json()
         
@@ -112,12 +152,13 @@ def get_weather(city: str) -> str:
                 f"- Humidity: {humidity}%\n"
                 f"- Wind Speed: {wind_speed} m/s")
     except requests.exceptions.RequestException as e:
-        return f"Error fetching weather data for '{city}': {str(e)}"
+        message = f"Error fetching weather data for '{city}': {str(e)}"
+        return ToolFailure(message) if is_service_failure(e) else message
 
-@safe_tool
+@safe_tool(name="currency_converter")
 def convert_currency(amount: str, from_currency: str, to_currency: str) -> str:
     """
-    Converts an amount from one currency to another using ExchangeRate-API.
+    Converts an amount from one currency to another using cached ExchangeRate-API rate tables.
     
     Args:
         amount (str): Amount to convert (e.g., '100').
@@ -127,65 +168,494 @@ def convert_currency(amount: str, from_currency: str, to_currency: str) -> str:
     Returns:
         str: Converted amount or error message if request fails.
     """
-    api_key = os.getenv("EXCHANGERATE_API_KEY")
-    if not api_key:
-        return "Error: ExchangeRate-API key not configured. Please set EXCHANGERATE_API_KEY in .env."
+    import requests
+    from src.fx_rates import RateTableError, get_rate_cache
+    from src.http_client import is_service_failure
     
     try:
         amount = float(amount)
         if amount < 0:
             return "Error: Amount must be non-negative."
         
-        base_url = f"https://v6.exchangerate-api.com/v6/{api_key}/latest/{from_currency.upper()}"
-        response = requests.get(base_url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data["result"] != "success":
-            return f"Error: Could not retrieve rates for {from_currency}. {data.get('error-type', 'Unknown error')}"
-        
-        rate = data["conversion_rates"].get(to_currency.upper())
-        if not rate:
-            return f"Error: Invalid target currency '{to_currency}'. Supported currencies: {', '.join(data['conversion_rates'].keys())}"
-        
+        rate = get_rate_cache().get_rate(from_currency, to_currency)
         converted = amount * rate
-        return f"{amount} {from_currency.upper()} = {converted:.2f} {to_currency.upper()}"
+        return f"{amount} {from_currency.strip().upper()} = {converted:.2f} {to_currency.strip().upper()}"
     except ValueError:
         return "Error: Invalid amount. Please provide a valid number."
+    except RateTableError as e:
+        return f"Error: {str(e)}"
     except requests.exceptions.RequestException as e:
-        return f"Error fetching exchange rates: {str(e)}"
+        message = f"Error fetching exchange rates: {str(e)}"
+        return ToolFailure(message) if is_service_failure(e) else message
+
+def convert_currencies(conversions: str) -> str:
+    """
+    Converts one or more 'amount,from_currency,to_currency' triples separated by ';'.
+    
+    Args:
+        conversions (str): E.g. '100,USD,EUR' or '100,USD,EUR;50,GBP,JPY'.
+    
+    Returns:
+        str: One result line per conversion.
+    """
+    results = []
+    for conversion in filter(None, (part.strip() for part in conversions.split(";"))):
+        parts = conversion.split(",")
+        if len(parts) != 3:
+            results.append(f"Error: '{conversion}' must be 'amount,from_currency,to_currency'")
+        else:
+            results.append(convert_currency(*parts))
+    if not results:
+        return "Error: Input must be 'amount,from_currency,to_currency'"
+    output = "\n".join(results)
+    # A failed conversion means the rate service failed; keep that visible to the circuit breaker.
+    return ToolFailure(output) if any(isinstance(r, ToolFailure) for r in results) else output
 
-@safe_tool
+@safe_tool(name="csv_analyzer")
 def analyze_csv(file_content: str) -> str:
     """
-    Analyzes a CSV file content and provides basic statistical insights.
+    Analyzes a CSV file in a single streaming pass and provides basic statistical insights.
     
     Args:
-        file_content (str): CSV content as a string.
+        file_content (str): CSV content as a string, or the name of an uploaded CSV file.
     
     Returns:
         str: Statistical summary or error message if analysis fails.
     """
+    from src.csv_stream import format_profile, profile_csv, resolve_upload_path
+    
     try:
-        # Read CSV content into a pandas DataFrame
-        df = pd.read_csv(io.StringIO(file_content))
-        if df.empty:
+        # Uploaded files are read from disk in chunks instead of being passed through the prompt
+        path = resolve_upload_path(file_content)
+        profile = profile_csv(path if path else io.StringIO(file_content))
+        if profile.rows == 0:
             return "Error: The CSV file is empty."
         
-        # Basic analysis
-        numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-        if not numeric_cols.any():
+        if not any(column.numeric and column.stats.count for column in profile.columns.values()):
             return "Error: No numeric columns found for statistical analysis."
         
-        stats = df[numeric_cols].describe().to_string()
-        return f"CSV Analysis:\n\n{stats}"
+        return format_profile(profile)
     except Exception as e:
         return f"Error analyzing CSV: {str(e)}. Ensure the input is valid CSV format."
 
-@safe_tool
+class DatasetError(Exception):
+    """Raised when a dataset cannot be registered, found or queried."""
+
+class DatasetRegistry:
+    """
+    Parsed CSV datasets of each session, addressed by an ID derived from the file content.
+    
+    Each upload is parsed once into a compact DataFrame (downcast ints, categoricals) and,
+    when pyarrow is available, cached as Parquet so it reloads quickly after eviction. A
+    dataset is only served to the sessions that uploaded it; identical uploads share one
+    frame. Loaded frames are evicted least-recently-used to stay under a memory limit for
+    all sessions and a smaller one per session. When a session ends, its uploads are
+    deleted, with the frames and Parquet copies no other session uses; files left behind
+    by a restart are swept once they are older than the session expiration.
+    """
+    def __init__(self, max_bytes: int = DATASET_MAX_BYTES, session_max_bytes: int = DATASET_SESSION_MAX_BYTES,
+                 cache_dir: Optional[str] = DATASET_CACHE_DIR, upload_dir: str = CSV_UPLOAD_DIR,
+                 max_file_age: float = SESSION_EXPIRATION):
+        """
+        Initializes the DatasetRegistry.
+        
+        Args:
+            max_bytes (int): Memory limit for all loaded DataFrames together.
+            session_max_bytes (int): Memory limit for the loaded DataFrames of one session.
+            cache_dir (Optional[str]): Directory for Parquet copies; None disables them.
+            upload_dir (str): Directory of uploaded CSVs, swept of unregistered files.
+            max_file_age (float): Seconds after which unregistered uploads and Parquet copies are deleted.
+        """
+        from src.cache import SingleFlight
+        
+        self._max_bytes = max_bytes
+        self._session_max_bytes = session_max_bytes
+        self._cache_dir = cache_dir if cache_dir and importlib.util.find_spec("pyarrow") else None
+        self._upload_dir = upload_dir
+        self._max_file_age = max_file_age
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        # dataset ID -> {"name": display name, "paths": {session ID: uploaded file}}
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loads = SingleFlight()
+        self._stats = {"registered": 0, "parses": 0, "parquet_loads": 0, "hits": 0, "evictions": 0, "deleted_files": 0}
+        self.sweep()
+    
+    @staticmethod
+    def dataset_id_for(path: str) -> str:
+        """Returns the content-hash ID of a file without reading it into memory at once."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return f"ds_{digest.hexdigest()[:12]}"
+    
+    def _parquet_path(self, dataset_id: str) -> Optional[str]:
+        return os.path.join(self._cache_dir, f"{dataset_id}.parquet") if self._cache_dir else None
+    
+    def _owners_locked(self, dataset_id: str) -> Dict[Optional[str], str]:
+        return self._sources.get(dataset_id, {}).get("paths", {})
+    
+    def _session_bytes_locked(self, session_id: Optional[str]) -> int:
+        return sum(size for dataset_id, size in self._sizes.items() if session_id in self._owners_locked(dataset_id))
+    
+    def _drop_frame_locked(self, dataset_id: str) -> None:
+        self._frames.pop(dataset_id, None)
+        self._sizes.pop(dataset_id, None)
+    
+    def _evict_locked(self, session_id: Optional[str], keep: str) -> None:
+        while True:
+            if sum(self._sizes.values()) > self._max_bytes:
+                candidates = [dataset_id for dataset_id in self._frames if dataset_id != keep]
+            elif self._session_bytes_locked(session_id) > self._session_max_bytes:
+                candidates = [dataset_id for dataset_id in self._frames
+                              if dataset_id != keep and session_id in self._owners_locked(dataset_id)]
+            else:
+                return
+            if not candidates:
+                return
+            self._drop_frame_locked(candidates[0])
+            self._stats["evictions"] += 1
+            logger.info(f"Evicted dataset {candidates[0]} from memory")
+    
+    def _load(self, dataset_id: str, session_id: Optional[str]) -> "pd.DataFrame":
+        import pandas as pd
+        from src.csv_stream import profile_csv
+        
+        parquet_path = self._parquet_path(dataset_id)
+        if parquet_path and os.path.exists(parquet_path):
+            df = pd.read_parquet(parquet_path)
+            with self._lock:
+                self._stats["parquet_loads"] += 1
+        else:
+            with self._lock:
+                paths = list(self._owners_locked(dataset_id).values())
+            if not paths:
+                raise DatasetError(f"Unknown dataset '{dataset_id}'. Upload the CSV in the sidebar to get an ID.")
+            # A streaming pass picks compact dtypes before the single full parse.
+            dtypes = profile_csv(paths[0]).compact_dtypes()
+            df = pd.read_csv(paths[0], dtype=dtypes)
+            with self._lock:
+                self._stats["parses"] += 1
+            if parquet_path:
+                os.makedirs(self._cache_dir, exist_ok=True)
+                df.to_parquet(parquet_path, index=False)
+        
+        size = int(df.memory_usage(deep=True).sum())
+        limit = min(self._max_bytes, self._session_max_bytes)
+        if size > limit:
+            raise DatasetError(f"Dataset '{dataset_id}' needs {size / 1024 ** 2:.0f} MB, "
+                               f"more than the {limit / 1024 ** 2:.0f} MB limit.")
+        with self._lock:
+            self._frames[dataset_id] = df
+            self._sizes[dataset_id] = size
+            self._evict_locked(session_id, keep=dataset_id)
+        return df
+    
+    def register(self, path: str, session_id: Optional[str] = None, name: Optional[str] = None) -> str:
+        """
+        Registers a CSV file uploaded by a session and parses it once.
+        
+        Args:
+            path (str): Path to the CSV file; deleted when the session is released.
+            session_id (Optional[str]): Session that uploaded the file and may query it.
+            name (Optional[str]): Display name; defaults to the file name.
+        
+        Returns:
+            str: The dataset ID.
+        """
+        dataset_id = self.dataset_id_for(path)
+        with self._lock:
+            source = self._sources.setdefault(dataset_id, {"name": name or os.path.basename(path), "paths": {}})
+            source["paths"][session_id] = path
+            self._stats["registered"] += 1
+        self.get(dataset_id, session_id)
+        return dataset_id
+    
+    def get(self, dataset_id: str, session_id: Optional[str] = None) -> "pd.DataFrame":
+        """
+        Returns a dataset registered by the session, reloading it if it was evicted.
+        
+        Raises:
+            DatasetError: If the session has no dataset with this ID, or it exceeds the memory limit.
+        """
+        dataset_id = dataset_id.strip().strip("'\"")
+        with self._lock:
+            if session_id not in self._owners_locked(dataset_id):
+                raise DatasetError(f"Unknown dataset '{dataset_id}'. Upload the CSV in the sidebar to get an ID.")
+            df = self._frames.get(dataset_id)
+            if df is not None:
+                self._frames.move_to_end(dataset_id)
+                self._stats["hits"] += 1
+                return df
+        df, _ = self._loads.do(dataset_id, lambda: self._load(dataset_id, session_id))
+        return df
+    
+    def name_of(self, dataset_id: str) -> str:
+        with self._lock:
+            return self._sources.get(dataset_id, {}).get("name", dataset_id)
+    
+    def session_bytes(self, session_id: Optional[str]) -> int:
+        """Returns the memory held by the loaded datasets of a session."""
+        with self._lock:
+            return self._session_bytes_locked(session_id)
+    
+    def unload_session(self, session_id: Optional[str]) -> int:
+        """
+        Drops the loaded frames only this session uses; they reload from disk on the next query.
+        
+        Returns:
+            int: Bytes freed.
+        """
+        with self._lock:
+            owned = [dataset_id for dataset_id in self._frames if set(self._owners_locked(dataset_id)) == {session_id}]
+            freed = sum(self._sizes[dataset_id] for dataset_id in owned)
+            for dataset_id in owned:
+                self._drop_frame_locked(dataset_id)
+        return freed
+    
+    def release_session(self, session_id: Optional[str]) -> int:
+        """
+        Forgets a session's datasets and deletes its uploads, plus frames and Parquet copies no other session uses.
+        
+        Returns:
+            int: Number of datasets released.
+        """
+        files = []
+        released = 0
+        with self._lock:
+            for dataset_id in [dataset_id for dataset_id in self._sources
+                               if session_id in self._owners_locked(dataset_id)]:
+                paths = self._sources[dataset_id]["paths"]
+                path = paths.pop(session_id)
+                if path not in paths.values():
+                    files.append(path)
+                if not paths:
+                    del self._sources[dataset_id]
+                    self._drop_frame_locked(dataset_id)
+                    files.append(self._parquet_path(dataset_id))
+                released += 1
+        self._delete_files([path for path in files if path])
+        if released:
+            logger.info(f"Released {released} dataset(s) of session {session_id}")
+        self.sweep()
+        return released
+    
+    def sweep(self) -> int:
+        """
+        Deletes uploads and Parquet copies that no registered dataset refers to and that are older than max_file_age.
+        
+        Returns:
+            int: Number of deleted files.
+        """
+        with self._lock:
+            referenced = {os.path.realpath(path)
+                          for source in self._sources.values() for path in source["paths"].values()}
+            referenced.update(os.path.realpath(self._parquet_path(dataset_id))
+                              for dataset_id in self._sources if self._cache_dir)
+        cutoff = datetime.now().timestamp() - self._max_file_age
+        stale = []
+        for directory in (self._upload_dir, self._cache_dir):
+            if not directory or not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if (entry.is_file() and os.path.realpath(entry.path) not in referenced
+                        and entry.stat().st_mtime < cutoff):
+                    stale.append(entry.path)
+        return self._delete_files(stale)
+    
+    def _delete_files(self, paths: List[str]) -> int:
+        deleted = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not delete dataset file {path}: {e}")
+        if deleted:
+            with self._lock:
+                self._stats["deleted_files"] += deleted
+        return deleted
+    
+    def stats(self) -> Dict[str, Any]:
+        """Returns registered and loaded datasets, memory use and load/eviction counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["datasets"] = len(self._sources)
+            stats["loaded"] = len(self._frames)
+            stats["bytes"] = sum(self._sizes.values())
+            stats["max_bytes"] = self._max_bytes
+        return stats
+
+_dataset_registry: Optional[DatasetRegistry] = None
+_dataset_registry_lock = threading.Lock()
+
+def get_dataset_registry() -> DatasetRegistry:
+    """Returns the process-wide dataset registry."""
+    global _dataset_registry
+    with _dataset_registry_lock:
+        if _dataset_registry is None:
+            _dataset_registry = DatasetRegistry()
+        return _dataset_registry
+
+_FILTER_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod,
+    ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple,
+)
+_AGGREGATIONS = {"sum", "mean", "median", "min", "max", "count", "std", "nunique"}
+_FILTER_MAX_LITERAL = 1000  # Characters in a string literal of a query filter
+
+def _check_filter(expression: str, columns: List[str], numeric_columns: List[str]) -> None:
+    """
+    Allows only comparisons and arithmetic over column names and literals in a query filter.
+    
+    Arithmetic is limited to numeric columns and numeric literals, and string literals are
+    bounded, so a filter cannot make pandas build huge values (e.g. "'a' * 999999999 == col").
+    """
+    quoted = re.findall(r"`([^`]*)`", expression)
+    unknown = [name for name in quoted if name not in columns]
+    if unknown:
+        raise DatasetError(f"Unknown columns in filter: {', '.join(unknown)}")
+    names = {f"_quoted_column_{i}": name for i, name in enumerate(quoted)}
+    placeholders = iter(names)
+    try:
+        tree = ast.parse(re.sub(r"`[^`]*`", lambda _: next(placeholders), expression), mode="eval")
+    except SyntaxError as e:
+        raise DatasetError(f"Invalid filter: {e.msg}") from None
+    
+    def numeric(node: ast.AST) -> bool:
+        if isinstance(node, ast.Constant):
+            return isinstance(node.value, (int, float)) and not isinstance(node.value, bool)
+        if isinstance(node, ast.Name):
+            return names.get(node.id, node.id) in numeric_columns
+        if isinstance(node, ast.UnaryOp):
+            return numeric(node.operand)
+        if isinstance(node, ast.BinOp):
+            return numeric(node.left) and numeric(node.right)
+        return False
+    
+    for node in ast.walk(tree):
+        if not isinstance(node, _FILTER_NODES):
+            raise DatasetError(f"Unsupported filter syntax: {type(node).__name__}")
+        if isinstance(node, ast.Name) and node.id not in columns and node.id not in names:
+            raise DatasetError(f"Unknown column '{node.id}'. Columns: {', '.join(columns)}")
+        if isinstance(node, ast.BinOp) and not numeric(node):
+            raise DatasetError("Arithmetic in filters is only allowed on numeric columns and numbers")
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and len(node.value) > _FILTER_MAX_LITERAL:
+            raise DatasetError(f"String literals in filters are limited to {_FILTER_MAX_LITERAL} characters")
+
+@safe_tool(name="dataset_info")
+def describe_dataset(dataset_id: str) -> str:
+    """
+    Describes a registered dataset: shape, column dtypes and the first rows.
+    
+    Args:
+        dataset_id (str): Dataset ID shown when the CSV was uploaded (e.g., 'ds_1a2b3c4d5e6f').
+    
+    Returns:
+        str: Dataset overview or error message.
+    """
+    try:
+        registry = get_dataset_registry()
+        df = registry.get(dataset_id, current_session())
+        dtypes = ", ".join(f"{column}: {dtype}" for column, dtype in df.dtypes.astype(str).items())
+        return (f"Dataset {dataset_id.strip()} ({registry.name_of(dataset_id.strip())}): "
+                f"{len(df)} rows, {len(df.columns)} columns\n"
+                f"Columns: {dtypes}\n\nFirst rows:\n{df.head(5).to_string(index=False)}")
+    except DatasetError as e:
+        return f"Error: {str(e)}"
+
+@safe_tool(name="dataset_query")
+def query_dataset(dataset_id: str, filter: str = "", columns: Optional[List[str]] = None,
+                  group_by: Optional[List[str]] = None, aggregate: Optional[Dict[str, str]] = None,
+                  sort_by: Optional[str] = None, descending: bool = True, top_k: int = DATASET_MAX_RESULT_ROWS) -> str:
+    """
+    Runs a filter / group-by / aggregate / top-k query on a registered dataset.
+    
+    Args:
+        dataset_id (str): Dataset ID shown when the CSV was uploaded.
+        filter (str): Row filter in pandas query syntax (e.g., "price > 10 and region == 'north'").
+        columns (Optional[List[str]]): Columns to return when not aggregating.
+        group_by (Optional[List[str]]): Columns to group by.
+        aggregate (Optional[Dict[str, str]]): Column to aggregation (sum, mean, median, min, max, count, std, nunique).
+        sort_by (Optional[str]): Column to sort the result by.
+        descending (bool): Sort order.
+        top_k (int): Maximum number of rows returned.
+    
+    Returns:
+        str: Compact result table or error message.
+    """
+    # Models often send a single column as a bare string; list('price') would split it into letters.
+    if isinstance(columns, str):
+        columns = [columns]
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    try:
+        df = get_dataset_registry().get(dataset_id, current_session())
+        known = list(map(str, df.columns))
+        referenced = list(columns or []) + list(group_by or []) + list((aggregate or {}).keys()) + ([sort_by] if sort_by else [])
+        unknown = [column for column in referenced if column not in known]
+        if unknown:
+            return f"Error: Unknown columns {', '.join(unknown)}. Columns: {', '.join(known)}"
+        bad = [func for func in (aggregate or {}).values() if func not in _AGGREGATIONS]
+        if bad:
+            return f"Error: Unsupported aggregations {', '.join(bad)}. Use: {', '.join(sorted(_AGGREGATIONS))}"
+        
+        if filter:
+            import pandas as pd
+            numeric_columns = [str(column) for column, dtype in df.dtypes.items()
+                               if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+            _check_filter(filter, known, numeric_columns)
+            df = df.query(filter)
+        if aggregate:
+            result = df.groupby(group_by, observed=True).agg(aggregate) if group_by else df.agg(aggregate).to_frame().T
+        elif group_by:
+            result = df.groupby(group_by, observed=True).size().to_frame("count")
+        else:
+            result = df[columns] if columns else df
+        top_k = max(1, min(top_k, DATASET_MAX_RESULT_ROWS))
+        total = len(result)
+        if sort_by and sort_by in result.columns:
+            result = result.nlargest(top_k, sort_by) if descending else result.nsmallest(top_k, sort_by)
+        
+        header = f"{total} rows" + (f" (showing {top_k})" if total > top_k else "")
+        return f"{header}\n{result.head(top_k).to_string()}"
+    except DatasetError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error querying dataset: {str(e)}. Check column names and the filter syntax."
+
+def run_dataset_query(request: str) -> str:
+    """
+    Parses a JSON query for the ReAct dataset_query tool and runs it.
+    
+    Args:
+        request (str): JSON object with 'dataset_id' and optional query_dataset arguments.
+    
+    Returns:
+        str: Query result or error message.
+    """
+    try:
+        arguments = json.loads(request)
+    except json.JSONDecodeError as e:
+        return f"Error: Input must be a JSON object ({e.msg})."
+    if not isinstance(arguments, dict) or "dataset_id" not in arguments:
+        return "Error: Input must be a JSON object with a 'dataset_id' field."
+    allowed = {"dataset_id", "filter", "columns", "group_by", "aggregate", "sort_by", "descending", "top_k"}
+    unknown = set(arguments) - allowed
+    if unknown:
+        return f"Error: Unknown fields {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(allowed))}"
+    return query_dataset(**arguments)
+
+@safe_tool(name="python_executor")
 def execute_python_code(code: str) -> str:
     """
-    Safely executes a Python code snippet and returns the output.
+    Safely executes a Python code snippet in a sandboxed worker process and returns the output.
     
     Args:
         code (str): Python code to execute.
@@ -194,180 +664,324 @@ def execute_python_code(code: str) -> str:
         str: Output of the code or error message if execution fails.
     """
     try:
-        # Restricted environment for safe execution
-        safe_globals = {"__builtins__": {
-            "print": print,
-            "range": range,
-            "len": len,
-            "int": int,
-            "float": float,
-            "str": str,
-            "list": list,
-            "dict": dict,
-            "set": set,
-            "tuple": tuple,
-        }}
-        output = []
-        def capture_print(*args, **kwargs):
-            output.append(" ".join(map(str, args)))
-        
-        safe_globals["__builtins__"]["print"] = capture_print
-        exec(code, safe_globals, {})
-        return "\n".join(output) if output else "Code executed successfully (no output)."
-    except Exception as e:
+        return get_sandbox_pool().run("python", code)
+    except SandboxError as e:
         return f"Error executing Python code: {str(e)}. Ensure the code is valid and uses supported functions."
 
-@safe_tool
+@safe_tool(name="regex_matcher")
 def generate_regex_match(pattern: str, text: str) -> str:
     """
-    Applies a regex pattern to text and returns matching results.
+    Applies a regex pattern to text and returns matching results under a time budget.
     
     Args:
         pattern (str): Regular expression pattern.
-        text (str): Text to search for matches.
+        text (str): Text to search for matches, or the name of an uploaded file to scan line by line.
     
     Returns:
         str: Matching results or error message if pattern is invalid.
     """
+    from src.csv_stream import resolve_upload_path
+    
     try:
-        regex = re.compile(pattern)
-        matches = regex.findall(text)
-        if not matches:
+        path = resolve_upload_path(text)
+        result = search(pattern, text=None if path else text, path=path)
+        if not result.matches:
             return f"No matches found for pattern '{pattern}' in the provided text."
-        return f"Matches for pattern '{pattern}':\n{', '.join(str(m) for m in matches)}"
+        shown = ', '.join(str(m) for m in result.matches)
+        if result.truncated:
+            shown += f" ... (showing the first {len(result.matches)} matches)"
+        return f"Matches for pattern '{pattern}':\n{shown}"
     except re.error as e:
         return f"Error in regex pattern: {str(e)}. Please provide a valid regex pattern."
+    except (RegexTimeout, SandboxError) as e:
+        return f"Error in regex matching: {str(e)} Please simplify the pattern."
 
-def get_agent_tools() -> List[Tool]:
+@safe_tool(name="expand_observation")
+def expand_observation(observation_id: str, query: str = "") -> str:
     """
-    Provides a comprehensive set of tools with enhanced error handling and detailed descriptions.
+    Returns the full text of an observation that was compacted for the agent scratchpad.
+    
+    Args:
+        observation_id (str): Id from the compacted observation (e.g. 'obs_1a2b3c4d5e').
+        query (str): Optional focus if the full text is still too long.
     
     Returns:
-        List[Tool]: List of initialized LangChain Tool objects.
+        str: The full or focused text, or an error message.
     """
-    tools = []
-    
-    # Web Search Tool
-    try:
-        search_tool = Tool(
-            name="web_search",
-            func=DuckDuckGoSearchRun().run,
-            description=(
-                "Performs a web search for real-time information, current events, or unknown topics. "
-                "Input: A search query (e.g., 'latest space discoveries'). "
-                "Output: A summary of relevant web results."
-            )
-        )
-        tools.append(search_tool)
-        logger.info("Added web search tool")
-    except Exception as e:
-        logger.error(f"Failed to initialize web search tool: {e}")
+    from src.compaction import get_observation_compactor
+    return get_observation_compactor().expand(observation_id, query)
+
+def _expand_observation(query: str) -> str:
+    return expand_observation(*query.split("|", 1))
+
+def _web_search() -> Callable[[str], str]:
+    from langchain_community.tools import DuckDuckGoSearchRun
+    return DuckDuckGoSearchRun().run
+
+def _wikipedia() -> Callable[[str], str]:
+    from langchain_community.tools import WikipediaQueryRun
+    from langchain_community.utilities import WikipediaAPIWrapper
+    return WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(top_k_results=2)).run
+
+def _match_regex(query: str) -> str:
+    return generate_regex_match(*query.split("|", 1)) if "|" in query else "Error: Input must be 'pattern|text'"
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """
+    Declarative description of an agent tool.
     
-    # Wikipedia Tool
-    try:
-        wikipedia_tool = Tool(
-            name="wikipedia",
-            func=WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(top_k_results=2)).run,
-            description=(
-                "Queries Wikipedia for factual information about people, places, events, or concepts. "
-                "Input: A search query (e.g., 'Apollo 11 mission'). "
-                "Output: A concise summary from Wikipedia."
-            )
-        )
-        tools.append(wikipedia_tool)
-        logger.info("Added Wikipedia tool")
-    except Exception as e:
-        logger.error(f"Failed to initialize Wikipedia tool: {e}")
+    Declaring a tool creates nothing: a `factory` builds the underlying client on the
+    tool's first call, and heavy imports live inside the tool functions.
+    """
+    name: str
+    description: str
+    func: Optional[Callable[[str], str]] = None  # Single-string entry point for the ReAct agent
+    factory: Optional[Callable[[], Callable[[str], str]]] = None  # Builds `func` on first call instead
+    structured_func: Optional[Callable] = None  # Typed entry point for native function calling
+    cached: bool = False  # Reuse results through the tool result cache
+    requires: Tuple[str, ...] = ()  # Modules of which at least one must be installed
+
+    def is_available(self) -> bool:
+        return not self.requires or any(importlib.util.find_spec(module) for module in self.requires)
+
+def _lazy(name: str, factory: Callable[[], Callable[[str], str]]) -> Callable[[str], str]:
+    """Returns a function that builds the real tool function on its first call and reuses it afterwards."""
+    lock = threading.Lock()
+    built: List[Callable[[str], str]] = []
     
-    # Current Time Tool
-    time_tool = Tool(
+    def call(query: str) -> str:
+        if not built:
+            with lock:
+                if not built:
+                    try:
+                        built.append(factory())
+                    except Exception as e:
+                        logger.error(f"Failed to initialize {name} tool: {e}")
+                        return ToolFailure(f"Error in {name}: the tool is unavailable ({str(e)}). Use another tool.")
+                    logger.info(f"Initialized {name} tool on first use")
+        return built[0](query)
+    call.__name__ = name
+    return safe_tool(call, name=name)
+
+TOOL_SPECS: List[ToolSpec] = [
+    ToolSpec(
+        name="web_search",
+        factory=_web_search,
+        cached=True,
+        requires=("ddgs", "duckduckgo_search"),
+        description=(
+            "Performs a web search for real-time information, current events, or unknown topics. "
+            "Input: A search query (e.g., 'latest space discoveries'). "
+            "Output: A summary of relevant web results."
+        ),
+    ),
+    ToolSpec(
+        name="wikipedia",
+        factory=_wikipedia,
+        cached=True,
+        requires=("wikipedia",),
+        description=(
+            "Queries Wikipedia for factual information about people, places, events, or concepts. "
+            "Input: A search query (e.g., 'Apollo 11 mission'). "
+            "Output: A concise summary from Wikipedia."
+        ),
+    ),
+    ToolSpec(
         name="current_time",
         func=get_current_time,
+        structured_func=get_current_time,
         description=(
             "Retrieves the current date and time in a specified timezone. "
             "Input: A timezone name (e.g., 'UTC', 'America/New_York'). "
             "Output: Formatted date and time string."
-        )
-    )
-    tools.append(time_tool)
-    logger.info("Added current time tool")
-    
-    # Calculator Tool
-    calc_tool = Tool(
+        ),
+    ),
+    ToolSpec(
         name="calculator",
         func=calculate,
+        structured_func=calculate,
         description=(
-            "Evaluates mathematical expressions for arithmetic calculations. "
-            "Input: A mathematical expression (e.g., '2 + 2', '(5 * 3) / 2'). "
+            "Evaluates mathematical expressions, including ** (power), % (modulo) and functions such as "
+            "sqrt, log, sin, round, factorial, sum, mean, min and max (constants: pi, e). "
+            "Lists of values are computed element-wise. "
+            "Input: A mathematical expression (e.g., '2 + 2', '(5 * 3) / 2', 'sqrt(2) ** 3', '[10, 20, 30] * 1.2'). "
             "Output: The calculated result."
-        )
-    )
-    tools.append(calc_tool)
-    logger.info("Added calculator tool")
-    
-    # Weather Tool
-    weather_tool = Tool(
+        ),
+    ),
+    ToolSpec(
         name="weather",
         func=get_weather,
+        structured_func=get_weather,
         description=(
             "Fetches current weather information for a specified city using OpenWeatherMap API. "
             "Input: A city name (e.g., 'London', 'Tokyo'). "
             "Output: Weather conditions, temperature, humidity, and wind speed."
-        )
-    )
-    tools.append(weather_tool)
-    logger.info("Added weather tool")
-    
-    # Currency Converter Tool
-    currency_tool = Tool(
+        ),
+    ),
+    ToolSpec(
         name="currency_converter",
-        func=lambda x: convert_currency(*x.split(",")) if "," in x else "Error: Input must be 'amount,from_currency,to_currency'",
+        func=convert_currencies,
+        structured_func=convert_currency,
         description=(
             "Converts an amount from one currency to another using real-time exchange rates. "
-            "Input: Comma-separated amount, source currency, and target currency (e.g., '100,USD,EUR'). "
-            "Output: Converted amount."
-        )
-    )
-    tools.append(currency_tool)
-    logger.info("Added currency converter tool")
-    
-    # CSV Analysis Tool
-    csv_tool = Tool(
+            "Input: Comma-separated amount, source currency, and target currency (e.g., '100,USD,EUR'); "
+            "separate several conversions with ';' (e.g., '100,USD,EUR;50,GBP,JPY'). "
+            "Output: Converted amount(s)."
+        ),
+    ),
+    ToolSpec(
         name="csv_analyzer",
         func=analyze_csv,
+        structured_func=analyze_csv,
         description=(
             "Analyzes CSV content and provides statistical insights for numeric columns. "
-            "Input: Raw CSV content as a string. "
+            "Input: Raw CSV content as a string, or the file name of a CSV uploaded in the sidebar. "
             "Output: Statistical summary (count, mean, std, min, max, etc.)."
-        )
-    )
-    tools.append(csv_tool)
-    logger.info("Added CSV analyzer tool")
-    
-    # Python Code Execution Tool
-    python_tool = Tool(
+        ),
+    ),
+    ToolSpec(
+        name="dataset_info",
+        func=describe_dataset,
+        structured_func=describe_dataset,
+        description=(
+            "Shows the columns, dtypes and first rows of an uploaded dataset. "
+            "Input: A dataset ID (e.g., 'ds_1a2b3c4d5e6f'). "
+            "Output: Dataset overview."
+        ),
+    ),
+    ToolSpec(
+        name="dataset_query",
+        func=run_dataset_query,
+        structured_func=query_dataset,
+        description=(
+            "Filters, groups, aggregates and ranks an uploaded dataset without resending its data. "
+            "Input: JSON with 'dataset_id' and optional 'filter' (pandas query syntax), 'columns', 'group_by', "
+            "'aggregate' ({column: sum|mean|median|min|max|count|std|nunique}), 'sort_by', 'descending', 'top_k' "
+            "(e.g., '{\"dataset_id\": \"ds_1a2b3c4d5e6f\", \"filter\": \"price > 10\", \"group_by\": [\"region\"], "
+            "\"aggregate\": {\"price\": \"mean\"}, \"sort_by\": \"price\", \"top_k\": 5}'). "
+            "Output: Compact result table."
+        ),
+    ),
+    ToolSpec(
         name="python_executor",
         func=execute_python_code,
+        structured_func=execute_python_code,
         description=(
             "Safely executes Python code snippets in a restricted environment. "
             "Input: Python code as a string (supports basic operations, print, range, etc.). "
             "Output: Code output or error message."
-        )
-    )
-    tools.append(python_tool)
-    logger.info("Added Python code executor tool")
-    
-    # Regex Matcher Tool
-    regex_tool = Tool(
+        ),
+    ),
+    ToolSpec(
         name="regex_matcher",
-        func=lambda x: generate_regex_match(*x.split("|", 1)) if "|" in x else "Error: Input must be 'pattern|text'",
+        func=_match_regex,
+        structured_func=generate_regex_match,
         description=(
             "Applies a regex pattern to text and returns matches. "
-            "Input: Pattern and text separated by '|' (e.g., '\d+|Sample text 123'). "
+            "Input: Pattern and text separated by '|' (e.g., '\\d+|Sample text 123'); the text may also be "
+            "the file name of an uploaded file. "
             "Output: List of matches or error message."
-        )
-    )
-    tools.append(regex_tool)
-    logger.info("Added regex matcher tool")
+        ),
+    ),
+    ToolSpec(
+        name="expand_observation",
+        func=_expand_observation,
+        structured_func=expand_observation,
+        description=(
+            "Retrieves the full text of a tool result that was shortened. "
+            "Input: The observation id from the shortened result, optionally followed by '|' and what to look for "
+            "(e.g., 'obs_1a2b3c4d5e' or 'obs_1a2b3c4d5e|launch date'). "
+            "Output: The full text, or the parts most relevant to the query if it is very long."
+        ),
+    ),
+]
+
+class ToolRegistry:
+    """
+    Builds LangChain tools from TOOL_SPECS once per process and shares them across sessions.
     
-    return tools
+    The tools hold no per-session state, so every agent can use the same instances.
+    """
+    def __init__(self, specs: List[ToolSpec] = TOOL_SPECS):
+        """
+        Initializes the ToolRegistry.
+        
+        Args:
+            specs (List[ToolSpec]): Tool declarations, in the order presented to the agent.
+        """
+        self._specs = specs
+        self._tools: Dict[bool, List[BaseTool]] = {}
+        self._lock = threading.Lock()
+    
+    def _build_react_tool(self, spec: ToolSpec) -> Tool:
+        func = _lazy(spec.name, spec.factory) if spec.factory else spec.func
+        func = get_breaker_registry().wrap(spec.name, timed_tool(spec.name, func))
+        if spec.cached:
+            from src.cache import cached_tool
+            func = cached_tool(spec.name, func)
+        return Tool(name=spec.name, func=func, description=spec.description)
+    
+    def _build_structured_tool(self, spec: ToolSpec, react_tool: Tool) -> BaseTool:
+        # The "Input: ..." part of the description documents the string protocol, which the schema replaces.
+        description = spec.description.split(" Input:")[0]
+        if spec.structured_func is None:
+            def run_query(query: str) -> str:
+                return react_tool.func(query)
+            func = run_query
+        else:
+            func = get_breaker_registry().wrap(spec.name, timed_tool(spec.name, spec.structured_func))
+        return StructuredTool.from_function(func=func, name=spec.name, description=description)
+    
+    def _build(self) -> None:
+        react, structured = [], []
+        for spec in self._specs:
+            if not spec.is_available():
+                logger.error(f"Skipping {spec.name} tool: install one of {', '.join(spec.requires)}")
+                continue
+            tool = self._build_react_tool(spec)
+            react.append(tool)
+            structured.append(self._build_structured_tool(spec, tool))
+        self._tools = {False: react, True: structured}
+        # Start the sandbox pool now so its workers are warm for the first python_executor call.
+        get_sandbox_pool()
+        logger.info(f"Tool registry built with {len(react)} tools")
+    
+    def tools(self, structured: bool = False) -> List[BaseTool]:
+        """
+        Returns the shared tool instances, building them on the first call.
+        
+        Args:
+            structured (bool): Return tools with typed argument schemas for native function calling
+                               instead of single-string ReAct tools.
+        
+        Returns:
+            List[BaseTool]: The tools.
+        """
+        with self._lock:
+            if not self._tools:
+                self._build()
+            return list(self._tools[structured])
+
+_tool_registry = ToolRegistry()
+
+def get_tool_registry() -> ToolRegistry:
+    """Returns the process-wide tool registry."""
+    return _tool_registry
+
+def get_agent_tools(structured: bool = False) -> List[BaseTool]:
+    """
+    Provides a comprehensive set of tools with enhanced error handling and detailed descriptions.
+    
+    Tools whose circuit breaker is open are left out until their cooldown ends, so the
+    agent does not spend iterations on a service that is down.
+    
+    Args:
+        structured (bool): Return tools with typed argument schemas for native function calling
+                           instead of single-string ReAct tools.
+    
+    Returns:
+        List[BaseTool]: List of LangChain tool objects, shared across sessions.
+    """
+    breakers = get_breaker_registry()
+    return [tool for tool in get_tool_registry().tools(structured) if not breakers.is_open(tool.name)]